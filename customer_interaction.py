@@ -5,11 +5,16 @@ Customer Interaction System with LLM Integration
 
 import random
 import json
-from typing import Dict, List, Optional, Tuple
+import os
+import sys
+from collections import defaultdict, deque
+from itertools import islice, repeat
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
 from enum import Enum
 from game_core import CustomerType
 from order_system import Order
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 class DialogueMode(Enum):
     OFFLINE = "离线模式"
     ONLINE = "在线模式"
@@ -19,178 +24,148 @@ class InteractionResult(Enum):
     NEUTRAL = "中性"
     FAILURE = "失败"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DialogueOption:
     """对话选项"""
     text: str
     impact: Dict[str, int]  # 影响：如 {"credit": -2, "tip_chance": 0.3}
-    required_attributes: Dict[str, int] = None  # 需要的属性要求
+    required_attributes: Optional[Tuple[Tuple[str, int], ...]] = None  # 属性要求：((属性名, 最低值), ...)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CustomerDialogue:
     """客户对话数据"""
     customer_type: CustomerType
     trigger_condition: str
-    dialogue_options: List[DialogueOption]
-    fallback_phrases: List[str]
+    dialogue_options: Tuple[DialogueOption, ...]
+    fallback_phrases: Tuple[str, ...]
     context: str = ""
+    _all_unconditional: bool = field(init=False, repr=False, compare=False)  # 所有选项都没有属性要求
+    
+    def __post_init__(self):
+        # 静态数据规整为元组，回复短语驻留后历史分析中的比较更便宜
+        object.__setattr__(self, 'dialogue_options', tuple(self.dialogue_options))
+        object.__setattr__(self, 'fallback_phrases',
+                           tuple(sys.intern(phrase) for phrase in self.fallback_phrases))
+        object.__setattr__(self, '_all_unconditional',
+                           all(option.required_attributes is None for option in self.dialogue_options))
+
+class InteractionOutcome(NamedTuple):
+    """一次客户互动的结果"""
+    success: bool
+    customer_response: str
+    impact: Dict[str, int]
+    options_used: str
+    llm_generated: bool = False
+    options: Tuple[DialogueOption, ...] = ()  # 本次可选的对话选项
+    
+    @property
+    def available_options(self) -> List[str]:
+        """可选对话选项的文本（按需生成）"""
+        return [option.text for option in self.options]
+
+# 模拟LLM回复表：(客户类型, 触发条件) -> 候选回复，模块加载时构建一次
+# 触发条件与对话数据库一样做驻留，传入的已驻留 trigger 查表时按指针比较即可命中
+_LLM_RESPONSE_TABLE: Dict[Tuple[CustomerType, str], Tuple[Dict, ...]] = {
+    (CustomerType.PROGRAMMER_SHY, sys.intern("正常送达")): (
+        {"text": "已放门口，请取餐", "impact": {"credit": 2, "tip_chance": 0.5}},
+        {"text": "外卖到了，请享用", "impact": {"credit": 1}},
+        {"text": "餐食送达，无需回复", "impact": {"credit": 3, "tip_chance": 0.7}}
+    ),
+    (CustomerType.RICH_IMPATIENT, sys.intern("催单")): (
+        {"text": "抱歉延误，正在加急处理", "impact": {"credit": 0}},
+        {"text": "马上到达，请稍候", "impact": {"credit": -1}},
+        {"text": "尊敬的客户，我会尽快送达", "impact": {"credit": 2}}
+    )
+}
+
+_DEFAULT_LLM_OPTION = {"text": "好的，了解", "impact": {"credit": 0}}
+
+# 客户类型 -> 驻留后的显示名，记录互动时免去枚举 .value 属性查找
+_CT_VALUE: Dict[CustomerType, str] = {ct: sys.intern(ct.value) for ct in CustomerType}
+
+# LLM提示词模板，模块加载时解析一次，调用时只做位置参数替换
+_PROMPT_TMPL = """
+        你是一个外卖配送员，正在与客户互动。
+        
+        客户信息：
+        - 类型：{0}
+        - 订单优先级：{1}
+        - 配送区域：{2}
+        
+        当前情况：{3}
+        
+        玩家属性：
+        - 情商：{4}
+        - 经验等级：{5}
+        
+        请生成3个不同的回复选项，并预测客户可能的反应。
+        每个选项应该包含不同的风险和收益。
+        """.format
+
+# 属性缺失标记，区别于任何合法的属性值
+_MISSING = object()
+
+# 互动历史最多保留的记录条数
+MAX_INTERACTION_HISTORY = 10000
+
+# 离线对话数据文件（随程序一起分发）
+DIALOGUE_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dialogues.json")
 
 class OfflineDialogueDatabase:
-    """离线对话数据库"""
+    """离线对话数据库（只读数据，所有互动系统共享同一个实例）"""
     
-    def __init__(self):
-        self.dialogues = self._initialize_dialogues()
+    _INSTANCE = None
     
-    def _initialize_dialogues(self) -> Dict[CustomerType, List[CustomerDialogue]]:
-        """初始化对话数据库"""
-        return {
-            CustomerType.PROGRAMMER_SHY: [
-                CustomerDialogue(
-                    customer_type=CustomerType.PROGRAMMER_SHY,
-                    trigger_condition="正常送达",
-                    dialogue_options=[
-                        DialogueOption(
-                            text="餐已放门口，您方便的时候取一下",
-                            impact={"credit": 2, "tip_chance": 0.6}
-                        ),
-                        DialogueOption(
-                            text="外卖到了！快来拿！",
-                            impact={"credit": -1, "complaint_chance": 0.3}
-                        )
-                    ],
-                    fallback_phrases=["谢谢", "辛苦了"],
-                    context="程序员社恐型客户更喜欢不被打扰的配送方式"
-                ),
-                CustomerDialogue(
-                    customer_type=CustomerType.PROGRAMMER_SHY,
-                    trigger_condition="超时配送",
-                    dialogue_options=[
-                        DialogueOption(
-                            text="不好意思来晚了，路上堵车",
-                            impact={"credit": -1}
-                        ),
-                        DialogueOption(
-                            text="餐放门口了，还热着呢",
-                            impact={"credit": 1, "tip_chance": 0.3}
-                        )
-                    ],
-                    fallback_phrases=["没关系", "下次注意时间"],
-                    context="超时情况下程序员通常比较宽容"
-                )
-            ],
-            
-            CustomerType.RICH_IMPATIENT: [
-                CustomerDialogue(
-                    customer_type=CustomerType.RICH_IMPATIENT,
-                    trigger_condition="催单",
-                    dialogue_options=[
-                        DialogueOption(
-                            text="您好，我已经在路上了，马上到",
-                            impact={"credit": 0}
-                        ),
-                        DialogueOption(
-                            text="不好意思，我这边出了点状况",
-                            impact={"credit": -3, "complaint_chance": 0.5}
-                        ),
-                        DialogueOption(
-                            text="先生您好，我正在加急处理您的订单",
-                            impact={"credit": 1},
-                            required_attributes={"emotional_intelligence": 3}
-                        )
-                    ],
-                    fallback_phrases=["你们效率真差", "下次还让我等这么久试试"],
-                    context="催单暴发户型需要恭敬的态度"
-                ),
-                CustomerDialogue(
-                    customer_type=CustomerType.RICH_IMPATIENT,
-                    trigger_condition="准时送达",
-                    dialogue_options=[
-                        DialogueOption(
-                            text="您的餐到了，请查收",
-                            impact={"tip_chance": 0.8, "credit": 2}
-                        ),
-                        DialogueOption(
-                            text="老板，您的外卖，还需要其他服务吗？",
-                            impact={"tip_chance": 1.0, "credit": 3},
-                            required_attributes={"emotional_intelligence": 4}
-                        )
-                    ],
-                    fallback_phrases=["不错，准时到达", "这次效率可以"],
-                    context="准时送达会获得丰厚小费"
-                )
-            ],
-            
-            CustomerType.DIFFICULT_ELDERLY: [
-                CustomerDialogue(
-                    customer_type=CustomerType.DIFFICULT_ELDERLY,
-                    trigger_condition="正常配送",
-                    dialogue_options=[
-                        DialogueOption(
-                            text="阿姨您好，您的外卖到了",
-                            impact={"complaint_chance": -0.2, "credit": 2}
-                        ),
-                        DialogueOption(
-                            text="您的餐到了",
-                            impact={"complaint_chance": 0.1}
-                        ),
-                        DialogueOption(
-                            text="奶奶，您的饭菜到了，趁热吃",
-                            impact={"tip_chance": 0.4, "credit": 3},
-                            required_attributes={"emotional_intelligence": 5}
-                        )
-                    ],
-                    fallback_phrases=["你这孩子真有礼貌", "现在的年轻人还是不错的"],
-                    context="称呼'阿姨'可以降低投诉率20%"
-                )
-            ],
-            
-            CustomerType.NORMAL: [
-                CustomerDialogue(
-                    customer_type=CustomerType.NORMAL,
-                    trigger_condition="正常配送",
-                    dialogue_options=[
-                        DialogueOption(
-                            text="您好，您的外卖到了",
-                            impact={"credit": 1}
-                        ),
-                        DialogueOption(
-                            text="外卖送到，请慢用",
-                            impact={"credit": 1, "tip_chance": 0.2}
-                        )
-                    ],
-                    fallback_phrases=["谢谢", "辛苦了"],
-                    context="普通客户交互"
-                )
-            ],
-            
-            CustomerType.VIP: [
+    def __init__(self, filename: str = DIALOGUE_DATA_FILE):
+        self.dialogues = self._load_dialogues(filename)
+        # (客户类型, 触发条件) -> 对话 的扁平索引，get_dialogue 直接查表
+        self._index = {
+            (customer_type, dialogue.trigger_condition): dialogue
+            for customer_type, dialogue_list in self.dialogues.items()
+            for dialogue in dialogue_list
+        }
+    
+    @classmethod
+    def instance(cls) -> 'OfflineDialogueDatabase':
+        """获取共享的对话数据库，首次调用时加载数据文件"""
+        if cls._INSTANCE is None:
+            cls._INSTANCE = cls()
+        return cls._INSTANCE
+    
+    @staticmethod
+    def _load_dialogues(filename: str) -> Dict[CustomerType, List[CustomerDialogue]]:
+        """从数据文件加载对话数据库"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        dialogues = {}
+        for type_name, dialogue_list in data.items():
+            customer_type = CustomerType[type_name]
+            dialogues[customer_type] = [
                 CustomerDialogue(
-                    customer_type=CustomerType.VIP,
-                    trigger_condition="正常配送",
-                    dialogue_options=[
-                        DialogueOption(
-                            text="您好，您的VIP专享外卖已送达",
-                            impact={"credit": 2, "tip_chance": 0.6}
-                        ),
+                    customer_type=customer_type,
+                    trigger_condition=sys.intern(entry['trigger_condition']),
+                    dialogue_options=tuple(
                         DialogueOption(
-                            text="尊敬的客户，您的餐食已送达，请享用",
-                            impact={"credit": 3, "tip_chance": 0.8},
-                            required_attributes={"emotional_intelligence": 3}
+                            text=option['text'],
+                            impact=option['impact'],
+                            required_attributes=tuple(
+                                (sys.intern(attr), min_value)
+                                for attr, min_value in option['required_attributes'].items()
+                            ) if 'required_attributes' in option else None
                         )
-                    ],
-                    fallback_phrases=["服务很好", "下次继续选择你们"],
-                    context="VIP客户需要优质服务"
+                        for option in entry['dialogue_options']
+                    ),
+                    fallback_phrases=entry['fallback_phrases'],
+                    context=entry.get('context', "")
                 )
+                for entry in dialogue_list
             ]
-        }
+        return dialogues
     
     def get_dialogue(self, customer_type: CustomerType, trigger: str) -> Optional[CustomerDialogue]:
         """获取对话数据"""
-        if customer_type in self.dialogues:
-            for dialogue in self.dialogues[customer_type]:
-                if dialogue.trigger_condition == trigger:
-                    return dialogue
-        return None
+        return self._index.get((customer_type, trigger))
 
 class CustomerInteractionSystem:
     """客户互动系统"""
@@ -198,67 +173,132 @@ class CustomerInteractionSystem:
     def __init__(self, game_state, mode: DialogueMode = DialogueMode.OFFLINE):
         self.game_state = game_state
         self.mode = mode
-        self.offline_db = OfflineDialogueDatabase()
-        self.interaction_history = []
+        self.offline_db = OfflineDialogueDatabase.instance()
+        # 互动历史按列存储（SoA），模式分析只需遍历客户类型和信用变化两列
+        # 各列都是定长 deque，超出上限时自动丢弃最旧的记录
+        self._hist_timestamp = deque(maxlen=MAX_INTERACTION_HISTORY)
+        self._hist_ct = deque(maxlen=MAX_INTERACTION_HISTORY)
+        self._hist_trigger = deque(maxlen=MAX_INTERACTION_HISTORY)
+        self._hist_choice = deque(maxlen=MAX_INTERACTION_HISTORY)
+        self._hist_response = deque(maxlen=MAX_INTERACTION_HISTORY)
+        self._hist_impact = deque(maxlen=MAX_INTERACTION_HISTORY)
+        self._hist_credit = deque(maxlen=MAX_INTERACTION_HISTORY)
+        self._rng = random.Random()  # 独立随机数生成器，避免模块级共享实例
+        self._np_rng = np.random.default_rng(self._rng.getrandbits(64))  # 批量互动使用
+        # 对话可用选项缓存：(id(对话), 属性版本号) -> 选项元组；版本号变化时整体清空
+        self._opt_cache: Dict[Tuple[int, int], Tuple[DialogueOption, ...]] = {}
+        self._opt_cache_version = -1
     
-    def interact_with_customer(self, order: Order, trigger: str) -> Dict:
+    def interact_with_customer(self, order: Order, trigger: str) -> InteractionOutcome:
         """与客户互动"""
+        trigger = sys.intern(trigger)  # 驻留后字典键比较退化为指针比较
         if self.mode == DialogueMode.OFFLINE:
             return self._offline_interaction(order, trigger)
         else:
             return self._online_interaction(order, trigger)
     
-    def _offline_interaction(self, order: Order, trigger: str) -> Dict:
+    def _offline_interaction(self, order: Order, trigger: str) -> InteractionOutcome:
         """离线模式互动"""
         dialogue = self.offline_db.get_dialogue(order.customer_type, trigger)
         
         if not dialogue:
             # 回退到默认对话
-            return {
-                'success': True,
-                'customer_response': "好的，谢谢",
-                'impact': {"credit": 0},
-                'options_used': "默认回复"
-            }
+            return InteractionOutcome(True, "好的，谢谢", {"credit": 0}, "默认回复")
         
         # 过滤可用选项（检查属性要求）
-        available_options = []
-        for option in dialogue.dialogue_options:
-            if self._check_attribute_requirements(option.required_attributes):
-                available_options.append(option)
-        
-        if not available_options:
-            available_options = dialogue.dialogue_options  # 如果没有可用选项，使用全部
+        available_options = self._available_options(dialogue)
         
         # 模拟选择（实际游戏中应该让玩家选择）
-        chosen_option = random.choice(available_options)
+        chosen_option = self._rng.choice(available_options)
         
         # 应用影响
         self._apply_interaction_impact(chosen_option.impact)
         
         # 生成客户回复
-        customer_response = random.choice(dialogue.fallback_phrases)
+        customer_response = self._rng.choice(dialogue.fallback_phrases)
         
         # 记录互动历史
-        interaction_record = {
-            'timestamp': self.game_state.current_time.isoformat(),
-            'customer_type': order.customer_type.value,
-            'trigger': trigger,
-            'player_choice': chosen_option.text,
-            'customer_response': customer_response,
-            'impact': chosen_option.impact
-        }
-        self.interaction_history.append(interaction_record)
+        self._record_interaction(
+            _CT_VALUE[order.customer_type], trigger, chosen_option.text,
+            customer_response, chosen_option.impact
+        )
         
-        return {
-            'success': True,
-            'customer_response': customer_response,
-            'impact': chosen_option.impact,
-            'options_used': chosen_option.text,
-            'available_options': [opt.text for opt in available_options]
-        }
+        return InteractionOutcome(
+            True, customer_response, chosen_option.impact, chosen_option.text,
+            options=available_options
+        )
     
-    def _online_interaction(self, order: Order, trigger: str) -> Dict:
+    def _available_options(self, dialogue: CustomerDialogue) -> Tuple[DialogueOption, ...]:
+        """过滤可用选项（检查属性要求），能力属性未变化时直接复用上次的结果"""
+        if dialogue._all_unconditional:
+            return dialogue.dialogue_options
+        version = self.game_state.attributes._version
+        if version != self._opt_cache_version:
+            self._opt_cache.clear()
+            self._opt_cache_version = version
+        key = (id(dialogue), version)
+        available_options = self._opt_cache.get(key)
+        if available_options is None:
+            available_options = tuple(
+                option for option in dialogue.dialogue_options
+                if self._check_attribute_requirements(option.required_attributes or ())
+            ) or dialogue.dialogue_options  # 如果没有可用选项，使用全部
+            self._opt_cache[key] = available_options
+        return available_options
+    
+    def interact_with_customer_many(self, orders: List[Order], triggers: List[str]) -> List[InteractionOutcome]:
+        """批量离线互动（用于模拟或回放大量订单）
+        
+        随机选择一次性生成，信用分变化汇总后一次结算，互动历史整批追加。
+        在线模式没有批量接口，逐个调用 interact_with_customer。
+        """
+        if self.mode != DialogueMode.OFFLINE:
+            return [self.interact_with_customer(order, trigger) for order, trigger in zip(orders, triggers)]
+        
+        get_dialogue = self.offline_db.get_dialogue
+        dialogues = [
+            get_dialogue(order.customer_type, sys.intern(trigger))
+            for order, trigger in zip(orders, triggers)
+        ]
+        option_lists = [self._available_options(d) if d else () for d in dialogues]
+        
+        # 所有随机下标一次生成；没有对话数据的订单占位为 1，结果不使用
+        option_idx = self._np_rng.integers(0, [len(opts) or 1 for opts in option_lists])
+        phrase_idx = self._np_rng.integers(0, [len(d.fallback_phrases) if d else 1 for d in dialogues])
+        
+        results = []
+        credits = []
+        recorded = []
+        for order, trigger, dialogue, options, oi, pi in zip(
+                orders, triggers, dialogues, option_lists, option_idx.tolist(), phrase_idx.tolist()):
+            if not dialogue:
+                results.append(InteractionOutcome(True, "好的，谢谢", {"credit": 0}, "默认回复"))
+                continue
+            chosen_option = options[oi]
+            customer_response = dialogue.fallback_phrases[pi]
+            credits.append(chosen_option.impact.get('credit', 0))
+            recorded.append((_CT_VALUE[order.customer_type], dialogue.trigger_condition,
+                             chosen_option.text, customer_response, chosen_option.impact))
+            results.append(InteractionOutcome(
+                True, customer_response, chosen_option.impact, chosen_option.text,
+                options=options
+            ))
+        
+        if recorded:
+            # 其余影响（小费、投诉概率）在订单结算时使用，这里只汇总信用分
+            self._apply_credit(int(np.add.reduce(np.asarray(credits, dtype=np.int64))))
+            customer_types, trigger_col, choices, responses, impacts = zip(*recorded)
+            self._hist_timestamp.extend(repeat(self.game_state.current_time, len(recorded)))
+            self._hist_ct.extend(customer_types)
+            self._hist_trigger.extend(trigger_col)
+            self._hist_choice.extend(choices)
+            self._hist_response.extend(responses)
+            self._hist_impact.extend(impacts)
+            self._hist_credit.extend(credits)
+        
+        return results
+    
+    def _online_interaction(self, order: Order, trigger: str) -> InteractionOutcome:
         """在线模式互动（模拟LLM调用）"""
         # 这里应该调用实际的LLM API
         # 为了演示，我们模拟一个智能回复
@@ -272,113 +312,106 @@ class CustomerInteractionSystem:
     
     def _generate_llm_prompt(self, order: Order, trigger: str) -> str:
         """生成LLM提示词"""
-        context = f"""
-        你是一个外卖配送员，正在与客户互动。
-        
-        客户信息：
-        - 类型：{order.customer_type.value}
-        - 订单优先级：{order.priority.value}
-        - 配送区域：{order.delivery_district.value}
-        
-        当前情况：{trigger}
-        
-        玩家属性：
-        - 情商：{self.game_state.attributes.emotional_intelligence}
-        - 经验等级：{self.game_state.attributes.level}
-        
-        请生成3个不同的回复选项，并预测客户可能的反应。
-        每个选项应该包含不同的风险和收益。
-        """
-        
-        return context
+        attributes = self.game_state.attributes
+        return _PROMPT_TMPL(
+            order.customer_type.value, order.priority.value, order.delivery_district.value,
+            trigger, attributes.emotional_intelligence, attributes.level
+        )
     
-    def _simulate_llm_response(self, order: Order, trigger: str) -> Dict:
+    def _simulate_llm_response(self, order: Order, trigger: str) -> InteractionOutcome:
         """模拟LLM响应"""
         # 这是一个简化的模拟，实际实现时应该调用真实的LLM API
         
-        responses = {
-            CustomerType.PROGRAMMER_SHY: {
-                "正常送达": [
-                    {"text": "已放门口，请取餐", "impact": {"credit": 2, "tip_chance": 0.5}},
-                    {"text": "外卖到了，请享用", "impact": {"credit": 1}},
-                    {"text": "餐食送达，无需回复", "impact": {"credit": 3, "tip_chance": 0.7}}
-                ]
-            },
-            CustomerType.RICH_IMPATIENT: {
-                "催单": [
-                    {"text": "抱歉延误，正在加急处理", "impact": {"credit": 0}},
-                    {"text": "马上到达，请稍候", "impact": {"credit": -1}},
-                    {"text": "尊敬的客户，我会尽快送达", "impact": {"credit": 2}}
-                ]
-            }
-        }
-        
         # 获取预定义回复或生成默认回复
-        if order.customer_type in responses and trigger in responses[order.customer_type]:
-            options = responses[order.customer_type][trigger]
-            chosen = random.choice(options)
-        else:
-            chosen = {"text": "好的，了解", "impact": {"credit": 0}}
+        options = _LLM_RESPONSE_TABLE.get((order.customer_type, trigger))
+        chosen = self._rng.choice(options) if options else _DEFAULT_LLM_OPTION
         
         self._apply_interaction_impact(chosen["impact"])
         
-        return {
-            'success': True,
-            'customer_response': "智能回复生成成功",
-            'impact': chosen["impact"],
-            'options_used': chosen["text"],
-            'llm_generated': True
-        }
+        return InteractionOutcome(
+            True, "智能回复生成成功", chosen["impact"], chosen["text"], llm_generated=True
+        )
     
-    def _check_attribute_requirements(self, requirements: Optional[Dict[str, int]]) -> bool:
-        """检查属性要求"""
-        if not requirements:
-            return True
-        
-        for attr, min_value in requirements.items():
-            if hasattr(self.game_state.attributes, attr):
-                if getattr(self.game_state.attributes, attr) < min_value:
-                    return False
-            else:
+    def _check_attribute_requirements(self, requirements: Tuple[Tuple[str, int], ...]) -> bool:
+        """检查属性要求（requirements 为 ((属性名, 最低值), ...) 元组）"""
+        attributes = self.game_state.attributes
+        for attr, min_value in requirements:
+            value = getattr(attributes, attr, _MISSING)
+            if value is _MISSING or value < min_value:
                 return False
-        
         return True
     
+    def _apply_credit(self, value: int):
+        """信用分变化"""
+        self.game_state.attributes.credit_score += value
+    
+    # 影响类型 -> 处理方法；tip_chance / complaint_chance 在订单结算时使用，这里不处理
+    _IMPACT_HANDLERS = {
+        "credit": _apply_credit
+    }
+    
     def _apply_interaction_impact(self, impact: Dict[str, int]):
         """应用互动影响"""
+        handlers = self._IMPACT_HANDLERS
         for effect, value in impact.items():
-            if effect == "credit":
-                self.game_state.attributes.credit_score += value
-            elif effect == "tip_chance":
-                # 这个会在订单结算时使用
-                pass
-            elif effect == "complaint_chance":
-                # 这个会在订单结算时使用
-                pass
+            handler = handlers.get(effect)
+            if handler is not None:
+                handler(self, value)
+    
+    def _record_interaction(self, customer_type: str, trigger: str, player_choice: str,
+                            customer_response: str, impact: Dict):
+        """追加一条互动记录（按列写入）"""
+        self._hist_timestamp.append(self.game_state.current_time)  # 存原始时间，读取时再格式化
+        self._hist_ct.append(customer_type)
+        self._hist_trigger.append(trigger)
+        self._hist_choice.append(player_choice)
+        self._hist_response.append(customer_response)
+        self._hist_impact.append(impact)
+        self._hist_credit.append(impact.get('credit', 0))
+    
+    @property
+    def interaction_history(self) -> List[Dict]:
+        """完整互动历史（按需还原为字典记录）"""
+        return self.get_interaction_history(len(self._hist_ct))
     
     def get_interaction_history(self, limit: int = 10) -> List[Dict]:
         """获取互动历史"""
-        return self.interaction_history[-limit:]
+        start = max(0, len(self._hist_ct) - limit)
+        return [
+            {
+                'timestamp': timestamp.isoformat(),
+                'customer_type': customer_type,
+                'trigger': trigger,
+                'player_choice': player_choice,
+                'customer_response': customer_response,
+                'impact': impact
+            }
+            for timestamp, customer_type, trigger, player_choice, customer_response, impact in zip(
+                islice(self._hist_timestamp, start, None), islice(self._hist_ct, start, None),
+                islice(self._hist_trigger, start, None), islice(self._hist_choice, start, None),
+                islice(self._hist_response, start, None), islice(self._hist_impact, start, None)
+            )
+        ]
     
     def analyze_customer_patterns(self) -> Dict:
         """分析客户互动模式"""
-        if not self.interaction_history:
+        if not self._hist_ct:
             return {"message": "暂无互动历史"}
         
-        # 统计各类客户的互动成功率
-        customer_stats = {}
-        for record in self.interaction_history:
-            customer_type = record['customer_type']
-            if customer_type not in customer_stats:
-                customer_stats[customer_type] = {'total': 0, 'positive_impact': 0}
-            
-            customer_stats[customer_type]['total'] += 1
-            if record['impact'].get('credit', 0) > 0:
-                customer_stats[customer_type]['positive_impact'] += 1
+        # 统计各类客户的互动成功率：[总次数, 正面次数]
+        counts = defaultdict(lambda: [0, 0])
+        get_stats = counts.__getitem__
+        for customer_type, credit in zip(self._hist_ct, self._hist_credit):
+            stats = get_stats(customer_type)
+            stats[0] += 1
+            stats[1] += credit > 0
         
         # 计算成功率
-        for customer_type in customer_stats:
-            stats = customer_stats[customer_type]
-            stats['success_rate'] = stats['positive_impact'] / stats['total'] if stats['total'] > 0 else 0
-        
-        return customer_stats
\ No newline at end of file
+        return {
+            customer_type: {
+                'total': total,
+                'positive_impact': positive,
+                'success_rate': positive / total
+            }
+            for customer_type, (total, positive) in counts.items()
+        }
\ No newline at end of file
@@ -3,12 +3,17 @@
 Economic Management System
 """
 
-import random
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
+import time
+import copy
+from bisect import bisect_right
+from itertools import accumulate
+import numpy as np
+from game_core import njit, prange, NUMBA_AVAILABLE
 
 class StockType(Enum):
     TECH = "科技股"
@@ -22,7 +27,7 @@ class LotteryType(Enum):
     SUPER_LOTTO = "大乐透"
     SCRATCH_CARD = "刮刮乐"
 
-@dataclass
+@dataclass(slots=True)
 class Stock:
     """股票数据"""
     symbol: str
@@ -33,30 +38,35 @@ class Stock:
     volume: int
     market_cap: float
 
-@dataclass
+@dataclass(slots=True)
 class StockPosition:
-    """持仓数据"""
+    """持仓数据
+    
+    市值、盈亏等派生数据存为字段，只在价格或持仓变化时由 _recalc 重新计算。
+    """
     symbol: str
     shares: int
     avg_cost: float
     current_price: float
     leverage: float = 1.0
+    market_value: float = field(init=False, default=0.0)
+    profit_loss: float = field(init=False, default=0.0)
+    profit_loss_percent: float = field(init=False, default=0.0)
+    _inv_avg_cost: float = field(init=False, default=0.0, repr=False)  # 1/成本，成本为0时取0
     
-    @property
-    def market_value(self) -> float:
-        return self.shares * self.current_price * self.leverage
-    
-    @property
-    def profit_loss(self) -> float:
-        return (self.current_price - self.avg_cost) * self.shares * self.leverage
+    def __post_init__(self):
+        self._inv_avg_cost = 1.0 / self.avg_cost if self.avg_cost else 0.0
+        self._recalc()
     
-    @property
-    def profit_loss_percent(self) -> float:
-        if self.avg_cost == 0:
-            return 0
-        return (self.current_price - self.avg_cost) / self.avg_cost * 100
+    def _recalc(self, current_price: Optional[float] = None):
+        """更新现价（可选）并重新计算派生数据"""
+        if current_price is not None:
+            self.current_price = current_price
+        self.market_value = self.shares * self.current_price * self.leverage
+        self.profit_loss = (self.current_price - self.avg_cost) * self.shares * self.leverage
+        self.profit_loss_percent = (self.current_price - self.avg_cost) * self._inv_avg_cost * 100.0
 
-@dataclass
+@dataclass(slots=True)
 class MonthlyExpense:
     """月度支出"""
     rent: float
@@ -67,23 +77,57 @@ class MonthlyExpense:
     medical: float
     entertainment: float
     debt_payment: float
+    total: float = field(init=False, default=0.0)  # 合计，修改各项后需调用 _recalc
     
-    @property
-    def total(self) -> float:
-        return sum([
-            self.rent, self.food, self.utilities, self.phone,
-            self.transportation, self.medical, self.entertainment, self.debt_payment
-        ])
+    def __post_init__(self):
+        self._recalc()
+    
+    def _recalc(self):
+        """重新计算合计"""
+        self.total = (self.rent + self.food + self.utilities + self.phone +
+                      self.transportation + self.medical + self.entertainment + self.debt_payment)
+
+class MarketSnapshot(NamedTuple):
+    """一轮行情的只读快照，用于在线程之间传递（数组归快照独占，接收方只读）"""
+    prices: np.ndarray
+    change_pct: np.ndarray
+    volume: np.ndarray
+    last_update: datetime
 
 class StockMarket:
-    """股票市场模拟"""
+    """股票市场模拟
+    
+    行情按列存储（SoA）：代码、名称、类型为列表，价格、涨跌幅、成交量、市值为并列的 numpy 数组，
+    更新行情时整列计算；Stock 对象只在查询时按需构造。
+    """
     
-    def __init__(self):
-        self.stocks = self._initialize_stocks()
+    # 根据股票类型调整波动性
+    _VOLATILITY: Dict[StockType, float] = {
+        StockType.TECH: 1.5,
+        StockType.FINANCE: 0.8,
+        StockType.CONSUMER: 1.0,
+        StockType.MEDICAL: 1.2,
+        StockType.ENERGY: 1.3
+    }
+    
+    def __init__(self, rng: Optional[np.random.Generator] = None):
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self._initialize_stocks()
         self.trading_hours = (9, 15)  # 9:00-15:00
         self.last_update = datetime.now()
+        self.change_callbacks = []
+    
+    def add_change_callback(self, callback):
+        """添加行情变化回调（回调对象实现 on_stock_change(symbols)）"""
+        self.change_callbacks.append(callback)
     
-    def _initialize_stocks(self) -> Dict[str, Stock]:
+    def _notify_change(self):
+        """通知回调本轮行情有变化的股票（每轮所有股票的价格和成交量都会重新生成）"""
+        for callback in self.change_callbacks:
+            if hasattr(callback, 'on_stock_change'):
+                callback.on_stock_change(self.symbols)
+    
+    def _initialize_stocks(self):
         """初始化股票数据"""
         stock_data = [
             ("000001", "平安银行", StockType.FINANCE, 12.50),
@@ -98,83 +142,285 @@ class StockMarket:
             ("688111", "金山办公", StockType.TECH, 280.80)
         ]
         
-        stocks = {}
-        for symbol, name, stock_type, price in stock_data:
-            stocks[symbol] = Stock(
-                symbol=symbol,
-                name=name,
-                stock_type=stock_type,
-                price=price,
-                change_percent=0.0,
-                volume=random.randint(10000, 1000000),
-                market_cap=price * random.randint(1000000, 10000000)
-            )
+        n = len(stock_data)
+        self.symbols: List[str] = [symbol for symbol, _, _, _ in stock_data]
+        self.names: List[str] = [name for _, name, _, _ in stock_data]
+        self.types: List[StockType] = [stock_type for _, _, stock_type, _ in stock_data]
+        self.index: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
         
-        return stocks
+        # 搜索索引：预先转小写的 (下标, 名称, 代码)，以及 三字母组 -> 下标集合
+        self._search_index: List[Tuple[int, str, str]] = [
+            (i, name.lower(), symbol.lower()) for i, (symbol, name) in enumerate(zip(self.symbols, self.names))
+        ]
+        self._trigrams: Dict[str, set] = {}
+        for i, name, symbol in self._search_index:
+            for text in (name, symbol):
+                for k in range(len(text) - 2):
+                    self._trigrams.setdefault(text[k:k + 3], set()).add(i)
+        
+        self.prices = np.array([price for _, _, _, price in stock_data], dtype=np.float64)
+        self.volatility = np.array([self._VOLATILITY[t] for t in self.types], dtype=np.float64)
+        self.change_pct = np.zeros(n, dtype=np.float64)
+        self.volume = self._rng.integers(10000, 1000001, n)
+        self.market_cap = self.prices * self._rng.integers(1000000, 10000001, n)
     
-    def update_prices(self):
-        """更新股价"""
+    def _draw_changes(self) -> Optional[np.ndarray]:
+        """到了更新时间则抽取本轮的随机波动（并刷新成交量），否则返回 None"""
         current_time = datetime.now()
         
         # 只在交易时间更新
-        if not (self.trading_hours[0] <= current_time.hour < self.trading_hours[1]):
-            return
-        
-        # 每分钟更新一次
-        if (current_time - self.last_update).seconds < 60:
+        open_hour, close_hour = self.trading_hours
+        if not (open_hour <= current_time.hour < close_hour):
+            return None
+        
+        # 每分钟更新一次（total_seconds 跨天也正确，.seconds 只取不足一天的部分）
+        if (current_time - self.last_update).total_seconds() < 60:
+            return None
+        
+        n = len(self.symbols)
+        # 随机波动 -5% 到 +5%，乘上波动性后才是实际涨跌幅
+        rand_buf = self._rng.uniform(-0.05, 0.05, n)
+        self.volume = self._rng.integers(10000, 1000001, n)
+        self.last_update = current_time
+        return rand_buf
+    
+    def update_prices(self):
+        """更新股价"""
+        rand_buf = self._draw_changes()
+        if rand_buf is None:
             return
         
-        for stock in self.stocks.values():
-            # 随机波动 -5% 到 +5%
-            change = random.uniform(-0.05, 0.05)
-            
-            # 根据股票类型调整波动性
-            volatility_multipliers = {
-                StockType.TECH: 1.5,
-                StockType.FINANCE: 0.8,
-                StockType.CONSUMER: 1.0,
-                StockType.MEDICAL: 1.2,
-                StockType.ENERGY: 1.3
-            }
-            
-            change *= volatility_multipliers[stock.stock_type]
-            
-            new_price = stock.price * (1 + change)
-            stock.change_percent = change * 100
-            stock.price = round(new_price, 2)
-            stock.volume = random.randint(10000, 1000000)
-        
-        self.last_update = current_time
+        # 按股票类型的波动性放大
+        changes = rand_buf * self.volatility
+        self.change_pct = changes * 100
+        self.prices *= 1 + changes
+        np.round(self.prices, 2, out=self.prices)
+        self._notify_change()
+    
+    def fork(self) -> 'StockMarket':
+        """复制一份行情（不带回调），供模拟线程独立推进，不与界面线程共享可变数组"""
+        other = copy.copy(self)
+        other.prices = self.prices.copy()
+        other.change_pct = self.change_pct.copy()
+        other.volume = self.volume.copy()
+        other.market_cap = self.market_cap.copy()
+        other.change_callbacks = []
+        return other
+    
+    def snapshot(self) -> MarketSnapshot:
+        """取当前行情的快照"""
+        return MarketSnapshot(self.prices.copy(), self.change_pct.copy(), self.volume.copy(), self.last_update)
+    
+    def apply_snapshot(self, snapshot: MarketSnapshot):
+        """用快照覆盖当前行情并通知回调"""
+        np.copyto(self.prices, snapshot.prices)
+        np.copyto(self.change_pct, snapshot.change_pct)
+        self.volume = snapshot.volume
+        self.last_update = snapshot.last_update
+        self._notify_change()
+    
+    def _stock_at(self, i: int) -> Stock:
+        """按下标构造股票信息视图"""
+        return Stock(
+            symbol=self.symbols[i],
+            name=self.names[i],
+            stock_type=self.types[i],
+            price=float(self.prices[i]),
+            change_percent=float(self.change_pct[i]),
+            volume=int(self.volume[i]),
+            market_cap=float(self.market_cap[i])
+        )
     
     def get_stock_info(self, symbol: str) -> Optional[Stock]:
         """获取股票信息"""
-        return self.stocks.get(symbol)
+        i = self.index.get(symbol)
+        if i is None:
+            return None
+        return self._stock_at(i)
     
     def get_all_stocks(self) -> List[Stock]:
         """获取所有股票"""
-        return list(self.stocks.values())
+        return [self._stock_at(i) for i in range(len(self.symbols))]
     
     def search_stocks(self, keyword: str) -> List[Stock]:
         """搜索股票"""
-        results = []
         keyword = keyword.lower()
         
-        for stock in self.stocks.values():
-            if (keyword in stock.name.lower() or 
-                keyword in stock.symbol.lower()):
-                results.append(stock)
+        if len(keyword) >= 3:
+            # 先用三字母组索引缩小候选范围，再逐个确认子串
+            candidates = None
+            for k in range(len(keyword) - 2):
+                matched = self._trigrams.get(keyword[k:k + 3])
+                if not matched:
+                    return []
+                candidates = set(matched) if candidates is None else candidates & matched
+            entries = [self._search_index[i] for i in sorted(candidates)]
+        else:
+            entries = self._search_index
         
-        return results
+        return [
+            self._stock_at(i) for i, name, symbol in entries
+            if keyword in name or keyword in symbol
+        ]
+
+# 交易记录的紧凑存储格式：时间戳（纳秒）、动作、股票编号、股数、价格、杠杆、金额（成本/收入）、盈亏
+TRADE_DTYPE = np.dtype([
+    ('t', 'i8'), ('action', 'u1'), ('sym', 'u2'), ('shares', 'i4'),
+    ('price', 'f8'), ('leverage', 'f8'), ('amount', 'f8'), ('profit', 'f8')
+])
+_TRADE_BUY, _TRADE_SELL, _TRADE_LIQUIDATION = 0, 1, 2
+
+_NO_CHANGES = np.empty(0)  # 本轮不更新股价时传给 _tick_kernel
+
+@njit(cache=True, fastmath=True)
+def _tick_kernel(prices, volatility, rand_buf, change_pct,
+                 pos_market_idx, pos_prices, pos_avg_cost, pos_inv_avg_cost, pos_leverage,
+                 threshold, liquidate):
+    """一轮行情：更新股价（rand_buf 为空时跳过），再重估持仓并标出需要强制平仓的持仓，返回平仓数"""
+    if rand_buf.shape[0]:
+        for i in range(prices.shape[0]):
+            change = rand_buf[i] * volatility[i]
+            prices[i] = round(prices[i] * (1.0 + change), 2)
+            change_pct[i] = change * 100.0
+    
+    count = 0
+    for j in range(pos_prices.shape[0]):
+        k = pos_market_idx[j]
+        if k >= 0:
+            pos_prices[j] = prices[k]
+        hit = (pos_leverage[j] > 1.0 and
+               (pos_avg_cost[j] - pos_prices[j]) * pos_inv_avg_cost[j] >= threshold)
+        liquidate[j] = hit
+        if hit:
+            count += 1
+    return count
+
+def _format_ns(ns: int) -> str:
+    """纳秒时间戳 -> 本地时间 ISO 字符串（精确到微秒）"""
+    return datetime.fromtimestamp(ns // 1_000_000_000).replace(microsecond=ns // 1000 % 1_000_000).isoformat()
 
 class InvestmentPortfolio:
-    """投资组合"""
+    """投资组合
+    
+    持仓按列存储在并列的 numpy 数组中（下标由 _pos_idx 给出），行情更新和爆仓检查整列计算；
+    stock_positions 是按需构造的 StockPosition 只读视图，持仓或价格变化后重新生成。
+    """
+    
+    _INITIAL_CAPACITY = 8
     
     def __init__(self, game_state):
         self.game_state = game_state
-        self.stock_positions: Dict[str, StockPosition] = {}
-        self.transaction_history: List[Dict] = []
         self.max_leverage = 5.0
         self.margin_call_threshold = 0.3  # 30% margin call
+        
+        capacity = self._INITIAL_CAPACITY
+        self._n = 0
+        self._pos_idx: Dict[str, int] = {}
+        self._pos_symbols: List[str] = []
+        self._pos_shares = np.empty(capacity, dtype=np.int64)
+        self._pos_avg_cost = np.empty(capacity, dtype=np.float64)
+        self._pos_inv_avg_cost = np.empty(capacity, dtype=np.float64)  # 1/成本，亏损比例用乘法计算
+        self._pos_prices = np.empty(capacity, dtype=np.float64)
+        self._pos_leverage = np.empty(capacity, dtype=np.float64)
+        self._pos_market_idx = np.empty(capacity, dtype=np.int64)  # 在行情数组中的下标，-1 表示未知
+        self._market_idx_dirty = False
+        self._view: Optional[Dict[str, StockPosition]] = None
+        
+        # 交易记录：定长记录数组按倍数扩容，股票代码另存编号表
+        self._trades = np.empty(1024, dtype=TRADE_DTYPE)
+        self._n_trades = 0
+        self._trade_symbols: List[str] = []
+        self._trade_symbol_ids: Dict[str, int] = {}
+    
+    @property
+    def stock_positions(self) -> Dict[str, StockPosition]:
+        """持仓视图：代码 -> StockPosition"""
+        if self._view is None:
+            self._view = {
+                symbol: StockPosition(
+                    symbol=symbol,
+                    shares=int(self._pos_shares[i]),
+                    avg_cost=float(self._pos_avg_cost[i]),
+                    current_price=float(self._pos_prices[i]),
+                    leverage=float(self._pos_leverage[i])
+                )
+                for i, symbol in enumerate(self._pos_symbols)
+            }
+        return self._view
+    
+    def _log_trade(self, action: int, symbol: str, shares: int, price: float,
+                   leverage: float = 0.0, amount: float = 0.0, profit: float = 0.0):
+        """追加一条交易记录"""
+        n = self._n_trades
+        if n == len(self._trades):
+            grown = np.empty(2 * n, dtype=TRADE_DTYPE)
+            grown[:n] = self._trades
+            self._trades = grown
+        sym = self._trade_symbol_ids.get(symbol)
+        if sym is None:
+            sym = self._trade_symbol_ids[symbol] = len(self._trade_symbols)
+            self._trade_symbols.append(symbol)
+        self._trades[n] = (time.time_ns(), action, sym, shares, price, leverage, amount, profit)
+        self._n_trades = n + 1
+    
+    def _trade_entries(self):
+        """逐条还原交易记录，产出 (纳秒时间戳, 不含时间的记录字典)"""
+        for t, action, sym, shares, price, leverage, amount, profit in self._trades[:self._n_trades].tolist():
+            symbol = self._trade_symbols[sym]
+            if action == _TRADE_BUY:
+                yield t, {'action': 'buy', 'symbol': symbol, 'shares': shares,
+                          'price': price, 'leverage': leverage, 'cost': amount}
+            elif action == _TRADE_SELL:
+                yield t, {'action': 'sell', 'symbol': symbol, 'shares': shares,
+                          'price': price, 'leverage': leverage, 'revenue': amount, 'profit': profit}
+            else:
+                yield t, {'action': 'liquidation', 'symbol': symbol, 'shares': shares,
+                          'price': price, 'message': '杠杆爆仓强制平仓'}
+    
+    def transaction_records(self) -> List[Dict]:
+        """交易历史（时间为整数纳秒 timestamp_ns，不做格式化，适合导出）"""
+        return [{'timestamp_ns': t, **entry} for t, entry in self._trade_entries()]
+    
+    @property
+    def transaction_history(self) -> List[Dict]:
+        """交易历史（时间格式化为 ISO 字符串，用于显示）"""
+        return [{'timestamp': _format_ns(t), **entry} for t, entry in self._trade_entries()]
+    
+    def _add_position(self, symbol: str, shares: int, price: float, leverage: float):
+        """新增一行持仓，容量不足时按倍数扩容"""
+        n = self._n
+        if n == len(self._pos_shares):
+            capacity = 2 * n
+            for name in ('_pos_shares', '_pos_avg_cost', '_pos_inv_avg_cost', '_pos_prices',
+                         '_pos_leverage', '_pos_market_idx'):
+                old = getattr(self, name)
+                grown = np.empty(capacity, dtype=old.dtype)
+                grown[:n] = old
+                setattr(self, name, grown)
+        self._pos_idx[symbol] = n
+        self._pos_symbols.append(symbol)
+        self._pos_shares[n] = shares
+        self._pos_avg_cost[n] = price
+        self._pos_inv_avg_cost[n] = 1.0 / price if price else 0.0
+        self._pos_prices[n] = price
+        self._pos_leverage[n] = leverage
+        self._pos_market_idx[n] = -1
+        self._market_idx_dirty = True
+        self._n = n + 1
+    
+    def _remove_position(self, symbol: str):
+        """删除一行持仓：用最后一行填补空位"""
+        i = self._pos_idx.pop(symbol)
+        last = self._n - 1
+        if i != last:
+            last_symbol = self._pos_symbols[last]
+            self._pos_symbols[i] = last_symbol
+            self._pos_idx[last_symbol] = i
+            for arr in (self._pos_shares, self._pos_avg_cost, self._pos_inv_avg_cost, self._pos_prices,
+                        self._pos_leverage, self._pos_market_idx):
+                arr[i] = arr[last]
+        self._pos_symbols.pop()
+        self._n = last
     
     def buy_stock(self, symbol: str, shares: int, price: float, leverage: float = 1.0) -> Dict:
         """买入股票"""
@@ -190,67 +436,53 @@ class InvestmentPortfolio:
         self.game_state.finances.delivery_coins -= cost
         
         # 更新持仓
-        if symbol in self.stock_positions:
-            position = self.stock_positions[symbol]
-            total_cost = position.avg_cost * position.shares + price * shares
-            total_shares = position.shares + shares
-            position.avg_cost = total_cost / total_shares
-            position.shares = total_shares
+        i = self._pos_idx.get(symbol)
+        if i is not None:
+            old_shares = int(self._pos_shares[i])
+            total_cost = float(self._pos_avg_cost[i]) * old_shares + price * shares
+            total_shares = old_shares + shares
+            avg_cost = total_cost / total_shares
+            self._pos_avg_cost[i] = avg_cost
+            self._pos_inv_avg_cost[i] = 1.0 / avg_cost if avg_cost else 0.0
+            self._pos_shares[i] = total_shares
         else:
-            self.stock_positions[symbol] = StockPosition(
-                symbol=symbol,
-                shares=shares,
-                avg_cost=price,
-                current_price=price,
-                leverage=leverage
-            )
+            self._add_position(symbol, shares, price, leverage)
+        self._view = None
         
         # 记录交易
-        self.transaction_history.append({
-            'timestamp': datetime.now().isoformat(),
-            'action': 'buy',
-            'symbol': symbol,
-            'shares': shares,
-            'price': price,
-            'leverage': leverage,
-            'cost': cost
-        })
+        self._log_trade(_TRADE_BUY, symbol, shares, price, leverage, cost)
         
         return {'success': True, 'message': f'成功买入{shares}股{symbol}'}
     
     def sell_stock(self, symbol: str, shares: int, price: float) -> Dict:
         """卖出股票"""
-        if symbol not in self.stock_positions:
+        i = self._pos_idx.get(symbol)
+        if i is None:
             return {'success': False, 'message': '没有该股票持仓'}
         
-        position = self.stock_positions[symbol]
-        if shares > position.shares:
+        held = int(self._pos_shares[i])
+        if shares > held:
             return {'success': False, 'message': '持仓不足'}
         
+        leverage = float(self._pos_leverage[i])
+        avg_cost = float(self._pos_avg_cost[i])
+        
         # 计算收益
-        revenue = shares * price * position.leverage
+        revenue = shares * price * leverage
         
         # 更新持仓
-        if shares == position.shares:
-            del self.stock_positions[symbol]
+        if shares == held:
+            self._remove_position(symbol)
         else:
-            position.shares -= shares
+            self._pos_shares[i] = held - shares
+        self._view = None
         
         # 增加资金
         self.game_state.finances.delivery_coins += revenue
         
         # 记录交易
-        profit = (price - position.avg_cost) * shares * position.leverage
-        self.transaction_history.append({
-            'timestamp': datetime.now().isoformat(),
-            'action': 'sell',
-            'symbol': symbol,
-            'shares': shares,
-            'price': price,
-            'leverage': position.leverage,
-            'revenue': revenue,
-            'profit': profit
-        })
+        profit = (price - avg_cost) * shares * leverage
+        self._log_trade(_TRADE_SELL, symbol, shares, price, leverage, revenue, profit)
         
         return {
             'success': True, 
@@ -259,23 +491,66 @@ class InvestmentPortfolio:
         }
     
     def update_positions(self, market: StockMarket):
-        """更新持仓"""
-        for symbol, position in self.stock_positions.items():
-            stock = market.get_stock_info(symbol)
-            if stock:
-                position.current_price = stock.price
-        
-        # 检查爆仓
-        self._check_margin_call()
-    
-    def _check_margin_call(self):
-        """检查是否爆仓"""
-        for symbol, position in list(self.stock_positions.items()):
-            if position.leverage > 1.0:
-                loss_percent = -position.profit_loss_percent / 100
-                if loss_percent >= self.margin_call_threshold:
-                    # 强制平仓
-                    self._force_liquidation(symbol, position)
+        """更新持仓并检查爆仓（一次遍历持仓列完成）"""
+        n = self._n
+        if not n:
+            return
+        
+        self._refresh_market_idx(market)
+        
+        # 一次 gather 取出所有持仓的现价（行情中没有的股票保持原价）
+        market_idx = self._pos_market_idx[:n]
+        prices = self._pos_prices[:n]
+        np.copyto(prices, market.prices[market_idx], where=market_idx >= 0)
+        self._view = None
+        
+        # 亏损比例 (成本 - 现价) * (1/成本) >= 阈值；成本为0时倒数取0，不会触发平仓
+        mask = ((self._pos_leverage[:n] > 1.0) &
+                ((self._pos_avg_cost[:n] - prices) * self._pos_inv_avg_cost[:n] >= self.margin_call_threshold))
+        
+        if mask.any():
+            self._liquidate(mask)
+    
+    def tick(self, market: StockMarket):
+        """推进一次行情并更新持仓
+        
+        安装了 numba 时股价更新、持仓重估和爆仓检查在同一个编译内核里完成，
+        否则依次调用 update_prices 和 update_positions。
+        """
+        if not NUMBA_AVAILABLE:
+            market.update_prices()
+            self.update_positions(market)
+            return
+        
+        rand_buf = market._draw_changes()
+        n = self._n
+        self._refresh_market_idx(market)
+        liquidate = np.empty(n, dtype=np.bool_)
+        count = _tick_kernel(market.prices, market.volatility,
+                             _NO_CHANGES if rand_buf is None else rand_buf, market.change_pct,
+                             self._pos_market_idx[:n], self._pos_prices[:n], self._pos_avg_cost[:n],
+                             self._pos_inv_avg_cost[:n], self._pos_leverage[:n],
+                             self.margin_call_threshold, liquidate)
+        if n:
+            self._view = None
+        if rand_buf is not None:
+            market._notify_change()
+        if count:
+            self._liquidate(liquidate)
+    
+    def _refresh_market_idx(self, market: StockMarket):
+        """持仓变动后重新查出各持仓在行情数组中的下标"""
+        if self._market_idx_dirty:
+            index = market.index
+            self._pos_market_idx[:self._n] = [index.get(symbol, -1) for symbol in self._pos_symbols]
+            self._market_idx_dirty = False
+    
+    def _liquidate(self, mask: np.ndarray):
+        """对 mask 标出的持仓强制平仓"""
+        # 先取出待平仓的代码再逐个平仓（平仓会移动后续持仓的下标），不需要复制整个持仓表
+        for symbol in [self._pos_symbols[i] for i in np.flatnonzero(mask)]:
+            # 强制平仓
+            self._force_liquidation(symbol, self.stock_positions[symbol])
     
     def _force_liquidation(self, symbol: str, position: StockPosition):
         """强制平仓"""
@@ -283,35 +558,99 @@ class InvestmentPortfolio:
         self.sell_stock(symbol, position.shares, liquidation_price)
         
         # 记录爆仓事件
-        self.transaction_history.append({
-            'timestamp': datetime.now().isoformat(),
-            'action': 'liquidation',
-            'symbol': symbol,
-            'shares': position.shares,
-            'price': liquidation_price,
-            'message': '杠杆爆仓强制平仓'
-        })
+        self._log_trade(_TRADE_LIQUIDATION, symbol, position.shares, liquidation_price)
     
     def get_portfolio_value(self) -> float:
         """获取组合总价值"""
-        total_value = 0
-        for position in self.stock_positions.values():
-            total_value += position.market_value
-        return total_value
+        n = self._n
+        # einsum 一次完成三列逐元素相乘再求和，不产生中间数组
+        return float(np.einsum('i,i,i->', self._pos_shares[:n], self._pos_prices[:n], self._pos_leverage[:n]))
     
     def get_total_profit_loss(self) -> float:
         """获取总盈亏"""
-        total_pl = 0
-        for position in self.stock_positions.values():
-            total_pl += position.profit_loss
-        return total_pl
+        n = self._n
+        return float(np.einsum('i,i,i->', self._pos_prices[:n] - self._pos_avg_cost[:n],
+                               self._pos_shares[:n], self._pos_leverage[:n]))
+
+def _to_mask(numbers) -> int:
+    """把一组号码编码为位掩码（号码 n 对应第 n 位），命中数即两个掩码按位与后的置位数"""
+    mask = 0
+    for n in numbers:
+        mask |= 1 << n
+    return mask
+
+def _popcount_u64(values: np.ndarray) -> np.ndarray:
+    """逐元素统计 uint64 数组的置位数"""
+    n = values.shape[0]
+    return np.unpackbits(values.view(np.uint8).reshape(n, 8), axis=1).sum(axis=1, dtype=np.int64)
+
+@njit(cache=True)
+def _dcb_prize(red_matches, blue_match, consecutive_losses):
+    """双色球奖金表"""
+    # 调整小奖概率（连续未中奖时提高）
+    bonus_multiplier = 1 + (consecutive_losses * 0.1)
+    
+    if red_matches == 6 and blue_match:
+        return 5000000.0  # 一等奖500万
+    elif red_matches == 6:
+        return 1000000.0  # 二等奖
+    elif red_matches == 5 and blue_match:
+        return 3000.0 * bonus_multiplier
+    elif red_matches == 5 or (red_matches == 4 and blue_match):
+        return 200.0 * bonus_multiplier
+    elif red_matches == 4 or (red_matches == 3 and blue_match):
+        return 10.0 * bonus_multiplier
+    elif blue_match:
+        return 5.0 * bonus_multiplier
+    else:
+        return 0.0
+
+@njit(cache=True, parallel=True)
+def _dcb_prize_batch(red_matches, blue_match, consecutive_losses, out):
+    """批量计算双色球奖金，结果写入 out"""
+    for i in prange(len(red_matches)):
+        out[i] = _dcb_prize(red_matches[i], blue_match[i], consecutive_losses[i])
+
+@njit(cache=True)
+def _sl_prize(front_matches, back_matches):
+    """大乐透奖金表"""
+    if front_matches == 5 and back_matches == 2:
+        return 10000000.0  # 一等奖1000万
+    elif front_matches == 5 and back_matches == 1:
+        return 500000.0
+    elif front_matches == 5:
+        return 10000.0
+    elif front_matches == 4 and back_matches == 2:
+        return 3000.0
+    elif front_matches == 4 and back_matches == 1:
+        return 300.0
+    elif front_matches == 3 and back_matches == 2:
+        return 200.0
+    elif front_matches == 4 or (front_matches == 3 and back_matches == 1) or (front_matches == 2 and back_matches == 2):
+        return 10.0
+    elif front_matches == 3 or (front_matches == 1 and back_matches == 2) or (front_matches == 2 and back_matches == 1) or back_matches == 2:
+        return 5.0
+    else:
+        return 0.0
+
+# 刮刮乐奖金及其概率（权重），累积分布预先归一化，抽奖时二分查找
+_SCRATCH_PRIZES = (0, 10, 20, 50, 100, 500, 1000, 10000)
+_SCRATCH_WEIGHTS = (0.7, 0.15, 0.08, 0.04, 0.02, 0.008, 0.001, 0.0001)
+_SCRATCH_CDF = tuple(c / sum(_SCRATCH_WEIGHTS) for c in accumulate(_SCRATCH_WEIGHTS))
+_SCRATCH_PRIZES_ARR = np.array(_SCRATCH_PRIZES, dtype=np.int64)
+_SCRATCH_CDF_ARR = np.array(_SCRATCH_CDF)
 
 class LotterySystem:
     """彩票系统"""
     
-    def __init__(self):
+    def __init__(self, rng: Optional[np.random.Generator] = None):
         self.consecutive_losses = 0
         self.jackpot_probability = 1 / 17720000  # 双色球头奖概率
+        self._rng = rng if rng is not None else np.random.default_rng()
+    
+    def _draw_rows(self, high: int, count: int, rows: int) -> List[List[int]]:
+        """一次抽取 rows 组号码，每组从 1..high 中不重复地取 count 个，各组相互独立"""
+        return (np.argsort(self._rng.random((rows, high)), axis=1)[:, :count] + 1).tolist()
     
     def buy_lottery(self, lottery_type: LotteryType, numbers: List[int] = None) -> Dict:
         """购买彩票"""
@@ -333,17 +672,17 @@ class LotterySystem:
     def _play_double_color_ball(self, price: float, numbers: List[int] = None) -> Dict:
         """双色球"""
         if not numbers:
-            # 随机选号
-            red_balls = random.sample(range(1, 34), 6)
-            blue_ball = random.randint(1, 16)
+            # 随机选号与开奖号码一起抽取
+            red_balls, winning_red = self._draw_rows(33, 6, 2)
+            blue_ball, winning_blue = self._rng.integers(1, 17, 2).tolist()
             numbers = red_balls + [blue_ball]
-        
-        # 开奖号码
-        winning_red = random.sample(range(1, 34), 6)
-        winning_blue = random.randint(1, 16)
+        else:
+            # 开奖号码
+            winning_red, = self._draw_rows(33, 6, 1)
+            winning_blue = int(self._rng.integers(1, 17))
         
         # 计算中奖
-        red_matches = len(set(numbers[:6]) & set(winning_red))
+        red_matches = (_to_mask(numbers[:6]) & _to_mask(winning_red)).bit_count()
         blue_match = numbers[6] == winning_blue
         
         prize = self._calculate_double_color_ball_prize(red_matches, blue_match)
@@ -364,36 +703,48 @@ class LotterySystem:
     
     def _calculate_double_color_ball_prize(self, red_matches: int, blue_match: bool) -> float:
         """计算双色球奖金"""
-        # 调整小奖概率（连续未中奖时提高）
-        bonus_multiplier = 1 + (self.consecutive_losses * 0.1)
-        
-        if red_matches == 6 and blue_match:
-            return 5000000.0  # 一等奖500万
-        elif red_matches == 6:
-            return 1000000.0  # 二等奖
-        elif red_matches == 5 and blue_match:
-            return 3000.0 * bonus_multiplier
-        elif red_matches == 5 or (red_matches == 4 and blue_match):
-            return 200.0 * bonus_multiplier
-        elif red_matches == 4 or (red_matches == 3 and blue_match):
-            return 10.0 * bonus_multiplier
-        elif blue_match:
-            return 5.0 * bonus_multiplier
-        else:
-            return 0.0
+        return _dcb_prize(red_matches, blue_match, self.consecutive_losses)
+    
+    def calculate_double_color_ball_prizes(self, red_matches: np.ndarray, blue_match: np.ndarray) -> np.ndarray:
+        """批量计算双色球奖金（按当前连续未中奖次数），可配合 simulate_batch 使用"""
+        n = len(red_matches)
+        out = np.empty(n, dtype=np.float64)
+        losses = np.full(n, self.consecutive_losses, dtype=np.int64)
+        _dcb_prize_batch(np.asarray(red_matches, dtype=np.int64), np.asarray(blue_match, dtype=np.bool_),
+                         losses, out)
+        return out
+    
+    def simulate_batch(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """批量模拟 n 注随机选号的双色球（同一期开奖），返回 (红球命中数数组, 蓝球是否命中数组)
+        
+        用于赔率统计等蒙特卡洛模拟，不影响连续未中奖计数。
+        """
+        rng = self._rng
+        winning_mask = np.uint64(_to_mask(self._draw_rows(33, 6, 1)[0]))
+        winning_blue = int(rng.integers(1, 17))
+        
+        # 每行取 33 个随机数中最小的 6 个的下标，即一注不重复的红球
+        picks = np.argpartition(rng.random((n, 33)), 6, axis=1)[:, :6] + 1
+        # 各号码位互不相同，按位求和等价于按位或
+        masks = np.left_shift(np.uint64(1), picks.astype(np.uint64)).sum(axis=1, dtype=np.uint64)
+        
+        red_matches = _popcount_u64(masks & winning_mask)
+        blue_match = rng.integers(1, 17, n) == winning_blue
+        return red_matches, blue_match
     
     def _play_super_lotto(self, price: float, numbers: List[int] = None) -> Dict:
         """大乐透（简化版）"""
+        # 玩家未选号时，随机选号与开奖号码一起抽取
+        rows = 1 if numbers else 2
+        front_rows = self._draw_rows(35, 5, rows)
+        back_rows = self._draw_rows(12, 2, rows)
+        winning_front = front_rows[-1]
+        winning_back = back_rows[-1]
         if not numbers:
-            front_numbers = random.sample(range(1, 36), 5)
-            back_numbers = random.sample(range(1, 13), 2)
-            numbers = front_numbers + back_numbers
+            numbers = front_rows[0] + back_rows[0]
         
-        winning_front = random.sample(range(1, 36), 5)
-        winning_back = random.sample(range(1, 13), 2)
-        
-        front_matches = len(set(numbers[:5]) & set(winning_front))
-        back_matches = len(set(numbers[5:]) & set(winning_back))
+        front_matches = (_to_mask(numbers[:5]) & _to_mask(winning_front)).bit_count()
+        back_matches = (_to_mask(numbers[5:]) & _to_mask(winning_back)).bit_count()
         
         prize = self._calculate_super_lotto_prize(front_matches, back_matches)
         
@@ -408,32 +759,16 @@ class LotterySystem:
     
     def _calculate_super_lotto_prize(self, front_matches: int, back_matches: int) -> float:
         """计算大乐透奖金"""
-        if front_matches == 5 and back_matches == 2:
-            return 10000000.0  # 一等奖1000万
-        elif front_matches == 5 and back_matches == 1:
-            return 500000.0
-        elif front_matches == 5:
-            return 10000.0
-        elif front_matches == 4 and back_matches == 2:
-            return 3000.0
-        elif front_matches == 4 and back_matches == 1:
-            return 300.0
-        elif front_matches == 3 and back_matches == 2:
-            return 200.0
-        elif front_matches == 4 or (front_matches == 3 and back_matches == 1) or (front_matches == 2 and back_matches == 2):
-            return 10.0
-        elif front_matches == 3 or (front_matches == 1 and back_matches == 2) or (front_matches == 2 and back_matches == 1) or back_matches == 2:
-            return 5.0
-        else:
-            return 0.0
+        return _sl_prize(front_matches, back_matches)
+    
+    def simulate_scratch_batch(self, n: int) -> np.ndarray:
+        """批量模拟 n 张刮刮乐，返回奖金数组"""
+        return _SCRATCH_PRIZES_ARR[np.searchsorted(_SCRATCH_CDF_ARR, self._rng.random(n), side='right')]
     
     def _play_scratch_card(self, price: float) -> Dict:
         """刮刮乐"""
         # 简化的刮刮乐，直接随机奖金
-        prizes = [0, 10, 20, 50, 100, 500, 1000, 10000]
-        probabilities = [0.7, 0.15, 0.08, 0.04, 0.02, 0.008, 0.001, 0.0001]
-        
-        prize = random.choices(prizes, weights=probabilities)[0]
+        prize = _SCRATCH_PRIZES[bisect_right(_SCRATCH_CDF, self._rng.random())]
         
         return {
             'prize': prize,
@@ -441,10 +776,15 @@ class LotterySystem:
             'type': 'scratch_card'
         }
 
+# 日常支出（伙食、交通、杂费）的取值范围
+_DAILY_EXPENSE_LOW = (20.0, 10.0, 5.0)
+_DAILY_EXPENSE_HIGH = (50.0, 30.0, 20.0)
+_DAILY_BATCH_DAYS = 30
+
 class ExpenseManager:
     """支出管理"""
     
-    def __init__(self, game_state):
+    def __init__(self, game_state, rng: Optional[np.random.Generator] = None):
         self.game_state = game_state
         self.monthly_expenses = MonthlyExpense(
             rent=2000.0,
@@ -457,14 +797,21 @@ class ExpenseManager:
             debt_payment=1000.0
         )
         self.last_payment_date = datetime.now()
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self._daily_buffer: List[float] = []
+        self._daily_pos = 0
     
     def calculate_daily_expenses(self) -> float:
         """计算日常支出"""
-        daily_food = random.uniform(20, 50)  # 每日伙食费
-        daily_transport = random.uniform(10, 30)  # 交通费
-        daily_other = random.uniform(5, 20)  # 其他杂费
-        
-        return daily_food + daily_transport + daily_other
+        # 每日伙食费 20-50、交通费 10-30、其他杂费 5-20，一次抽取一个月的量，按天取用
+        if self._daily_pos == len(self._daily_buffer):
+            self._daily_buffer = self._rng.uniform(
+                _DAILY_EXPENSE_LOW, _DAILY_EXPENSE_HIGH, size=(_DAILY_BATCH_DAYS, 3)
+            ).sum(axis=1).tolist()
+            self._daily_pos = 0
+        total = self._daily_buffer[self._daily_pos]
+        self._daily_pos += 1
+        return total
     
     def process_monthly_payment(self) -> Dict:
         """处理月度支出"""
@@ -477,10 +824,11 @@ class ExpenseManager:
         total_expense = self.monthly_expenses.total
         
         # 房租可能上涨
-        if random.random() < 0.1:  # 10%概率房租上涨
-            increase_rate = random.uniform(0.05, 0.15)  # 5%-15%上涨
+        if self._rng.random() < 0.1:  # 10%概率房租上涨
+            increase_rate = self._rng.uniform(0.05, 0.15)  # 5%-15%上涨
             old_rent = self.monthly_expenses.rent
             self.monthly_expenses.rent *= (1 + increase_rate)
+            self.monthly_expenses._recalc()
             total_expense = self.monthly_expenses.total
             
             return {
@@ -7,10 +7,31 @@ import random
 import json
 from datetime import datetime, timedelta
 from enum import Enum
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, fields
 from typing import Dict, List, Optional, Tuple
+from itertools import count
 import uuid
 
+# 可选的 orjson：存档序列化更快，未安装时使用标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 可选的 Numba JIT：安装了 numba 时编译数值内核，否则 njit 原样返回函数、prange 退化为 range
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """numba.njit 的占位实现，支持 @njit 与 @njit(...) 两种写法"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 class WeatherType(Enum):
     SUNNY = "晴天"
     RAINY = "雨天"
@@ -32,7 +53,7 @@ class CustomerType(Enum):
     NORMAL = "普通顾客"
     VIP = "VIP客户"
 
-@dataclass
+@dataclass(slots=True)
 class GameStats:
     """游戏统计数据"""
     total_orders: int = 0
@@ -41,8 +62,14 @@ class GameStats:
     five_star_ratings: int = 0
     total_earnings: float = 0.0
     total_tips: float = 0.0
+    daily_orders: int = 0  # 当日订单数（每天零点重置）
+    daily_earnings: float = 0.0  # 当日收入
+    daily_tips: float = 0.0  # 当日小费
+
+# 属性版本号全局递增，读档替换属性对象后版本号也不会与旧对象重复
+_ATTR_VERSION = count(1)
 
-@dataclass
+@dataclass(slots=True)
 class PlayerAttributes:
     """玩家属性"""
     direction_sense: int = 1  # 方向感
@@ -52,8 +79,18 @@ class PlayerAttributes:
     credit_score: int = 100  # 信用分
     experience: int = 0  # 经验值
     level: int = 1  # 等级
+    
+    # 能力属性版本号（不参与构造和保存）。任何能力属性被赋值时取全局递增的新值，
+    # 对话选项过滤等缓存据此判断属性是否变化；体力、信用分、经验是频繁变化的运行计数，不计入版本
+    _version: int = field(default=0, init=False, repr=False, compare=False)
+    _UNVERSIONED = frozenset({'stamina', 'credit_score', 'experience'})
+    
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name not in self._UNVERSIONED:
+            object.__setattr__(self, '_version', next(_ATTR_VERSION))
 
-@dataclass
+@dataclass(slots=True)
 class FinancialStatus:
     """财务状况"""
     delivery_coins: float = 100.0  # 外卖币
@@ -63,7 +100,7 @@ class FinancialStatus:
     savings: float = 0.0  # 存款
     medical_insurance: bool = False  # 医保
 
-@dataclass
+@dataclass(slots=True)
 class DeliveryEquipment:
     """配送装备"""
     battery_capacity: int = 100  # 电池容量
@@ -71,6 +108,16 @@ class DeliveryEquipment:
     cargo_rack_reinforced: bool = False  # 货架加固
     uniform_quality: str = "basic"  # 制服质量 basic/formal
 
+# 各状态数据类需要保存的字段名（构造参数字段），模块加载时算好，存档时直接按名读取属性
+_SAVE_FIELDS = {
+    cls: tuple(f.name for f in fields(cls) if f.init)
+    for cls in (GameStats, PlayerAttributes, FinancialStatus, DeliveryEquipment)
+}
+
+def _fields_dict(obj) -> Dict:
+    """把只含标量字段的数据类转换为字典（免去 asdict 的递归深拷贝）"""
+    return {name: getattr(obj, name) for name in _SAVE_FIELDS[type(obj)]}
+
 class GameState:
     """游戏状态管理"""
     
@@ -92,33 +139,42 @@ class GameState:
             'player_name': self.player_name,
             'current_time': self.current_time.isoformat(),
             'weather': self.weather.value,
-            'attributes': asdict(self.attributes),
-            'finances': asdict(self.finances),
-            'equipment': asdict(self.equipment),
-            'stats': asdict(self.stats),
+            'attributes': _fields_dict(self.attributes),
+            'finances': _fields_dict(self.finances),
+            'equipment': _fields_dict(self.equipment),
+            'stats': _fields_dict(self.stats),
             'fatigue_level': self.fatigue_level,
             'current_location': self.current_location.value
         }
     
     def save_game(self, filename: str = "savegame.json"):
         """保存游戏"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(self.to_dict()))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False)
     
     def load_game(self, filename: str = "savegame.json"):
         """加载游戏"""
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.player_name = data['player_name']
-                self.current_time = datetime.fromisoformat(data['current_time'])
-                self.weather = WeatherType(data['weather'])
-                self.attributes = PlayerAttributes(**data['attributes'])
-                self.finances = FinancialStatus(**data['finances'])
-                self.equipment = DeliveryEquipment(**data['equipment'])
-                self.stats = GameStats(**data['stats'])
-                self.fatigue_level = data['fatigue_level']
-                self.current_location = DistrictType(data['current_location'])
-                return True
+            if orjson is not None:
+                with open(filename, 'rb') as f:
+                    data = orjson.loads(f.read())
+            else:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            
+            self.player_name = data['player_name']
+            self.current_time = datetime.fromisoformat(data['current_time'])
+            self.weather = WeatherType(data['weather'])
+            self.attributes = PlayerAttributes(**data['attributes'])
+            self.finances = FinancialStatus(**data['finances'])
+            self.equipment = DeliveryEquipment(**data['equipment'])
+            self.stats = GameStats(**data['stats'])
+            self.fatigue_level = data['fatigue_level']
+            self.current_location = DistrictType(data['current_location'])
+            return True
         except FileNotFoundError:
             return False
\ No newline at end of file
@@ -6,6 +6,7 @@ Game Time System - 管理游戏内的时间流逝
 from datetime import datetime, timedelta
 from enum import Enum
 import random
+import time
 
 class TimeOfDay(Enum):
     """一天中的时间段"""
@@ -17,6 +18,44 @@ class TimeOfDay(Enum):
     NIGHT = "夜晚"      # 19:00-23:00
     MIDNIGHT = "深夜"   # 23:00-05:00
 
+def _time_of_day_for_hour(hour):
+    """小时 -> 时间段"""
+    if 5 <= hour < 7:
+        return TimeOfDay.DAWN
+    elif 7 <= hour < 11:
+        return TimeOfDay.MORNING
+    elif 11 <= hour < 13:
+        return TimeOfDay.NOON
+    elif 13 <= hour < 17:
+        return TimeOfDay.AFTERNOON
+    elif 17 <= hour < 19:
+        return TimeOfDay.EVENING
+    elif 19 <= hour < 23:
+        return TimeOfDay.NIGHT
+    else:
+        return TimeOfDay.MIDNIGHT
+
+# 不同时间段的配送时间修正
+_DELIVERY_MODIFIERS = {
+    TimeOfDay.DAWN: 0.8,      # 黎明时段路况好，送得快
+    TimeOfDay.MORNING: 1.2,   # 上午高峰期，稍慢
+    TimeOfDay.NOON: 1.5,      # 午餐高峰期，很慢
+    TimeOfDay.AFTERNOON: 1.0, # 下午正常
+    TimeOfDay.EVENING: 1.3,   # 晚餐高峰期，较慢
+    TimeOfDay.NIGHT: 0.9,     # 夜晚路况好
+    TimeOfDay.MIDNIGHT: 0.7   # 深夜路况最好
+}
+
+# 时间段、配送修正系数都只取决于小时，模块加载时按 0-23 点展开成查找表
+_HOUR_TO_TOD = tuple(_time_of_day_for_hour(hour) for hour in range(24))
+_HOUR_TO_MODIFIER = tuple(_DELIVERY_MODIFIERS[_HOUR_TO_TOD[hour]] for hour in range(24))
+
+# 一天中每分钟的 "HH:MM" 字符串，按 小时*60+分钟 下标取用
+_MINUTE_TO_HHMM = tuple(f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(24 * 60))
+
+# 早高峰：7-9点，午高峰：11-13点，晚高峰：17-19点
+_PEAK_HOURS = frozenset({7, 8, 9, 11, 12, 13, 17, 18, 19})
+
 class GameTimeManager:
     """游戏时间管理器"""
     
@@ -28,8 +67,8 @@ class GameTimeManager:
         # 时间流逝速度（游戏中1秒 = 现实中多少秒）
         self.time_speed_multiplier = 60  # 游戏时间比现实时间快60倍
         
-        # 上次更新的真实时间
-        self.last_real_time = datetime.now()
+        # 上次更新的真实时间（单调时钟秒数，只用来求间隔）
+        self._mono_last = time.monotonic()
         
         # 游戏日计数
         self.game_day = 1
@@ -39,8 +78,8 @@ class GameTimeManager:
     
     def update_time(self):
         """更新游戏时间"""
-        current_real_time = datetime.now()
-        real_time_passed = (current_real_time - self.last_real_time).total_seconds()
+        now = time.monotonic()
+        real_time_passed = now - self._mono_last
         
         # 计算游戏时间应该前进多少
         game_time_advance = real_time_passed * self.time_speed_multiplier
@@ -55,33 +94,19 @@ class GameTimeManager:
             self.trigger_new_day_events()
         
         # 更新记录的真实时间
-        self.last_real_time = current_real_time
+        self._mono_last = now
         
         # 触发时间事件
         self.trigger_time_events(old_game_time, self.current_game_time)
     
     def get_time_of_day(self):
         """获取当前时间段"""
-        hour = self.current_game_time.hour
-        
-        if 5 <= hour < 7:
-            return TimeOfDay.DAWN
-        elif 7 <= hour < 11:
-            return TimeOfDay.MORNING
-        elif 11 <= hour < 13:
-            return TimeOfDay.NOON
-        elif 13 <= hour < 17:
-            return TimeOfDay.AFTERNOON
-        elif 17 <= hour < 19:
-            return TimeOfDay.EVENING
-        elif 19 <= hour < 23:
-            return TimeOfDay.NIGHT
-        else:
-            return TimeOfDay.MIDNIGHT
+        return _HOUR_TO_TOD[self.current_game_time.hour]
     
     def get_formatted_time(self):
         """获取格式化的时间字符串"""
-        return self.current_game_time.strftime("%H:%M")
+        current = self.current_game_time
+        return _MINUTE_TO_HHMM[current.hour * 60 + current.minute]
     
     def get_formatted_date(self):
         """获取格式化的日期字符串"""
@@ -94,9 +119,7 @@ class GameTimeManager:
     
     def is_peak_hour(self):
         """判断是否为高峰期"""
-        hour = self.current_game_time.hour
-        # 早高峰：7-9点，午高峰：11-13点，晚高峰：17-19点
-        return (7 <= hour <= 9) or (11 <= hour <= 13) or (17 <= hour <= 19)
+        return self.current_game_time.hour in _PEAK_HOURS
     
     def is_late_night(self):
         """判断是否为深夜"""
@@ -131,18 +154,4 @@ class GameTimeManager:
     
     def get_delivery_time_modifier(self):
         """根据时间段获取配送时间修正系数"""
-        time_of_day = self.get_time_of_day()
-        hour = self.current_game_time.hour
-        
-        # 不同时间段的配送时间修正
-        modifiers = {
-            TimeOfDay.DAWN: 0.8,      # 黎明时段路况好，送得快
-            TimeOfDay.MORNING: 1.2,   # 上午高峰期，稍慢
-            TimeOfDay.NOON: 1.5,      # 午餐高峰期，很慢
-            TimeOfDay.AFTERNOON: 1.0, # 下午正常
-            TimeOfDay.EVENING: 1.3,   # 晚餐高峰期，较慢
-            TimeOfDay.NIGHT: 0.9,     # 夜晚路况好
-            TimeOfDay.MIDNIGHT: 0.7   # 深夜路况最好
-        }
-        
-        return modifiers.get(time_of_day, 1.0)
\ No newline at end of file
+        return _HOUR_TO_MODIFIER[self.current_game_time.hour]
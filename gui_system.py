@@ -5,23 +5,206 @@ Game GUI System with Game Time Integration
 
 import tkinter as tk
 import json
+import re
 from tkinter import ttk, messagebox, scrolledtext
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
 from datetime import datetime, timedelta
-import threading
-import time
+from typing import Dict, List
 import tkinter.font as tkfont
 import random
+import sys
+import os
+import threading
+import time
+import queue
+from functools import lru_cache
+from operator import attrgetter
+from concurrent.futures import ThreadPoolExecutor
 
-from game_core import GameState, WeatherType, DistrictType
-from order_system import OrderGenerator, DeliverySimulator, OrderPriority
+from game_core import GameState, WeatherType, DistrictType, orjson
+from order_system import Order, OrderGenerator, DeliverySimulator, OrderPriority
 from customer_interaction import CustomerInteractionSystem, DialogueMode
-from economic_system import StockMarket, InvestmentPortfolio, LotterySystem, ExpenseManager
-from skill_system import NightSchool, CareerTransition
+from economic_system import StockMarket, InvestmentPortfolio, LotterySystem, ExpenseManager, LotteryType
+from skill_system import NightSchool, CareerTransition, CourseType
 from game_time_system import GameTimeManager, TimeOfDay  # 导入时间系统
 
+# 自由线程（无 GIL）构建下行情模拟可以和 Tk 重绘真正并行
+FREE_THREADED = not getattr(sys, '_is_gil_enabled', lambda: True)()
+
+# 订单列表：按优先级着色的标签，以及直接取出的几列
+_PRIORITY_TAGS = {
+    OrderPriority.S_LEVEL: ('high_risk',),
+    OrderPriority.D_LEVEL: ('safe',),
+}
+_ORDER_ROW_FIELDS = attrgetter('restaurant_name', 'customer_name', 'pickup_district.value', 'delivery_district.value')
+
+# 图表固定数据：雷达图6个技能的角度（闭合图形首尾相连），订单类型分布比例（S/A/D级）
+_SKILL_ANGLES = np.linspace(0, 2 * np.pi, 6, endpoint=False)
+_SKILL_ANGLES_CLOSED = np.append(_SKILL_ANGLES, _SKILL_ANGLES[0])
+_ORDER_TYPE_RATIOS = np.array([0.2, 0.5, 0.3])
+
+# 游戏报告模板
+_REPORT_TEMPLATE = """送外卖模拟器 - 游戏报告
+========================
+
+玩家信息:
+- 姓名: {player_name}
+- 等级: {attrs.level}
+- 经验: {attrs.experience}
+- 信用分: {attrs.credit_score}
+
+财务状况:
+- 外卖币: ¥{fin.delivery_coins:.2f}
+- 存款: ¥{fin.savings:.2f}
+- 负债: ¥{fin.debt:.2f}
+
+配送统计:
+- 总订单数: {stats.total_orders}
+- 成功配送: {stats.successful_deliveries}
+- 成功率: {success_rate:.1f}%
+- 总收入: ¥{stats.total_earnings:.2f}
+- 总小费: ¥{stats.total_tips:.2f}
+
+客户反馈:
+- 五星好评: {stats.five_star_ratings}
+- 客户投诉: {stats.complaints}
+- 投诉率: {complaint_rate:.1f}%
+
+技能发展:
+- 方向感: {attrs.direction_sense}级
+- 情商值: {attrs.emotional_intelligence}级
+- 学历值: {attrs.education_level}级
+
+当前状态:
+- 体力值: {attrs.stamina}/100
+- 疲劳度: {gs.fatigue_level}%
+- 位置: {gs.current_location.value}
+- 天气: {gs.weather.value}
+
+投资情况:
+- 持仓数量: {positions}
+- 持仓市值: ¥{portfolio_value:.2f}
+- 总盈亏: ¥{portfolio_profit:.2f}
+
+报告生成时间: {generated_at}"""
+
+# 彩票：下拉框名称 -> 类型、单价，以及选号文本（两行 "名称: 号码..."）的解析
+_LOTTERY_TYPE_MAP = {
+    "双色球": LotteryType.DOUBLE_COLOR_BALL,
+    "大乐透": LotteryType.SUPER_LOTTO,
+    "刮刮乐": LotteryType.SCRATCH_CARD
+}
+_LOTTERY_PRICES = {"双色球": 2.0, "大乐透": 2.0, "刮刮乐": 10.0}
+_LOTTERY_PICK_RE = re.compile(r'[^:\n]*:\s*([\d ]+)\n[^:\n]*:\s*([\d ]+)$')
+
+# 装备升级：(属性名, 名称, 说明, 价格)，属性名同时是升级列表的行ID
+_EQUIPMENT_UPGRADES = (
+    ("battery_capacity", "电池扩容", "续航+20分钟", 300),
+    ("rain_cover", "防雨篷", "雨天效率+30%", 200),
+    ("cargo_rack_reinforced", "货架加固", "减少餐损概率", 150),
+    ("uniform_quality", "正装制服", "进入高端社区", 500)
+)
+_EQUIPMENT_UPGRADE_INFO = {attr: (name, price) for attr, name, _, price in _EQUIPMENT_UPGRADES}
+
+# 订单详情模板，模块加载时定义一次
+_ORDER_DETAIL_TEMPLATE = """订单ID: {order.order_id}
+餐厅: {order.restaurant_name}
+客户: {order.customer_name} ({order.customer_type.value})
+取餐地址: {order.pickup_district.value}
+送餐地址: {order.delivery_district.value}
+距离: {order.distance_km}km
+预计时间: {order.estimated_time}分钟
+
+费用明细:
+- 基础费用: ¥{order.base_fee:.2f}
+- 天气奖励: ¥{order.weather_bonus:.2f}
+- 高峰奖励: ¥{order.peak_hour_bonus:.2f}
+- 总计: ¥{total:.2f}
+
+特殊要求:
+{requirements}
+
+风险评估:
+- 投诉概率: {complaint_pct:.1f}%
+- 小费概率: {tip_pct:.1f}%"""
+
+@lru_cache(maxsize=1024)
+def _format_money(value: float) -> str:
+    """金额格式化（带千分位），状态栏每轮大多是相同的金额，缓存结果"""
+    return f"¥{value:,.2f}"
+
+class VirtualTree:
+    """Treeview 的按需填充包装
+    
+    每个数据项先以空的占位行插入（滚动条范围才正确），行内容只在滚动到可见范围时
+    通过 render(iid) -> (values, tags) 生成并写入；数据有变化的行标记为待刷新，
+    等下次可见时再重新生成，和上次写入的内容相同就不再改写。行ID由调用方给出
+    （订单ID、股票代码等）。
+    """
+    
+    def __init__(self, tree: ttk.Treeview, scrollbar: ttk.Scrollbar, render):
+        self.tree = tree
+        self._render = render
+        self._order: List[str] = []  # 与树形视图中的行顺序一致
+        self._stale = set()
+        self._rows = {}  # 行ID -> 上次写入的 (values, tags)
+        
+        def on_yscroll(first, last):
+            # 滚动或改变大小后补写新露出来的行
+            scrollbar.set(first, last)
+            self.refresh_visible()
+        
+        tree.configure(yscrollcommand=on_yscroll)
+    
+    def __len__(self):
+        return len(self._order)
+    
+    def set_items(self, iids):
+        """让行集合与 iids 一致：只删除消失的行、在末尾追加新行，保留的行不动"""
+        wanted = dict.fromkeys(iids)
+        kept = []
+        for iid in self._order:
+            if iid in wanted:
+                kept.append(iid)
+            else:
+                self.tree.delete(iid)
+                self._stale.discard(iid)
+                self._rows.pop(iid, None)
+        
+        known = set(kept)
+        for iid in wanted:
+            if iid not in known:
+                self.tree.insert('', 'end', iid=iid)
+                self._stale.add(iid)
+                kept.append(iid)
+        
+        self._order = kept
+        self.refresh_visible()
+    
+    def invalidate(self, iids=None):
+        """标记行内容有变化（iids 为空时为全部行）"""
+        self._stale.update(self._order if iids is None else iids)
+        self.refresh_visible()
+    
+    def refresh_visible(self):
+        """写入可见范围内待刷新的行"""
+        stale = self._stale
+        if not stale:
+            return
+        
+        order = self._order
+        rows = self._rows
+        n = len(order)
+        first, last = self.tree.yview()
+        for iid in order[int(first * n):int(last * n) + 1]:
+            if iid in stale:
+                row = self._render(iid)
+                if rows.get(iid) != row:
+                    values, tags = row
+                    self.tree.item(iid, values=values, tags=tags)
+                    rows[iid] = row
+                stale.discard(iid)
+
 class GameGUI:
     """游戏主界面"""
     
@@ -31,34 +214,73 @@ class GameGUI:
         self.root.geometry("1400x900")
         self.root.configure(bg='#f0f0f0')
 
+        # 在创建任何控件之前配置好字体：默认字体改成命名字体后，各控件和样式
+        # 引用同一个 Tk 字体对象，不用每次按 (字体族, 字号) 元组重新查找
         default_font = tkfont.nametofont("TkDefaultFont")
         default_font.configure(family="Arial", size=14)
         self.root.option_add("*Font", default_font)
-
+        
+        # tkfont.Font 对象被回收时会删除对应的 Tk 字体，需要保留引用
+        self._bold_font = tkfont.Font(family="Arial", size=14, weight="bold")
+        self._tree_font = tkfont.Font(family="Arial", size=13)
+        
+        styles = {
+            '.': default_font,
+            'TButton': default_font,
+            'TLabel': default_font,
+            'TEntry': default_font,
+            'TNotebook.Tab': self._bold_font,
+            'Treeview.Heading': self._bold_font,
+            'Treeview': self._tree_font,
+        }
         style = ttk.Style()
-        style.configure('.', font=('Arial', 14))
-        style.configure('TButton', font=('Arial', 14))
-        style.configure('TLabel', font=('Arial', 14))
-        style.configure('TEntry', font=('Arial', 14))
-        style.configure('TNotebook.Tab', font=('Arial', 14, 'bold'))
-        style.configure('Treeview.Heading', font=('Arial', 14, 'bold'))
-        style.configure('Treeview', font=('Arial', 13))
+        for name, font in styles.items():
+            style.configure(name, font=font)
         
         # === 新增：游戏时间管理器 ===
         self.game_time = GameTimeManager(start_hour=9, start_minute=0)
         self.game_time.add_time_callback(self)  # 注册时间事件回调
         
-        # 游戏系统初始化
+        # 游戏系统初始化（各系统共用一个 numpy 随机数生成器）
+        self._rng = np.random.default_rng()
         self.game_state = GameState()
-        self.order_generator = OrderGenerator()
-        self.delivery_simulator = DeliverySimulator(self.game_state)
+        self.order_generator = OrderGenerator(rng=self._rng)
+        self.delivery_simulator = DeliverySimulator(self.game_state, rng=self._rng)
         self.customer_system = CustomerInteractionSystem(self.game_state)
-        self.stock_market = StockMarket()
+        self.stock_market = StockMarket(rng=self._rng)
         self.portfolio = InvestmentPortfolio(self.game_state)
-        self.lottery_system = LotterySystem()
-        self.expense_manager = ExpenseManager(self.game_state)
-        self.night_school = NightSchool()
-        self.career_transition = CareerTransition()
+        self.lottery_system = LotterySystem(rng=self._rng)
+        self.expense_manager = ExpenseManager(self.game_state, rng=self._rng)
+        self.night_school = NightSchool(rng=self._rng)
+        self.career_transition = CareerTransition(rng=self._rng)
+        
+        # 状态栏各标签上次写入的文字，以及上次显示的 (外卖币, 存款, 负债)
+        self._last_values = {}
+        self._last_finance = None
+        
+        # 按行增量更新的文本框 -> 当前显示的各行
+        self._text_lines = {}
+        
+        # 图表在后台线程绘制到离屏图形，图表 -> 最新一次未完成的绘制任务
+        self._render_pool = ThreadPoolExecutor(max_workers=1)
+        self._render_futures = {}
+        self._stale_charts = set()  # 隐藏期间跳过了重绘的图表区域
+        self._dirty_charts = set()  # 等待合并重绘的图表（'expense'/'skill'/'stats'）
+        self._flush_scheduled = False
+        # 弹出窗口创建一次，关闭时只隐藏；名称 -> 窗口，以及文本类窗口的文本框
+        self._windows = {}
+        self._window_texts = {}
+        self._now_strs_cache = None  # 本轮事件处理中的 (时:分, 完整时间) 字符串
+        self._chart_keys = {}  # 图表 -> 上次绘制时的输入数据，没变就不重画
+        self._skill_radar_values = np.empty(len(_SKILL_ANGLES_CLOSED))  # 雷达图闭合后的技能等级
+        
+        # 配送模拟在工作线程中进行（只计算结果），游戏状态在 Tk 线程里按结果更新
+        self._delivery_pool = ThreadPoolExecutor(max_workers=1)
+        
+        # 行情有变化、尚未刷新到界面的股票
+        self._dirty_stocks = set()
+        self._stock_cells = None  # 行情表格的 (价格, 涨跌幅, 成交量) 文字列，行情变化后重新生成
+        self.stock_market.add_change_callback(self)
         
         # 界面组件
         self.setup_main_interface()
@@ -132,69 +354,60 @@ class GameGUI:
         time_frame = ttk.LabelFrame(self.left_panel, text="游戏时间", padding=10)
         time_frame.pack(fill=tk.X, pady=(0, 10))
         
-        self.game_time_var = tk.StringVar()
-        self.game_date_var = tk.StringVar()
-        self.time_period_var = tk.StringVar()
-        
-        tk.Label(time_frame, textvariable=self.game_date_var, font=("Arial", 12, "bold")).pack()
-        tk.Label(time_frame, textvariable=self.game_time_var, font=("Arial", 14, "bold"), fg="blue").pack()
-        tk.Label(time_frame, textvariable=self.time_period_var).pack()
+        self.game_date_label = tk.Label(time_frame, font=("Arial", 12, "bold"))
+        self.game_date_label.pack()
+        self.game_time_label = tk.Label(time_frame, font=("Arial", 14, "bold"), fg="blue")
+        self.game_time_label.pack()
+        self.time_period_label = tk.Label(time_frame)
+        self.time_period_label.pack()
         
         # 玩家信息框
         player_frame = ttk.LabelFrame(self.left_panel, text="玩家信息", padding=10)
         player_frame.pack(fill=tk.X, pady=(0, 10))
         
-        # 初始化StringVar但不设置固定值
-        self.player_name_var = tk.StringVar()
-        self.level_var = tk.StringVar()
-        self.experience_var = tk.StringVar()
-        self.credit_var = tk.StringVar()
-        
-        tk.Label(player_frame, textvariable=self.player_name_var, font=("Arial", 12, "bold")).pack()
-        tk.Label(player_frame, textvariable=self.level_var).pack()
-        tk.Label(player_frame, textvariable=self.experience_var).pack()
-        tk.Label(player_frame, textvariable=self.credit_var).pack()
+        self.player_name_label = tk.Label(player_frame, font=("Arial", 12, "bold"))
+        self.player_name_label.pack()
+        self.level_label = tk.Label(player_frame)
+        self.level_label.pack()
+        self.experience_label = tk.Label(player_frame)
+        self.experience_label.pack()
+        self.credit_label = tk.Label(player_frame)
+        self.credit_label.pack()
         
         # 财务状况框
         finance_frame = ttk.LabelFrame(self.left_panel, text="财务状况", padding=10)
         finance_frame.pack(fill=tk.X, pady=(0, 10))
         
-        # 初始化StringVar但不设置固定值
-        self.delivery_coins_var = tk.StringVar()
-        self.savings_var = tk.StringVar()
-        self.debt_var = tk.StringVar()
-        
-        tk.Label(finance_frame, textvariable=self.delivery_coins_var).pack()
-        tk.Label(finance_frame, textvariable=self.savings_var).pack()
-        tk.Label(finance_frame, textvariable=self.debt_var, fg="red").pack()
+        self.delivery_coins_label = tk.Label(finance_frame)
+        self.delivery_coins_label.pack()
+        self.savings_label = tk.Label(finance_frame)
+        self.savings_label.pack()
+        self.debt_label = tk.Label(finance_frame, fg="red")
+        self.debt_label.pack()
         
         # 当前状态框
         status_frame = ttk.LabelFrame(self.left_panel, text="当前状态", padding=10)
         status_frame.pack(fill=tk.X, pady=(0, 10))
         
-        # 初始化StringVar但不设置固定值
-        self.weather_var = tk.StringVar()
-        self.location_var = tk.StringVar()
-        self.stamina_var = tk.StringVar()
-        self.delivery_status_var = tk.StringVar()  # 新增：配送状态
-        
-        tk.Label(status_frame, textvariable=self.weather_var).pack()
-        tk.Label(status_frame, textvariable=self.location_var).pack()
-        tk.Label(status_frame, textvariable=self.stamina_var).pack()
-        tk.Label(status_frame, textvariable=self.delivery_status_var, fg="green").pack()
+        self.weather_label = tk.Label(status_frame)
+        self.weather_label.pack()
+        self.location_label = tk.Label(status_frame)
+        self.location_label.pack()
+        self.stamina_label = tk.Label(status_frame)
+        self.stamina_label.pack()
+        self.delivery_status_label = tk.Label(status_frame, fg="green")
+        self.delivery_status_label.pack()
         
         # 今日统计框
         stats_frame = ttk.LabelFrame(self.left_panel, text="今日统计", padding=10)
         stats_frame.pack(fill=tk.X, pady=(0, 10))
         
-        # 初始化StringVar但不设置固定值
-        self.orders_today_var = tk.StringVar()
-        self.earnings_today_var = tk.StringVar()
-        self.tips_today_var = tk.StringVar()
-        
-        tk.Label(stats_frame, textvariable=self.orders_today_var).pack()
-        tk.Label(stats_frame, textvariable=self.earnings_today_var).pack()
-        tk.Label(stats_frame, textvariable=self.tips_today_var).pack()
+        self.orders_today_label = tk.Label(stats_frame)
+        self.orders_today_label.pack()
+        self.earnings_today_label = tk.Label(stats_frame)
+        self.earnings_today_label.pack()
+        self.tips_today_label = tk.Label(stats_frame)
+        self.tips_today_label.pack()
         
         # 快捷操作按钮
         action_frame = ttk.LabelFrame(self.left_panel, text="快捷操作", padding=10)
@@ -286,17 +499,27 @@ class GameGUI:
         messagebox.showinfo("新的一天", f"第{day_number}天开始了！体力恢复20点")
     
     # === 新增：核心更新方法 ===
+    def _set(self, label: tk.Label, value: str):
+        """值有变化时才改写标签文字，避免无谓的 Tcl 调用和重新布局
+        
+        直接 configure 标签，不经过 StringVar（set 之后还要再触发一次 trace 回读）。
+        """
+        name = str(label)
+        if self._last_values.get(name) != value:
+            label.configure(text=value)
+            self._last_values[name] = value
+    
     def update_status_vars(self):
         """更新状态显示变量 - 核心方法"""
         try:
             # === 新增：更新游戏时间显示 ===
-            self.game_date_var.set(self.game_time.get_formatted_date())
-            self.game_time_var.set(self.game_time.get_formatted_time())
+            self._set(self.game_date_label, self.game_time.get_formatted_date())
+            self._set(self.game_time_label, self.game_time.get_formatted_time())
             
             time_of_day = self.game_time.get_time_of_day().value
             if self.game_time.is_peak_hour():
                 time_of_day += " (高峰期)"
-            self.time_period_var.set(time_of_day)
+            self._set(self.time_period_label, time_of_day)
             
             # 更新配送状态
             if self.current_delivery and self.delivery_end_time:
@@ -305,35 +528,39 @@ class GameGUI:
                     self.finish_delivery()
                 else:
                     remaining_minutes = int((self.delivery_end_time - self.game_time.current_game_time).total_seconds() / 60)
-                    self.delivery_status_var.set(f"配送中... 剩余{remaining_minutes}分钟")
+                    self._set(self.delivery_status_label, f"配送中... 剩余{remaining_minutes}分钟")
             else:
                 if self.game_time.is_peak_hour():
-                    self.delivery_status_var.set("高峰期 - 订单较多")
+                    self._set(self.delivery_status_label, "高峰期 - 订单较多")
                 elif self.game_time.is_late_night():
-                    self.delivery_status_var.set("深夜 - 注意安全")
+                    self._set(self.delivery_status_label, "深夜 - 注意安全")
                 else:
-                    self.delivery_status_var.set("空闲中")
+                    self._set(self.delivery_status_label, "空闲中")
             
             # 更新玩家信息显示
-            self.player_name_var.set("配送员小王")
-            self.level_var.set(f"等级: {self.game_state.attributes.level}")
-            self.experience_var.set(f"经验: {self.game_state.attributes.experience}/100")
-            self.credit_var.set(f"信用分: {self.game_state.attributes.credit_score}")
-            
-            # 更新财务信息显示
-            self.delivery_coins_var.set(f"外卖币: ¥{self.game_state.finances.delivery_coins:,.2f}")
-            self.savings_var.set(f"存款: ¥{self.game_state.finances.savings:,.2f}")
-            self.debt_var.set(f"负债: ¥{self.game_state.finances.debt:,.2f}")
+            self._set(self.player_name_label, "配送员小王")
+            self._set(self.level_label, f"等级: {self.game_state.attributes.level}")
+            self._set(self.experience_label, f"经验: {self.game_state.attributes.experience}/100")
+            self._set(self.credit_label, f"信用分: {self.game_state.attributes.credit_score}")
+            
+            # 更新财务信息显示（金额没变就连格式化也省掉）
+            finances = self.game_state.finances
+            finance = (finances.delivery_coins, finances.savings, finances.debt)
+            if finance != self._last_finance:
+                self._last_finance = finance
+                self._set(self.delivery_coins_label, f"外卖币: {_format_money(finance[0])}")
+                self._set(self.savings_label, f"存款: {_format_money(finance[1])}")
+                self._set(self.debt_label, f"负债: {_format_money(finance[2])}")
             
             # 更新状态信息显示
-            self.weather_var.set(f"天气: {self.game_state.weather.value}")
-            self.location_var.set(f"位置: {self.game_state.current_location.value}")
-            self.stamina_var.set(f"体力: {self.game_state.attributes.stamina}/100")
+            self._set(self.weather_label, f"天气: {self.game_state.weather.value}")
+            self._set(self.location_label, f"位置: {self.game_state.current_location.value}")
+            self._set(self.stamina_label, f"体力: {self.game_state.attributes.stamina}/100")
             
             # 更新统计信息显示
-            self.orders_today_var.set(f"完成订单: {self.game_state.stats.successful_deliveries}")
-            self.earnings_today_var.set(f"今日收入: ¥{self.game_state.stats.total_earnings:,.2f}")
-            self.tips_today_var.set(f"今日小费: ¥{self.game_state.stats.total_tips:,.2f}")
+            self._set(self.orders_today_label, f"完成订单: {self.game_state.stats.successful_deliveries}")
+            self._set(self.earnings_today_label, f"今日收入: {_format_money(self.game_state.stats.total_earnings)}")
+            self._set(self.tips_today_label, f"今日小费: {_format_money(self.game_state.stats.total_tips)}")
             
         except Exception as e:
             print(f"更新状态显示错误: {e}")
@@ -387,26 +614,32 @@ class GameGUI:
         
         # 更新游戏状态
         if result['success']:
-            self.game_state.finances.delivery_coins += result['earnings']
-            self.game_state.stats.successful_deliveries += 1
-            self.game_state.stats.total_earnings += result['earnings']
-            self.game_state.stats.total_tips += result['tip']
-            self.game_state.attributes.experience += result['experience_gained']
+            gs = self.game_state
+            fin, stats, attrs = gs.finances, gs.stats, gs.attributes
+            earnings = result['earnings']
+            fin.delivery_coins += earnings
+            stats.successful_deliveries += 1
+            stats.total_earnings += earnings
+            stats.total_tips += result['tip']
+            attrs.experience += result['experience_gained']
+            attrs.credit_score += result['credit_change']
+            if result['five_star']:
+                stats.five_star_ratings += 1
             
             # 检查升级
-            if self.game_state.attributes.experience >= 100:
-                self.game_state.attributes.level += 1
-                self.game_state.attributes.experience = 0
-                messagebox.showinfo("升级", f"恭喜升级到 {self.game_state.attributes.level} 级！")
+            if attrs.experience >= 100:
+                attrs.level += 1
+                attrs.experience = 0
+                messagebox.showinfo("升级", f"恭喜升级到 {attrs.level} 级！")
             
             # 根据时间段给予额外奖励
             time_bonus = 0
             if self.game_time.is_peak_hour():
-                time_bonus = result['earnings'] * 0.2  # 高峰期20%奖励
-                self.game_state.finances.delivery_coins += time_bonus
+                time_bonus = earnings * 0.2  # 高峰期20%奖励
+                fin.delivery_coins += time_bonus
             elif self.game_time.is_late_night():
-                time_bonus = result['earnings'] * 0.3  # 深夜30%奖励
-                self.game_state.finances.delivery_coins += time_bonus
+                time_bonus = earnings * 0.3  # 深夜30%奖励
+                fin.delivery_coins += time_bonus
             
             message = f"配送成功！\n"
             message += f"完成时间: {self.game_time.get_formatted_time()}\n"
@@ -466,56 +699,167 @@ class GameGUI:
     
     # 游戏循环和更新方法
     def start_game_loop(self):
-        """启动游戏循环"""
-        def game_loop():
-            while self.game_running:
-                try:
-                    self.update_game_state()
-                    time.sleep(1)  # 每秒更新一次
-                except Exception as e:
-                    print(f"游戏循环错误: {e}")
-                    break
+        """启动游戏循环（由 Tk 事件循环调度；无 GIL 时行情另开模拟线程推进）"""
+        self._sim_queue = queue.SimpleQueue()
+        self._sim_thread = None
+        if FREE_THREADED:
+            # 模拟线程推进自己的行情副本，只通过队列把快照交给 Tk 线程
+            self._sim_thread = threading.Thread(target=self._simulation_loop,
+                                                args=(self.stock_market.fork(),), daemon=True)
+            self._sim_thread.start()
         
-        self.game_thread = threading.Thread(target=game_loop, daemon=True)
-        self.game_thread.start()
+        self.root.after(1000, self._tick)
         
         # 启动GUI更新
+        self.root.bind('<Map>', self._on_root_map)
         self.update_gui()
     
+    def _simulation_loop(self, market):
+        """模拟线程：每秒推进一次行情副本，有变化时把快照放进队列；不触碰 game_state 和 Tk 控件"""
+        while self.game_running:
+            try:
+                last_update = market.last_update
+                market.update_prices()
+                if market.last_update != last_update:
+                    self._sim_queue.put(market.snapshot())
+            except Exception as e:
+                print(f"行情模拟错误: {e}")
+                break
+            time.sleep(1)
+    
+    def _tick(self):
+        """每秒推进一次游戏状态"""
+        try:
+            # 取出模拟线程推送的行情快照，只应用最新的一份
+            snapshot = None
+            while True:
+                try:
+                    snapshot = self._sim_queue.get_nowait()
+                except queue.Empty:
+                    break
+            if snapshot is not None:
+                self.stock_market.apply_snapshot(snapshot)
+            
+            self.update_game_state()
+        except Exception as e:
+            print(f"游戏循环错误: {e}")
+            return
+        
+        if self.game_running:
+            self.root.after(1000, self._tick)
+    
     def update_game_state(self):
         """更新游戏状态"""
         # === 新增：更新游戏时间 ===
         self.game_time.update_time()
+        self.game_state.current_time = self.game_time.current_game_time
         
-        # 更新股票价格
-        self.stock_market.update_prices()
-        
-        # 更新持仓
-        self.portfolio.update_positions(self.stock_market)
+        # 更新股票价格和持仓（有模拟线程时这里只重估持仓）
+        if self._sim_thread is None:
+            self.portfolio.tick(self.stock_market)
+        else:
+            self.portfolio.update_positions(self.stock_market)
         
         # 处理疲劳值（基于游戏时间）
         if self.game_time.is_late_night() and random.random() < 0.01:
-            self.game_state.attributes.stamina = max(0, self.game_state.attributes.stamina - 1)
+            stamina = self.game_state.attributes.stamina - 1
+            self.game_state.attributes.stamina = 0 if stamina < 0 else stamina
+    
+    def _mark_dirty(self, chart):
+        """标记图表需要重绘；50ms 内的多次标记合并成一次重绘（最多约20次/秒）"""
+        self._dirty_charts.add(chart)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.root.after(50, self._flush_charts)
+    
+    def _flush_charts(self):
+        """重绘所有标记过的图表"""
+        self._flush_scheduled = False
+        dirty, self._dirty_charts = self._dirty_charts, set()
+        if 'expense' in dirty:
+            self._plot_expense_chart()
+        if 'skill' in dirty:
+            self._plot_skill_radar()
+        if 'stats' in dirty:
+            self._plot_statistics()
+    
+    def _render_chart(self, chart, view, figure, draw, *args):
+        """把图表交给后台线程：draw(*args) 更新离屏图形后光栅化，完成后回到 Tk 线程换上新图片
+        
+        离屏图形只在这个单线程池里修改和绘制，Tk 线程只负责取数据和显示结果。
+        """
+        size = (view.winfo_width(), view.winfo_height())
+        future = self._render_pool.submit(self._rasterize, figure, size, draw, *args)
+        self._render_futures[chart] = future
+        self.root.after(20, self._poll_render, chart, view, future)
+    
+    @staticmethod
+    def _rasterize(figure, size, draw, *args):
+        """（后台线程）更新并绘制离屏图形，返回 PPM 格式的图片数据"""
+        width, height = size
+        if width > 1 and height > 1:  # 控件还没布局时按图形自身尺寸画
+            figure.set_size_inches(width / figure.dpi, height / figure.dpi)
+        draw(*args)
+        figure.canvas.draw()
+        rgba = np.asarray(figure.canvas.buffer_rgba())
+        rows, cols = rgba.shape[:2]
+        return b'P6 %d %d 255\n' % (cols, rows) + rgba[:, :, :3].tobytes()
+    
+    def _poll_render(self, chart, view, future):
+        """轮询后台绘制结果；Tk 控件只在主线程操作"""
+        if not future.done():
+            self.root.after(20, self._poll_render, chart, view, future)
+            return
+        
+        if self._render_futures.get(chart) is not future:
+            return  # 之后又提交了绘制，以最新的为准
+        del self._render_futures[chart]
+        try:
+            image = tk.PhotoImage(data=future.result(), format='PPM')
+        except Exception as e:
+            self._chart_keys.pop(chart, None)  # 下次刷新时重画
+            print(f"绘制图表错误: {e}")
+            return
+        view.configure(image=image)
+        view.image = image  # 保留引用，否则图片会被回收
+    
+    def _on_chart_resize(self, chart, event):
+        """显示控件的尺寸和当前图片不一致时按新尺寸重画"""
+        image = getattr(event.widget, 'image', None)
+        if image is not None and (image.width(), image.height()) == (event.width, event.height):
+            return
+        self._chart_keys.pop(chart, None)
+        self._mark_dirty(chart)
     
     def update_gui(self):
-        """更新GUI界面"""
+        """更新GUI界面：所有刷新合并成一次空闲回调，Tk 处理完待办事件后一次性重绘"""
+        # 窗口最小化或隐藏时不刷新，恢复显示时由 _on_root_map 立即补一次
+        if self.root.state() not in ('iconic', 'withdrawn'):
+            self.root.after_idle(self._batch_refresh)
+        
+        # 每3秒更新一次
+        self.root.after(3000, self.update_gui)
+    
+    def _on_root_map(self, event):
+        """主窗口从最小化恢复时立即刷新"""
+        # 绑定在根窗口上的事件子控件也会触发，只处理根窗口自身
+        if event.widget is self.root:
+            self.root.after_idle(self._batch_refresh)
+    
+    def _batch_refresh(self):
+        """一次性刷新状态面板、股票行情和持仓"""
         try:
             # 更新状态面板
             self.update_status_vars()
             
-            # 更新股票数据
-            if hasattr(self, 'stock_tree'):
-                self.root.after_idle(self.update_stock_data)
-            
-            # 更新持仓信息
-            if hasattr(self, 'position_text'):
-                self.root.after_idle(self.update_position_display)
+            # 行情有变化且投资理财页可见时才刷新股票和持仓
+            if self._dirty_stocks and self.notebook.select() == str(self.investment_frame):
+                self.update_stock_data(self._dirty_stocks)
+                self._dirty_stocks = set()
+                self.update_position_display()
             
         except Exception as e:
             print(f"GUI更新错误: {e}")
-        
-        # 每3秒更新一次
-        self.root.after(3000, self.update_gui)
     
     # === 修改原有的配送方法 ===
     def start_delivery(self):
@@ -559,11 +903,11 @@ class GameGUI:
         self.game_state.stats.total_earnings += earning
         self.game_state.stats.total_tips += tip
         self.game_state.finances.delivery_coins += earning + tip
-        self.modify_experience(random.randint(5, 15))
-        self.modify_stamina(-random.randint(5, 15))
+        self.modify_experience(int(self._rng.integers(5, 16)))
+        self.modify_stamina(-int(self._rng.integers(5, 16)))
         
         # 推进一些时间
-        self.game_time.advance_time(random.randint(15, 45))
+        self.game_time.advance_time(int(self._rng.integers(15, 46)))
         self.update_status_vars()
     
     def change_weather(self):
@@ -639,9 +983,13 @@ class GameGUI:
             self.order_tree.heading(col, text=col)
             self.order_tree.column(col, width=100)
         
+        # 标签样式
+        self.order_tree.tag_configure('high_risk', background='#ffcccc')
+        self.order_tree.tag_configure('safe', background='#ccffcc')
+        
         # 滚动条
         order_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.order_tree.yview)
-        self.order_tree.configure(yscrollcommand=order_scrollbar.set)
+        self.order_rows = VirtualTree(self.order_tree, order_scrollbar, self._order_row)
         
         self.order_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         order_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -659,13 +1007,14 @@ class GameGUI:
         
         ttk.Button(action_frame, text="接单", command=self.accept_order, style="Accept.TButton").pack(side=tk.LEFT, padx=5)
         ttk.Button(action_frame, text="拒绝", command=self.reject_order).pack(side=tk.LEFT, padx=5)
-        ttk.Button(action_frame, text="开始配送", command=self.start_delivery).pack(side=tk.LEFT, padx=5)
+        self.start_delivery_button = ttk.Button(action_frame, text="开始配送", command=self.start_delivery)
+        self.start_delivery_button.pack(side=tk.LEFT, padx=5)
         
         # 绑定选择事件
         self.order_tree.bind('<<TreeviewSelect>>', self.on_order_select)
         
         # 初始化订单列表
-        self.available_orders = []
+        self.available_orders: Dict[str, Order] = {}  # 订单ID -> 订单，订单ID同时是树形视图的行ID
         self.selected_order = None
         self.refresh_orders()
     
@@ -704,6 +1053,7 @@ class GameGUI:
         
         self.dialogue_options_frame = ttk.Frame(options_frame)
         self.dialogue_options_frame.pack(fill=tk.X, padx=5, pady=5)
+        self._dialogue_buttons = []  # 选项按钮重复使用，不用时只取消布局
         
         # 互动历史分析
         analysis_frame = ttk.Frame(customer_frame)
@@ -714,11 +1064,11 @@ class GameGUI:
     
     def setup_investment_tab(self):
         """设置投资理财选项卡"""
-        investment_frame = ttk.Frame(self.notebook)
-        self.notebook.add(investment_frame, text="投资理财")
+        self.investment_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.investment_frame, text="投资理财")
         
         # 创建子选项卡
-        investment_notebook = ttk.Notebook(investment_frame)
+        investment_notebook = ttk.Notebook(self.investment_frame)
         investment_notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # 股票投资
@@ -751,8 +1101,12 @@ class GameGUI:
             self.stock_tree.heading(col, text=col)
             self.stock_tree.column(col, width=80)
         
+        # 标签样式
+        self.stock_tree.tag_configure('positive', foreground='red')
+        self.stock_tree.tag_configure('negative', foreground='green')
+        
         stock_scrollbar = ttk.Scrollbar(market_frame, orient=tk.VERTICAL, command=self.stock_tree.yview)
-        self.stock_tree.configure(yscrollcommand=stock_scrollbar.set)
+        self.stock_rows = VirtualTree(self.stock_tree, stock_scrollbar, self._stock_row)
         
         self.stock_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         stock_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -847,10 +1201,8 @@ class GameGUI:
         overview_frame = ttk.LabelFrame(expense_frame, text="月度支出概览")
         overview_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        # 创建支出图表
-        self.expense_figure, self.expense_ax = plt.subplots(figsize=(8, 4))
-        self.expense_canvas = FigureCanvasTkAgg(self.expense_figure, overview_frame)
-        self.expense_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # 支出图表在第一次显示时创建
+        self._create_figure_on_map(overview_frame, self._create_expense_figure, self.update_expense_chart)
         
         # 支出详情
         detail_frame = ttk.LabelFrame(expense_frame, text="支出详情")
@@ -904,7 +1256,7 @@ class GameGUI:
             self.course_tree.column(col, width=120)
         
         course_scrollbar = ttk.Scrollbar(course_frame, orient=tk.VERTICAL, command=self.course_tree.yview)
-        self.course_tree.configure(yscrollcommand=course_scrollbar.set)
+        self.course_rows = VirtualTree(self.course_tree, course_scrollbar, self._course_row)
         
         self.course_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         course_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -977,10 +1329,8 @@ class GameGUI:
         radar_frame = ttk.LabelFrame(panel_frame, text="技能雷达图")
         radar_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建技能雷达图
-        self.skill_figure, self.skill_ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(projection='polar'))
-        self.skill_canvas = FigureCanvasTkAgg(self.skill_figure, radar_frame)
-        self.skill_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # 技能雷达图在第一次显示时创建
+        self._create_figure_on_map(radar_frame, self._create_skill_figure, self.update_skill_radar)
         
         # 技能详情
         skill_detail_frame = ttk.LabelFrame(panel_frame, text="技能详情")
@@ -1000,10 +1350,8 @@ class GameGUI:
         chart_frame = ttk.LabelFrame(stats_frame, text="数据图表")
         chart_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # 创建统计图表
-        self.stats_figure, ((self.ax1, self.ax2), (self.ax3, self.ax4)) = plt.subplots(2, 2, figsize=(12, 8))
-        self.stats_canvas = FigureCanvasTkAgg(self.stats_figure, chart_frame)
-        self.stats_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # 统计图表在第一次显示时创建
+        self._create_figure_on_map(chart_frame, self._create_stats_figure, self.update_statistics)
         
         # 统计控制
         control_frame = ttk.Frame(stats_frame)
@@ -1012,171 +1360,127 @@ class GameGUI:
         ttk.Button(control_frame, text="更新统计", command=self.update_statistics).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="导出数据", command=self.export_statistics).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="生成报告", command=self.generate_report).pack(side=tk.LEFT, padx=5)
-        
-        self.update_statistics()
     
-    # 游戏循环和更新方法
-    def start_game_loop(self):
-        """启动游戏循环"""
-        def game_loop():
-            while self.game_running:
-                try:
-                    self.update_game_state()
-                    time.sleep(1)  # 每秒更新一次
-                except Exception as e:
-                    print(f"游戏循环错误: {e}")
-                    break
+    # matplotlib 图形按需创建：启动时不分配用户可能根本不看的 Figure，隐藏时也不重绘
+    def _create_figure_on_map(self, frame, create, update):
+        """frame 第一次显示（<Map>）时调用 create(frame) 创建图形；
+        之后每次重新显示时，如果隐藏期间跳过过重绘，调用 update() 补画一次"""
+        created = False
         
-        self.game_thread = threading.Thread(target=game_loop, daemon=True)
-        self.game_thread.start()
-        
-        # 启动GUI更新
-        self.update_gui()
-    
-    def update_game_state(self):
-        """更新游戏状态"""
-        # 更新股票价格
-        self.stock_market.update_prices()
-        
-        # 更新持仓
-        self.portfolio.update_positions(self.stock_market)
-        
-        # 处理疲劳值
-        if self.game_state.fatigue_level > 80:
-            self.game_state.attributes.stamina = max(0, self.game_state.attributes.stamina - 1)
-        
-        # 时间推进
-        self.game_state.current_time = datetime.now()
+        def on_map(event):
+            nonlocal created
+            if event.widget is not frame:
+                return
+            if not created:
+                created = True
+                create(frame)
+            elif frame in self._stale_charts:
+                self._stale_charts.discard(frame)
+                update()
+        frame.bind('<Map>', on_map)
+    
+    def _chart_hidden(self, view):
+        """图表当前不可见时记为待重绘并返回 True，等重新显示时再画"""
+        if view.winfo_viewable():
+            return False
+        self._stale_charts.add(view.master)
+        return True
+    
+    def _new_figure(self, chart, frame, figsize, *args, **kwargs):
+        """在 frame 中创建离屏图形和显示它的控件，返回 (figure, axes, view)
+        
+        matplotlib 在第一次显示图表时才导入；不经过 pyplot，图形不会留在全局图形列表里。
+        图形用 Agg 画布在后台线程绘制（见 _render_chart），界面上的 Label 只显示画好的图片。
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        
+        figure = Figure(figsize=figsize)
+        FigureCanvasAgg(figure)
+        axes = figure.subplots(*args, **kwargs)
+        view = tk.Label(frame, borderwidth=0, highlightthickness=0, padx=0, pady=0)
+        view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        view.bind('<Configure>', lambda event: self._on_chart_resize(chart, event))
+        return figure, axes, view
+    
+    def _create_expense_figure(self, frame):
+        """创建支出图表"""
+        self.expense_figure, self.expense_ax, self.expense_view = self._new_figure('expense', frame, (8, 4))
+        self.update_expense_chart()
     
-    def update_gui(self):
-        """更新GUI界面"""
-        try:
-            # 更新状态面板
-            self.update_status_panel()
-            
-            # 更新股票数据
-            if hasattr(self, 'stock_tree'):
-                self.root.after_idle(self.update_stock_data)
-            
-            # 更新持仓信息
-            if hasattr(self, 'position_text'):
-                self.root.after_idle(self.update_position_display)
-            
-        except Exception as e:
-            print(f"GUI更新错误: {e}")
-        
-        # 每3秒更新一次
-        self.root.after(3000, self.update_gui)
+    def _create_skill_figure(self, frame):
+        """创建技能雷达图"""
+        self.skill_figure, self.skill_ax, self.skill_view = self._new_figure(
+            'skill', frame, (6, 6), subplot_kw=dict(projection='polar'))
+        self.update_skill_radar()
     
-    def update_status_panel(self):
-        """更新状态面板"""
-        # 更新玩家信息
-        self.level_var.set(f"等级: {self.game_state.attributes.level}")
-        self.experience_var.set(f"经验: {self.game_state.attributes.experience}/100")
-        self.credit_var.set(f"信用分: {self.game_state.attributes.credit_score}")
-        
-        # 更新财务信息
-        self.delivery_coins_var.set(f"外卖币: ¥{self.game_state.finances.delivery_coins:.2f}")
-        self.savings_var.set(f"存款: ¥{self.game_state.finances.savings:.2f}")
-        self.debt_var.set(f"负债: ¥{self.game_state.finances.debt:,.2f}")
-        
-        # 更新状态信息
-        self.weather_var.set(f"天气: {self.game_state.weather.value}")
-        self.location_var.set(f"位置: {self.game_state.current_location.value}")
-        self.stamina_var.set(f"体力: {self.game_state.attributes.stamina}/100")
-        self.time_var.set(f"时间: {self.game_state.current_time.strftime('%H:%M')}")
-        
-        # 更新统计信息
-        self.orders_today_var.set(f"完成订单: {self.game_state.stats.successful_deliveries}")
-        self.earnings_today_var.set(f"今日收入: ¥{self.game_state.stats.total_earnings:.2f}")
-        self.tips_today_var.set(f"今日小费: ¥{self.game_state.stats.total_tips:.2f}")
+    def _create_stats_figure(self, frame):
+        """创建统计图表"""
+        self.stats_figure, ((self.ax1, self.ax2), (self.ax3, self.ax4)), self.stats_view = self._new_figure(
+            'stats', frame, (12, 8), 2, 2)
+        self.update_statistics()
     
     # 各种事件处理方法
     def refresh_orders(self):
         """刷新订单列表"""
         try:
-            # 清空现有订单
-            for item in self.order_tree.get_children():
-                self.order_tree.delete(item)
-            
-            # 生成新订单
-            self.available_orders = []
+            # 生成新订单（订单ID同时作为树形视图的行ID，需保证不重复）
+            orders = {}
             current_hour = self.game_state.current_time.hour
             
-            for _ in range(random.randint(5, 15)):
-                order = self.order_generator.generate_order(self.game_state.weather, current_hour)
-                self.available_orders.append(order)
-                
-                # 添加到树形视图
-                total_fee = order.base_fee + order.weather_bonus + order.peak_hour_bonus
-                
-                # 根据优先级设置颜色
-                tags = []
-                if order.priority.value == "S级":
-                    tags = ['high_risk']
-                elif order.priority.value == "D级":
-                    tags = ['safe']
-                
-                self.order_tree.insert('', 'end', values=(
-                    order.order_id[-6:],  # 显示订单ID后6位
-                    order.restaurant_name,
-                    order.customer_name,
-                    order.pickup_district.value,
-                    order.delivery_district.value,
-                    f"{order.distance_km}km",
-                    f"¥{total_fee:.2f}",
-                    order.priority.value,
-                    f"{order.estimated_time}分钟"
-                ), tags=tags)
-            
-            # 设置标签样式
-            self.order_tree.tag_configure('high_risk', background='#ffcccc')
-            self.order_tree.tag_configure('safe', background='#ccffcc')
+            for order in self.order_generator.generate_batch(int(self._rng.integers(5, 16)), self.game_state.weather, current_hour):
+                orders.setdefault(order.order_id, order)
+            
+            self.available_orders = orders
+            self.sync_order_tree()
             
         except Exception as e:
             messagebox.showerror("错误", f"刷新订单失败: {e}")
     
+    def sync_order_tree(self):
+        """让树形视图与 available_orders 一致，只增删有变化的行"""
+        self.order_rows.set_items(self.available_orders)
+    
+    def _order_row(self, order_id):
+        """订单行的 (values, tags)"""
+        order = self.available_orders[order_id]
+        priority = order.priority
+        fee_s = f"¥{order.base_fee + order.weather_bonus + order.peak_hour_bonus:.2f}"
+        
+        values = (
+            order_id[-6:],  # 显示订单ID后6位
+            *_ORDER_ROW_FIELDS(order),
+            f"{order.distance_km}km",
+            fee_s,
+            priority.value,
+            f"{order.estimated_time}分钟"
+        )
+        # 根据优先级设置颜色
+        return values, _PRIORITY_TAGS.get(priority, ())
+    
     def on_order_select(self, event):
         """订单选择事件"""
         selection = self.order_tree.selection()
         if selection:
-            item = self.order_tree.item(selection[0])
-            order_id_short = str(item['values'][0])
-            
-            # 找到对应的完整订单
-            for order in self.available_orders:
-                if order.order_id.endswith(order_id_short):
-                    self.selected_order = order
-                    self.display_order_details(order)
-                    break
+            # 行ID就是订单ID
+            order = self.available_orders.get(selection[0])
+            if order is not None:
+                self.selected_order = order
+                self.display_order_details(order)
     
     def display_order_details(self, order):
         """显示订单详情"""
-        details = f"""
-订单ID: {order.order_id}
-餐厅: {order.restaurant_name}
-客户: {order.customer_name} ({order.customer_type.value})
-取餐地址: {order.pickup_district.value}
-送餐地址: {order.delivery_district.value}
-距离: {order.distance_km}km
-预计时间: {order.estimated_time}分钟
-
-费用明细:
-- 基础费用: ¥{order.base_fee:.2f}
-- 天气奖励: ¥{order.weather_bonus:.2f}
-- 高峰奖励: ¥{order.peak_hour_bonus:.2f}
-- 总计: ¥{order.base_fee + order.weather_bonus + order.peak_hour_bonus:.2f}
-
-特殊要求:
-{chr(10).join(f"- {req}" for req in order.special_requirements)}
-
-风险评估:
-- 投诉概率: {order.complaint_probability*100:.1f}%
-- 小费概率: {order.tip_probability*100:.1f}%
-        """.strip()
-        
-        self.order_detail_text.delete(1.0, tk.END)
-        self.order_detail_text.insert(1.0, details)
+        requirements = order.special_requirements
+        details = _ORDER_DETAIL_TEMPLATE.format(
+            order=order,
+            total=order.base_fee + order.weather_bonus + order.peak_hour_bonus,
+            requirements="- " + "\n- ".join(requirements) if requirements else "",
+            complaint_pct=order.complaint_probability * 100,
+            tip_pct=order.tip_probability * 100
+        )
+        
+        # replace 一次 Tcl 调用完成删除和插入
+        self.order_detail_text.replace(1.0, tk.END, details)
     
     def reject_order(self):
         """拒绝订单"""
@@ -1187,14 +1491,14 @@ class GameGUI:
         # 显示拒绝确认
         if messagebox.askyesno("确认拒绝", f"确定要拒绝订单 {self.selected_order.order_id[-6:]} 吗？"):
             # 从可用订单列表中移除
-            self.available_orders.remove(self.selected_order)
+            self.available_orders.pop(self.selected_order.order_id, None)
             
             # 清除选中的订单
             self.selected_order = None
             self.order_detail_text.delete(1.0, tk.END)
             
-            # 刷新订单列表
-            self.refresh_orders()
+            # 从订单列表中移除该行
+            self.sync_order_tree()
             
             messagebox.showinfo("已拒绝", "订单已拒绝")
     def accept_order(self):
@@ -1212,8 +1516,8 @@ class GameGUI:
         messagebox.showinfo("成功", f"已接受订单 {self.selected_order.order_id[-6:]}")
         
         # 从可用订单列表中移除
-        self.available_orders.remove(self.selected_order)
-        self.refresh_orders()
+        self.available_orders.pop(self.selected_order.order_id, None)
+        self.sync_order_tree()
     
     def start_delivery(self):
         """开始配送"""
@@ -1221,22 +1525,47 @@ class GameGUI:
             messagebox.showwarning("警告", "没有可配送的订单")
             return
         
-        # 模拟配送过程
-        result = self.delivery_simulator.simulate_delivery(self.selected_order)
+        # 模拟配送过程放到工作线程，期间界面照常响应
+        order = self.selected_order
+        self.start_delivery_button.state(['disabled'])
+        future = self._delivery_pool.submit(self.delivery_simulator.simulate_delivery, order)
+        self.root.after(20, self._poll_delivery, order, future)
+    
+    def _poll_delivery(self, order, future):
+        """轮询配送模拟结果；Tk 控件只在主线程操作"""
+        if not future.done():
+            self.root.after(20, self._poll_delivery, order, future)
+            return
         
+        self.start_delivery_button.state(['!disabled'])
+        try:
+            result = future.result()
+        except Exception as e:
+            messagebox.showerror("错误", f"配送失败: {e}")
+            return
+        self._on_delivery_done(order, result)
+    
+    def _on_delivery_done(self, order, result):
+        """处理配送结果"""
         # 更新游戏状态
         if result['success']:
-            self.game_state.finances.delivery_coins += result['earnings']
-            self.game_state.stats.successful_deliveries += 1
-            self.game_state.stats.total_earnings += result['earnings']
-            self.game_state.stats.total_tips += result['tip']
-            self.game_state.attributes.experience += result['experience_gained']
+            gs = self.game_state
+            fin, stats, attrs = gs.finances, gs.stats, gs.attributes
+            earnings = result['earnings']
+            fin.delivery_coins += earnings
+            stats.successful_deliveries += 1
+            stats.total_earnings += earnings
+            stats.total_tips += result['tip']
+            attrs.experience += result['experience_gained']
+            attrs.credit_score += result['credit_change']
+            if result['five_star']:
+                stats.five_star_ratings += 1
             
             # 检查升级
-            if self.game_state.attributes.experience >= 100:
-                self.game_state.attributes.level += 1
-                self.game_state.attributes.experience = 0
-                messagebox.showinfo("升级", f"恭喜升级到 {self.game_state.attributes.level} 级！")
+            if attrs.experience >= 100:
+                attrs.level += 1
+                attrs.experience = 0
+                messagebox.showinfo("升级", f"恭喜升级到 {attrs.level} 级！")
             
             message = f"配送成功！\n收入: ¥{result['earnings']:.2f}"
             if result['tip'] > 0:
@@ -1254,13 +1583,14 @@ class GameGUI:
             messagebox.showinfo("配送完成", message)
             
             # 触发客户互动
-            self.trigger_customer_interaction(self.selected_order, "正常送达")
+            self.trigger_customer_interaction(order, "正常送达")
         else:
             messagebox.showerror("配送失败", "配送过程中发生意外")
         
-        # 清除选中的订单
-        self.selected_order = None
-        self.order_detail_text.delete(1.0, tk.END)
+        # 清除选中的订单（配送期间没有改选其他订单时）
+        if self.selected_order is order:
+            self.selected_order = None
+            self.order_detail_text.delete(1.0, tk.END)
     
     def trigger_customer_interaction(self, order, trigger):
         """触发客户互动"""
@@ -1275,8 +1605,7 @@ class GameGUI:
 配送情况: {trigger}
         """.strip()
         
-        self.customer_info_text.delete(1.0, tk.END)
-        self.customer_info_text.insert(1.0, customer_info)
+        self.customer_info_text.replace(1.0, tk.END, customer_info)
         
         # 获取互动结果
         if self.dialogue_mode_var.get() == "离线模式":
@@ -1292,73 +1621,106 @@ class GameGUI:
     def display_customer_dialogue(self, order, interaction_result):
         """显示客户对话"""
         # 添加对话记录
-        dialogue_entry = f"""
-[{datetime.now().strftime('%H:%M')}] 配送员: {interaction_result.get('options_used', '正常配送完成')}
-[{datetime.now().strftime('%H:%M')}] {order.customer_name}: {interaction_result.get('customer_response', '谢谢')}
-
-"""
-        
-        self.dialogue_text.insert(tk.END, dialogue_entry)
-        self.dialogue_text.see(tk.END)
+        ts = self._now_strs()[0]
+        self._append_dialogue(
+            f"\n[{ts}] 配送员: {interaction_result.options_used}\n"
+            f"[{ts}] {order.customer_name}: {interaction_result.customer_response}\n\n"
+        )
         
         # 显示可用选项（如果有）
         self.clear_dialogue_options()
-        if 'available_options' in interaction_result:
-            for i, option in enumerate(interaction_result['available_options']):
-                btn = ttk.Button(self.dialogue_options_frame, text=option, 
-                               command=lambda opt=option: self.select_dialogue_option(opt))
+        if interaction_result.options:
+            buttons = self._dialogue_buttons
+            for i, option in enumerate(interaction_result.available_options):
+                if i == len(buttons):
+                    buttons.append(ttk.Button(self.dialogue_options_frame))
+                btn = buttons[i]
+                btn.configure(text=option, command=lambda opt=option: self.select_dialogue_option(opt))
                 btn.pack(side=tk.LEFT, padx=5)
     
     def clear_dialogue_options(self):
         """清除对话选项"""
-        for widget in self.dialogue_options_frame.winfo_children():
-            widget.destroy()
+        for btn in self._dialogue_buttons:
+            btn.pack_forget()
     
     def select_dialogue_option(self, option):
         """选择对话选项"""
-        self.dialogue_text.insert(tk.END, f"[{datetime.now().strftime('%H:%M')}] 您选择了: {option}\n\n")
-        self.dialogue_text.see(tk.END)
+        self._append_dialogue(f"[{self._now_strs()[0]}] 您选择了: {option}\n\n")
         self.clear_dialogue_options()
     
+    def _now_strs(self):
+        """当前时间的 ("%H:%M", "%Y-%m-%d %H:%M:%S") 字符串；同一轮事件处理中只格式化一次"""
+        cached = self._now_strs_cache
+        if cached is None:
+            # 只格式化一次完整时间，时:分直接切片；time.strftime 不用构造 datetime 对象
+            full = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())
+            cached = self._now_strs_cache = (full[11:16], full)
+            self.root.after_idle(self._reset_now_strs)
+        return cached
+    
+    def _reset_now_strs(self):
+        """事件处理完后丢弃缓存的时间字符串"""
+        self._now_strs_cache = None
+    
+    def _append_dialogue(self, block):
+        """追加一段对话记录并滚动到底部；记录超过500行时删掉最早的100行"""
+        text = self.dialogue_text
+        text.insert(tk.END, block)
+        if int(text.index('end-1c').split('.')[0]) > 500:
+            text.delete(1.0, '101.0')
+        text.see(tk.END)
+    
     # 股票交易相关方法
-    def update_stock_data(self):
-        """更新股票数据"""
+    def on_stock_change(self, symbols):
+        """行情回调：记下有变化的股票，等下次刷新界面时再更新对应行"""
+        self._dirty_stocks.update(symbols)
+    
+    def update_stock_data(self, symbols=None):
+        """更新股票数据（symbols 为空时刷新全部股票；行ID就是股票代码）
+        
+        只改写当前滚动可见的行，其余的滚动到可见时再更新。
+        """
         try:
-            # 清空现有数据
-            for item in self.stock_tree.get_children():
-                self.stock_tree.delete(item)
-            
-            # 添加股票数据
-            for stock in self.stock_market.get_all_stocks():
-                # 根据涨跌设置颜色
-                tags = []
-                if stock.change_percent > 0:
-                    tags = ['positive']
-                elif stock.change_percent < 0:
-                    tags = ['negative']
-                
-                self.stock_tree.insert('', 'end', values=(
-                    stock.symbol,
-                    stock.name,
-                    f"¥{stock.price:.2f}",
-                    f"{stock.change_percent:+.2f}%",
-                    f"{stock.volume:,}"
-                ), tags=tags)
-            
-            # 设置标签样式
-            self.stock_tree.tag_configure('positive', foreground='red')
-            self.stock_tree.tag_configure('negative', foreground='green')
+            self._stock_cells = None
+            if not self.stock_rows:
+                self.stock_rows.set_items(self.stock_market.symbols)
+            else:
+                self.stock_rows.invalidate(symbols)
             
         except Exception as e:
             print(f"更新股票数据错误: {e}")
     
+    def _stock_row(self, symbol):
+        """股票行的 (values, tags)，直接从行情数组取值"""
+        market = self.stock_market
+        i = market.index[symbol]
+        
+        # 每次行情变化后整列格式化一次，各行按下标取用
+        cells = self._stock_cells
+        if cells is None:
+            cells = self._stock_cells = (
+                np.char.mod('¥%.2f', market.prices),
+                np.char.mod('%+.2f%%', market.change_pct),
+                [f"{volume:,}" for volume in market.volume.tolist()]  # numpy 没有千分位格式
+            )
+        price_s, change_s, volume_s = cells
+        
+        # 根据涨跌设置颜色
+        change = market.change_pct[i]
+        tags = ()
+        if change > 0:
+            tags = ('positive',)
+        elif change < 0:
+            tags = ('negative',)
+        
+        return (symbol, market.names[i], price_s[i], change_s[i], volume_s[i]), tags
+    
     def on_stock_select(self, event):
         """股票选择事件"""
         selection = self.stock_tree.selection()
         if selection:
-            item = self.stock_tree.item(selection[0])
-            symbol = item['values'][0]
-            self.stock_symbol_var.set(symbol)
+            # 行ID就是股票代码（values 里的代码会被 Tk 转成整数，丢掉前导0）
+            self.stock_symbol_var.set(selection[0])
     
     def buy_stock(self):
         """买入股票"""
@@ -1413,105 +1775,115 @@ class GameGUI:
     def update_position_display(self):
         """更新持仓显示"""
         try:
-            self.position_text.delete(1.0, tk.END)
-            
             if not self.portfolio.stock_positions:
-                self.position_text.insert(1.0, "暂无持仓")
+                self._update_text_lines(self.position_text, ["暂无持仓"])
                 return
             
-            content = "当前持仓:\n\n"
+            lines = ["当前持仓:", ""]
+            extend = lines.extend
+            # 直接按下标读行情数组，不为每个持仓构造 Stock 对象
+            market = self.stock_market
+            index, names, prices = market.index, market.names, market.prices
+            separator = "-" * 30
             total_value = 0
             total_profit = 0
             
             for symbol, position in self.portfolio.stock_positions.items():
-                stock = self.stock_market.get_stock_info(symbol)
-                if stock:
-                    position.current_price = stock.price
-                    total_value += position.market_value
-                    total_profit += position.profit_loss
+                i = index.get(symbol)
+                if i is not None:
+                    position._recalc(float(prices[i]))
+                    market_value = position.market_value
+                    profit_loss = position.profit_loss
+                    total_value += market_value
+                    total_profit += profit_loss
                     
-                    content += f"股票: {symbol} ({stock.name})\n"
-                    content += f"持仓: {position.shares}股\n"
-                    content += f"成本: ¥{position.avg_cost:.2f}\n"
-                    content += f"现价: ¥{position.current_price:.2f}\n"
-                    content += f"杠杆: {position.leverage:.1f}倍\n"
-                    content += f"市值: ¥{position.market_value:.2f}\n"
-                    content += f"盈亏: ¥{position.profit_loss:.2f} ({position.profit_loss_percent:.2f}%)\n"
-                    content += "-" * 30 + "\n"
+                    extend((
+                        f"股票: {symbol} ({names[i]})",
+                        f"持仓: {position.shares}股",
+                        f"成本: ¥{position.avg_cost:.2f}",
+                        f"现价: ¥{position.current_price:.2f}",
+                        f"杠杆: {position.leverage:.1f}倍",
+                        f"市值: ¥{market_value:.2f}",
+                        f"盈亏: ¥{profit_loss:.2f} ({position.profit_loss_percent:.2f}%)",
+                        separator
+                    ))
             
-            content += f"\n总市值: ¥{total_value:.2f}\n"
-            content += f"总盈亏: ¥{total_profit:.2f}\n"
+            extend(("", f"总市值: ¥{total_value:.2f}", f"总盈亏: ¥{total_profit:.2f}"))
             
-            self.position_text.insert(1.0, content)
+            self._update_text_lines(self.position_text, lines)
             
         except Exception as e:
             print(f"更新持仓显示错误: {e}")
     
+    def _update_text_lines(self, widget, lines):
+        """按行对比后只改写变化的行，并保持滚动位置（不整体清空重排）"""
+        key = str(widget)
+        old = self._text_lines.get(key)
+        if old is None:
+            # 第一次写入，控件里可能还有其他内容
+            widget.replace(1.0, tk.END, "\n".join(lines))
+            self._text_lines[key] = list(lines)
+            return
+        
+        top = widget.yview()[0]
+        common = min(len(old), len(lines))
+        
+        for i in range(common):
+            if old[i] != lines[i]:
+                widget.delete(f"{i + 1}.0", f"{i + 1}.end")
+                widget.insert(f"{i + 1}.0", lines[i])
+        
+        if len(lines) > common:
+            widget.insert("end-1c", "\n" + "\n".join(lines[common:]))
+        elif len(old) > common:
+            widget.delete(f"{common}.end", "end-1c")
+        
+        self._text_lines[key] = list(lines)
+        widget.yview_moveto(top)
+    
     # 彩票相关方法
     def random_lottery_numbers(self):
         """随机选号"""
         lottery_type = self.lottery_type_var.get()
         
         if lottery_type == "双色球":
-            red_balls = random.sample(range(1, 34), 6)
-            blue_ball = random.randint(1, 16)
+            red_balls = (self._rng.choice(33, 6, replace=False) + 1).tolist()
+            blue_ball = int(self._rng.integers(1, 17))
             numbers = f"红球: {' '.join(f'{n:02d}' for n in sorted(red_balls))}\n蓝球: {blue_ball:02d}"
         elif lottery_type == "大乐透":
-            front_balls = random.sample(range(1, 36), 5)
-            back_balls = random.sample(range(1, 13), 2)
+            front_balls = (self._rng.choice(35, 5, replace=False) + 1).tolist()
+            back_balls = (self._rng.choice(12, 2, replace=False) + 1).tolist()
             numbers = f"前区: {' '.join(f'{n:02d}' for n in sorted(front_balls))}\n后区: {' '.join(f'{n:02d}' for n in sorted(back_balls))}"
         else:
             numbers = "刮刮乐无需选号，直接购买即可"
         
-        self.lottery_numbers_text.delete(1.0, tk.END)
-        self.lottery_numbers_text.insert(1.0, numbers)
+        self.lottery_numbers_text.replace(1.0, tk.END, numbers)
     
     def buy_lottery(self):
         """购买彩票"""
         try:
-            from economic_system import LotteryType
-            
-            lottery_type_map = {
-                "双色球": LotteryType.DOUBLE_COLOR_BALL,
-                "大乐透": LotteryType.SUPER_LOTTO,
-                "刮刮乐": LotteryType.SCRATCH_CARD
-            }
-            
-            lottery_type = lottery_type_map[self.lottery_type_var.get()]
+            lottery_name = self.lottery_type_var.get()
+            lottery_type = _LOTTERY_TYPE_MAP[lottery_name]
             
-            # 获取选号（如果有）
+            # 获取选号（如果有，解析不了就随机选号）
             numbers = None
             if lottery_type != LotteryType.SCRATCH_CARD:
                 number_text = self.lottery_numbers_text.get(1.0, tk.END).strip()
-                if number_text and ":" in number_text:
-                    # 解析选号
-                    try:
-                        lines = number_text.split('\n')
-                        if lottery_type == LotteryType.DOUBLE_COLOR_BALL:
-                            red_line = lines[0].split(':')[1].strip()
-                            blue_line = lines[1].split(':')[1].strip()
-                            red_numbers = [int(n) for n in red_line.split()]
-                            blue_number = int(blue_line)
-                            numbers = red_numbers + [blue_number]
-                        elif lottery_type == LotteryType.SUPER_LOTTO:
-                            front_line = lines[0].split(':')[1].strip()
-                            back_line = lines[1].split(':')[1].strip()
-                            front_numbers = [int(n) for n in front_line.split()]
-                            back_numbers = [int(n) for n in back_line.split()]
-                            numbers = front_numbers + back_numbers
-                    except:
-                        numbers = None
+                match = _LOTTERY_PICK_RE.match(number_text)
+                if match:
+                    # 双色球为 红球 + 蓝球，大乐透为 前区 + 后区
+                    numbers = [int(n) for n in match.group(1).split()] + [int(n) for n in match.group(2).split()]
             
             # 检查资金
-            prices = {"双色球": 2.0, "大乐透": 2.0, "刮刮乐": 10.0}
-            price = prices[self.lottery_type_var.get()]
+            price = _LOTTERY_PRICES[lottery_name]
             
-            if self.game_state.finances.delivery_coins < price:
+            fin = self.game_state.finances
+            if fin.delivery_coins < price:
                 messagebox.showerror("错误", "资金不足")
                 return
             
             # 扣除费用
-            self.game_state.finances.delivery_coins -= price
+            fin.delivery_coins -= price
             
             # 购买彩票
             result = self.lottery_system.buy_lottery(lottery_type, numbers)
@@ -1521,7 +1893,7 @@ class GameGUI:
             
             # 如果中奖，增加资金
             if result['prize'] > 0:
-                self.game_state.finances.delivery_coins += result['prize']
+                fin.delivery_coins += result['prize']
                 messagebox.showinfo("中奖", f"恭喜中奖 ¥{result['prize']:.2f}！")
             
         except Exception as e:
@@ -1529,54 +1901,74 @@ class GameGUI:
     
     def display_lottery_result(self, result):
         """显示彩票结果"""
-        content = f"开奖时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        parts = [f"开奖时间: {self._now_strs()[1]}\n"]
         
         if 'winning_numbers' in result:
-            content += f"开奖号码: {result['winning_numbers']}\n"
-            content += f"您的号码: {result['player_numbers']}\n"
+            parts.append(f"开奖号码: {result['winning_numbers']}\n"
+                         f"您的号码: {result['player_numbers']}\n")
             if 'red_matches' in result:
-                content += f"红球匹配: {result['red_matches']}个\n"
-                content += f"蓝球匹配: {'是' if result['blue_match'] else '否'}\n"
+                parts.append(f"红球匹配: {result['red_matches']}个\n"
+                             f"蓝球匹配: {'是' if result['blue_match'] else '否'}\n")
         
-        content += f"奖金: ¥{result['prize']:.2f}\n"
-        content += f"成本: ¥{result['cost']:.2f}\n"
-        content += f"净收益: ¥{result['prize'] - result['cost']:.2f}\n"
-        content += "-" * 40 + "\n\n"
+        prize, cost = result['prize'], result['cost']
+        parts.append(f"奖金: ¥{prize:.2f}\n"
+                     f"成本: ¥{cost:.2f}\n"
+                     f"净收益: ¥{prize - cost:.2f}\n"
+                     f"{'-' * 40}\n\n")
         
-        self.lottery_result_text.insert(1.0, content)
+        self.lottery_result_text.insert(1.0, "".join(parts))
     
     # 支出管理相关方法
     def update_expense_chart(self):
         """更新支出图表"""
         try:
-            self.expense_ax.clear()
-            
             # 获取支出数据
             expenses = self.expense_manager.get_expense_breakdown()
             
-            # 创建饼图
-            labels = list(expenses.keys())[:-1]  # 排除总计
-            values = list(expenses.values())[:-1]
-            
-            colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#ff99cc', 
-                     '#c2c2f0', '#ffb3e6', '#c4e17f']
-            
-            self.expense_ax.pie(values, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-            self.expense_ax.set_title('月度支出分布')
-            
-            self.expense_canvas.draw()
+            # 饼图合并到下一次图表重绘
+            self._mark_dirty('expense')
             
             # 更新支出详情
             detail_text = "月度支出详情:\n\n"
             for category, amount in expenses.items():
                 detail_text += f"{category}: ¥{amount:.2f}\n"
             
-            self.expense_detail_text.delete(1.0, tk.END)
-            self.expense_detail_text.insert(1.0, detail_text)
+            self.expense_detail_text.replace(1.0, tk.END, detail_text)
             
         except Exception as e:
             print(f"更新支出图表错误: {e}")
     
+    def _plot_expense_chart(self):
+        """重绘支出饼图"""
+        # 图表还没显示过或当前不可见时不画
+        if not hasattr(self, 'expense_figure') or self._chart_hidden(self.expense_view):
+            return
+        
+        try:
+            expenses = self.expense_manager.get_expense_breakdown()
+            key = tuple(expenses.items())
+            if self._chart_keys.get('expense') == key:
+                return
+            
+            labels = list(expenses.keys())[:-1]  # 排除总计
+            values = list(expenses.values())[:-1]
+            
+            self._render_chart('expense', self.expense_view, self.expense_figure, self._draw_expense_chart, labels, values)
+            self._chart_keys['expense'] = key
+            
+        except Exception as e:
+            print(f"绘制支出图表错误: {e}")
+    
+    def _draw_expense_chart(self, labels, values):
+        """（后台线程）画支出饼图"""
+        self.expense_ax.clear()
+        
+        colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#ff99cc', 
+                 '#c2c2f0', '#ffb3e6', '#c4e17f']
+        
+        self.expense_ax.pie(values, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+        self.expense_ax.set_title('月度支出分布')
+    
     def pay_monthly_expenses(self):
         """支付月费"""
         result = self.expense_manager.process_monthly_payment()
@@ -1597,9 +1989,10 @@ class GameGUI:
     def buy_insurance(self):
         """购买医保"""
         cost = 500.0
-        if self.game_state.finances.delivery_coins >= cost:
-            self.game_state.finances.delivery_coins -= cost
-            self.game_state.finances.medical_insurance = True
+        fin = self.game_state.finances
+        if fin.delivery_coins >= cost:
+            fin.delivery_coins -= cost
+            fin.medical_insurance = True
             messagebox.showinfo("成功", "医保购买成功！可享受医疗保障")
         else:
             messagebox.showerror("失败", "资金不足")
@@ -1620,21 +2013,22 @@ class GameGUI:
         amount_entry.pack(pady=5)
         
         def confirm_payment():
+            fin = self.game_state.finances
             try:
                 amount = float(amount_var.get())
                 if amount <= 0:
                     messagebox.showerror("错误", "请输入有效金额")
                     return
                 
-                if amount > self.game_state.finances.delivery_coins:
+                if amount > fin.delivery_coins:
                     messagebox.showerror("错误", "资金不足")
                     return
                 
-                if amount > self.game_state.finances.debt:
-                    amount = self.game_state.finances.debt
+                if amount > fin.debt:
+                    amount = fin.debt
                 
-                self.game_state.finances.delivery_coins -= amount
-                self.game_state.finances.debt -= amount
+                fin.delivery_coins -= amount
+                fin.debt -= amount
                 
                 messagebox.showinfo("成功", f"成功还债 ¥{amount:.2f}")
                 debt_window.destroy()
@@ -1647,25 +2041,25 @@ class GameGUI:
     
     # 技能学习相关方法
     def update_course_list(self):
-        """更新课程列表"""
+        """更新课程列表（行ID为课程类型名）"""
         try:
-            # 清空现有数据
-            for item in self.course_tree.get_children():
-                self.course_tree.delete(item)
-            
-            # 添加课程数据
-            for course_type, course in self.night_school.courses.items():
-                self.course_tree.insert('', 'end', values=(
-                    course.name,
-                    f"{course.duration_hours}小时",
-                    f"¥{course.cost:.2f}",
-                    course.difficulty.value,
-                    course.description
-                ))
+            self.course_rows.set_items([course_type.name for course_type in self.night_school.courses])
+            self.course_rows.invalidate()
             
         except Exception as e:
             print(f"更新课程列表错误: {e}")
     
+    def _course_row(self, iid):
+        """课程行的 (values, tags)"""
+        course = self.night_school.courses[CourseType[iid]]
+        return (
+            course.name,
+            f"{course.duration_hours}小时",
+            f"¥{course.cost:.2f}",
+            course.difficulty.value,
+            course.description
+        ), ()
+    
     def enroll_course(self):
         """报名课程"""
         selection = self.course_tree.selection()
@@ -1674,15 +2068,8 @@ class GameGUI:
             return
         
         try:
-            item = self.course_tree.item(selection[0])
-            course_name = item['values'][0]
-            
-            # 找到对应的课程类型
-            course_type = None
-            for ct, course in self.night_school.courses.items():
-                if course.name == course_name:
-                    course_type = ct
-                    break
+            # 行ID就是课程类型名，直接取出课程类型
+            course_type = CourseType.__members__.get(selection[0])
             
             if course_type:
                 result = self.night_school.enroll_course(course_type, self.game_state)
@@ -1703,23 +2090,17 @@ class GameGUI:
             return
         
         try:
-            item = self.course_tree.item(selection[0])
-            course_name = item['values'][0]
             duration = int(self.study_duration_var.get())
             
-            # 找到对应的课程类型
-            course_type = None
-            for ct, course in self.night_school.courses.items():
-                if course.name == course_name:
-                    course_type = ct
-                    break
+            # 行ID就是课程类型名，直接取出课程类型
+            course_type = CourseType.__members__.get(selection[0])
             
             if course_type:
                 result = self.night_school.study_session(course_type, duration, self.game_state)
                 
                 # 显示学习结果
                 progress_text = f"""
-学习课程: {course_name}
+学习课程: {self.night_school.courses[course_type].name}
 学习时长: {duration}分钟
 学习效果: {result['effectiveness']*100:.1f}%
 获得经验: {result['experience_gained']}点
@@ -1744,15 +2125,8 @@ class GameGUI:
             return
         
         try:
-            item = self.course_tree.item(selection[0])
-            course_name = item['values'][0]
-            
-            # 找到对应的课程类型
-            course_type = None
-            for ct, course in self.night_school.courses.items():
-                if course.name == course_name:
-                    course_type = ct
-                    break
+            # 行ID就是课程类型名，直接取出课程类型
+            course_type = CourseType.__members__.get(selection[0])
             
             if course_type:
                 result = self.night_school.take_exam(course_type, self.game_state)
@@ -1769,49 +2143,77 @@ class GameGUI:
         except Exception as e:
             messagebox.showerror("错误", f"考试失败: {e}")
     
+    def _skill_values(self):
+        """雷达图的技能名称和等级"""
+        attributes = self.game_state.attributes
+        skills = ['方向感', '情商', '学历', '急救', '沟通', '交通安全']
+        values = [
+            attributes.direction_sense,
+            attributes.emotional_intelligence,
+            attributes.education_level,
+            getattr(attributes, 'first_aid', 0),
+            getattr(attributes, 'communication', 0),
+            getattr(attributes, 'traffic_safety', 0)
+        ]
+        return skills, values
+    
     def update_skill_radar(self):
         """更新技能雷达图"""
         try:
-            self.skill_ax.clear()
-            
             # 技能数据
-            skills = ['方向感', '情商', '学历', '急救', '沟通', '交通安全']
-            values = [
-                self.game_state.attributes.direction_sense,
-                self.game_state.attributes.emotional_intelligence,
-                self.game_state.attributes.education_level,
-                getattr(self.game_state.attributes, 'first_aid', 0),
-                getattr(self.game_state.attributes, 'communication', 0),
-                getattr(self.game_state.attributes, 'traffic_safety', 0)
-            ]
-            
-            # 计算角度
-            angles = np.linspace(0, 2 * np.pi, len(skills), endpoint=False).tolist()
-            values += values[:1]  # 闭合图形
-            angles += angles[:1]
-            
-            # 绘制雷达图
-            self.skill_ax.plot(angles, values, 'o-', linewidth=2, label='当前技能')
-            self.skill_ax.fill(angles, values, alpha=0.25)
-            self.skill_ax.set_xticks(angles[:-1])
-            self.skill_ax.set_xticklabels(skills)
-            self.skill_ax.set_ylim(0, 10)
-            self.skill_ax.set_title('技能雷达图')
-            self.skill_ax.grid(True)
+            skills, values = self._skill_values()
             
-            self.skill_canvas.draw()
+            # 雷达图合并到下一次图表重绘
+            self._mark_dirty('skill')
             
             # 更新技能详情
             detail_text = "技能详情:\n\n"
-            for skill, value in zip(skills, values[:-1]):
+            for skill, value in zip(skills, values):
                 detail_text += f"{skill}: {value}级\n"
             
-            self.skill_detail_text.delete(1.0, tk.END)
-            self.skill_detail_text.insert(1.0, detail_text)
+            self.skill_detail_text.replace(1.0, tk.END, detail_text)
             
         except Exception as e:
             print(f"更新技能雷达图错误: {e}")
     
+    def _plot_skill_radar(self):
+        """重绘技能雷达图"""
+        # 图表还没显示过或当前不可见时不画
+        if not hasattr(self, 'skill_figure') or self._chart_hidden(self.skill_view):
+            return
+        
+        try:
+            skills, values = self._skill_values()
+            key = tuple(values)
+            if self._chart_keys.get('skill') == key:
+                return
+            
+            self._render_chart('skill', self.skill_view, self.skill_figure, self._draw_skill_radar, skills, values)
+            self._chart_keys['skill'] = key
+            
+        except Exception as e:
+            print(f"绘制技能雷达图错误: {e}")
+    
+    def _draw_skill_radar(self, skills, values):
+        """（后台线程）画技能雷达图"""
+        # 首尾相连闭合图形
+        closed_values = self._skill_radar_values
+        closed_values[:-1] = values
+        closed_values[-1] = values[0]
+        
+        if not hasattr(self, '_skill_line'):
+            # 第一次绘制时创建线条和填充，之后只改数据
+            self._skill_line, = self.skill_ax.plot(_SKILL_ANGLES_CLOSED, closed_values, 'o-', linewidth=2, label='当前技能')
+            self._skill_fill, = self.skill_ax.fill(_SKILL_ANGLES_CLOSED, closed_values, alpha=0.25)
+            self.skill_ax.set_xticks(_SKILL_ANGLES)
+            self.skill_ax.set_xticklabels(skills)
+            self.skill_ax.set_ylim(0, 10)
+            self.skill_ax.set_title('技能雷达图')
+            self.skill_ax.grid(True)
+        else:
+            self._skill_line.set_data(_SKILL_ANGLES_CLOSED, closed_values)
+            self._skill_fill.set_xy(np.column_stack([_SKILL_ANGLES_CLOSED, closed_values]))
+    
     # 职业转换相关方法
     def on_career_select(self, *args):
         """职业选择事件"""
@@ -1821,18 +2223,17 @@ class GameGUI:
             
             requirement_text = f"职业: {career}\n\n"
             requirement_text += "技能要求:\n"
-            for skill, level in career_info['requirements'].items():
+            for skill, level in career_info.requirements.items():
                 current_level = getattr(self.game_state.attributes, skill, 0)
                 status = "✓" if current_level >= level else "✗"
                 requirement_text += f"{status} {skill}: {level}级 (当前: {current_level}级)\n"
             
-            requirement_text += f"\n考试难度: {career_info['exam_difficulty'].value}\n"
+            requirement_text += f"\n考试难度: {career_info.exam_difficulty.value}\n"
             requirement_text += "\n职业福利:\n"
-            for benefit, value in career_info['benefits'].items():
+            for benefit, value in career_info.benefits.items():
                 requirement_text += f"- {benefit}: {value}\n"
             
-            self.career_requirement_text.delete(1.0, tk.END)
-            self.career_requirement_text.insert(1.0, requirement_text)
+            self.career_requirement_text.replace(1.0, tk.END, requirement_text)
     
     def check_career_eligibility(self):
         """检查职业资格"""
@@ -1865,49 +2266,82 @@ class GameGUI:
     
     # 统计相关方法
     def update_statistics(self):
-        """更新统计数据"""
+        """更新统计数据（合并到下一次图表重绘）"""
+        self._mark_dirty('stats')
+    
+    def _plot_statistics(self):
+        """重绘统计图表"""
+        if not hasattr(self, 'stats_figure') or self._chart_hidden(self.stats_view):
+            return  # 统计页还没显示过或当前不可见，显示时会绘制
+        
         try:
-            # 清除所有子图
-            for ax in [self.ax1, self.ax2, self.ax3, self.ax4]:
-                ax.clear()
+            stats = self.game_state.stats
+            attributes = self.game_state.attributes
+            key = (stats.total_orders, stats.five_star_ratings, stats.complaints,
+                   attributes.direction_sense, attributes.emotional_intelligence, attributes.education_level)
+            if self._chart_keys.get('stats') == key:
+                return
             
             # 图1: 收入趋势
-            days = list(range(1, 31))
-            earnings = [random.uniform(100, 500) for _ in days]  # 模拟数据
-            self.ax1.plot(days, earnings, marker='o')
-            self.ax1.set_title('月度收入趋势')
-            self.ax1.set_xlabel('日期')
-            self.ax1.set_ylabel('收入(元)')
+            earnings = [random.uniform(100, 500) for _ in range(30)]  # 模拟数据
             
             # 图2: 订单类型分布
-            order_types = ['S级', 'A级', 'D级']
-            order_counts = [self.game_state.stats.total_orders * 0.2, 
-                           self.game_state.stats.total_orders * 0.5, 
-                           self.game_state.stats.total_orders * 0.3]
-            self.ax2.pie(order_counts, labels=order_types, autopct='%1.1f%%')
-            self.ax2.set_title('订单类型分布')
+            order_counts = _ORDER_TYPE_RATIOS * stats.total_orders
             
             # 图3: 客户满意度
+            satisfaction_counts = [stats.five_star_ratings, 20, 5, 2, stats.complaints]
+            
+            # 图4: 技能成长
+            skill_values = [attributes.direction_sense, 
+                           attributes.emotional_intelligence, 
+                           attributes.education_level]
+            
+            self._render_chart('stats', self.stats_view, self.stats_figure, self._draw_statistics,
+                               earnings, order_counts, satisfaction_counts, skill_values)
+            self._chart_keys['stats'] = key
+            
+        except Exception as e:
+            print(f"更新统计图表错误: {e}")
+    
+    def _draw_statistics(self, earnings, order_counts, satisfaction_counts, skill_values):
+        """（后台线程）画四个统计子图"""
+        first_draw = not hasattr(self, '_ax1_line')
+        
+        if first_draw:
+            # 第一次绘制时创建线条和柱子，之后只改数据
+            self._ax1_line, = self.ax1.plot(list(range(1, 31)), earnings, marker='o')
+            self.ax1.set_title('月度收入趋势')
+            self.ax1.set_xlabel('日期')
+            self.ax1.set_ylabel('收入(元)')
+            
             satisfaction_data = ['五星', '四星', '三星', '二星', '一星']
-            satisfaction_counts = [self.game_state.stats.five_star_ratings, 20, 5, 2, self.game_state.stats.complaints]
-            self.ax3.bar(satisfaction_data, satisfaction_counts, color=['gold', 'silver', 'orange', 'red', 'darkred'])
+            self._ax3_bars = self.ax3.bar(satisfaction_data, satisfaction_counts, color=['gold', 'silver', 'orange', 'red', 'darkred'])
             self.ax3.set_title('客户评价分布')
             self.ax3.set_ylabel('数量')
             
-            # 图4: 技能成长
             skill_names = ['方向感', '情商', '学历']
-            skill_values = [self.game_state.attributes.direction_sense, 
-                           self.game_state.attributes.emotional_intelligence, 
-                           self.game_state.attributes.education_level]
-            self.ax4.bar(skill_names, skill_values, color=['blue', 'green', 'purple'])
+            self._ax4_bars = self.ax4.bar(skill_names, skill_values, color=['blue', 'green', 'purple'])
             self.ax4.set_title('核心技能等级')
             self.ax4.set_ylabel('等级')
+        else:
+            self._ax1_line.set_ydata(earnings)
+            for bars, heights in ((self._ax3_bars, satisfaction_counts), (self._ax4_bars, skill_values)):
+                for bar, height in zip(bars, heights):
+                    bar.set_height(height)
             
-            plt.tight_layout()
-            self.stats_canvas.draw()
-            
-        except Exception as e:
-            print(f"更新统计图表错误: {e}")
+            # 数据范围变了，重新计算坐标轴范围
+            for ax in (self.ax1, self.ax3, self.ax4):
+                ax.relim()
+                ax.autoscale_view()
+        
+        # 饼图的扇区数量和角度都会变，仍然整体重画
+        self.ax2.clear()
+        self.ax2.pie(order_counts, labels=['S级', 'A级', 'D级'], autopct='%1.1f%%')
+        self.ax2.set_title('订单类型分布')
+        
+        # 布局只在第一次绘制时计算
+        if first_draw:
+            self.stats_figure.tight_layout()
     
     def export_statistics(self):
         """导出统计数据"""
@@ -1933,8 +2367,12 @@ class GameGUI:
                     }
                 }
                 
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(stats_data, f, ensure_ascii=False, indent=2)
+                if orjson is not None:
+                    with open(filename, 'wb') as f:
+                        f.write(orjson.dumps(stats_data, option=orjson.OPT_INDENT_2))
+                else:
+                    with open(filename, 'w', encoding='utf-8') as f:
+                        json.dump(stats_data, f, ensure_ascii=False, indent=2)
                 
                 messagebox.showinfo("成功", f"统计数据已导出到 {filename}")
                 
@@ -1944,61 +2382,25 @@ class GameGUI:
     def generate_report(self):
         """生成游戏报告"""
         try:
-            report_window = tk.Toplevel(self.root)
-            report_window.title("游戏报告")
-            report_window.geometry("600x700")
-            
-            report_text = scrolledtext.ScrolledText(report_window, wrap=tk.WORD)
-            report_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            
             # 生成报告内容
-            report_content = f"""
-            送外卖模拟器 - 游戏报告
-            ========================
-            
-            玩家信息:
-            - 姓名: {self.game_state.player_name or '配送员小王'}
-            - 等级: {self.game_state.attributes.level}
-            - 经验: {self.game_state.attributes.experience}
-            - 信用分: {self.game_state.attributes.credit_score}
-            
-            财务状况:
-            - 外卖币: ¥{self.game_state.finances.delivery_coins:.2f}
-            - 存款: ¥{self.game_state.finances.savings:.2f}
-            - 负债: ¥{self.game_state.finances.debt:.2f}
-            
-            配送统计:
-            - 总订单数: {self.game_state.stats.total_orders}
-            - 成功配送: {self.game_state.stats.successful_deliveries}
-            - 成功率: {(self.game_state.stats.successful_deliveries/max(1, self.game_state.stats.total_orders)*100):.1f}%
-            - 总收入: ¥{self.game_state.stats.total_earnings:.2f}
-            - 总小费: ¥{self.game_state.stats.total_tips:.2f}
-            
-            客户反馈:
-            - 五星好评: {self.game_state.stats.five_star_ratings}
-            - 客户投诉: {self.game_state.stats.complaints}
-            - 投诉率: {(self.game_state.stats.complaints/max(1, self.game_state.stats.total_orders)*100):.1f}%
-            
-            技能发展:
-            - 方向感: {self.game_state.attributes.direction_sense}级
-            - 情商值: {self.game_state.attributes.emotional_intelligence}级
-            - 学历值: {self.game_state.attributes.education_level}级
-            
-            当前状态:
-            - 体力值: {self.game_state.attributes.stamina}/100
-            - 疲劳度: {self.game_state.fatigue_level}%
-            - 位置: {self.game_state.current_location.value}
-            - 天气: {self.game_state.weather.value}
-            
-            投资情况:
-            - 持仓数量: {len(self.portfolio.stock_positions)}
-            - 持仓市值: ¥{self.portfolio.get_portfolio_value():.2f}
-            - 总盈亏: ¥{self.portfolio.get_total_profit_loss():.2f}
-            
-            报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-            """.strip()
-            
-            report_text.insert(1.0, report_content)
+            gs = self.game_state
+            stats = gs.stats
+            total_orders = max(1, stats.total_orders)
+            report_content = _REPORT_TEMPLATE.format(
+                gs=gs,
+                attrs=gs.attributes,
+                fin=gs.finances,
+                stats=stats,
+                player_name=gs.player_name or '配送员小王',
+                success_rate=stats.successful_deliveries / total_orders * 100,
+                complaint_rate=stats.complaints / total_orders * 100,
+                positions=len(self.portfolio.stock_positions),
+                portfolio_value=self.portfolio.get_portfolio_value(),
+                portfolio_profit=self.portfolio.get_total_profit_loss(),
+                generated_at=self._now_strs()[1]
+            )
+            
+            self._text_window('report', "游戏报告", "600x700", report_content)
             
         except Exception as e:
             messagebox.showerror("错误", f"生成报告失败: {e}")
@@ -2014,88 +2416,115 @@ class GameGUI:
         rest_cost = 10.0
         if self.game_state.finances.delivery_coins >= rest_cost:
             self.game_state.finances.delivery_coins -= rest_cost
-            self.game_state.attributes.stamina = min(100, self.game_state.attributes.stamina + 30)
-            self.game_state.fatigue_level = max(0, self.game_state.fatigue_level - 20)
+            # 上下限用条件表达式，不经过内置 min/max 的调用
+            stamina = self.game_state.attributes.stamina + 30
+            self.game_state.attributes.stamina = 100 if stamina > 100 else stamina
+            fatigue = self.game_state.fatigue_level - 20
+            self.game_state.fatigue_level = 0 if fatigue < 0 else fatigue
             messagebox.showinfo("休息完成", "体力恢复30点，疲劳度降低20点")
         else:
             messagebox.showerror("资金不足", "休息需要¥10.00")
     
+    def _get_window(self, key, title, geometry):
+        """取出缓存的弹出窗口，没有时创建（关闭按钮只隐藏窗口），返回 (窗口, 是否新建)"""
+        window = self._windows.get(key)
+        if window is not None and window.winfo_exists():
+            window.deiconify()
+            window.lift()
+            return window, False
+        
+        window = self._windows[key] = tk.Toplevel(self.root)
+        window.title(title)
+        window.geometry(geometry)
+        window.protocol("WM_DELETE_WINDOW", window.withdraw)
+        return window, True
+    
+    def _text_window(self, key, title, geometry, content):
+        """在缓存的文本窗口中显示 content"""
+        window, created = self._get_window(key, title, geometry)
+        if created:
+            text = self._window_texts[key] = scrolledtext.ScrolledText(window, wrap=tk.WORD)
+            text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self._window_texts[key].replace(1.0, tk.END, content)
+    
     def view_messages(self):
         """查看消息"""
-        # 创建消息窗口
-        msg_window = tk.Toplevel(self.root)
-        msg_window.title("系统消息")
-        msg_window.geometry("500x400")
-        
-        msg_text = scrolledtext.ScrolledText(msg_window, wrap=tk.WORD)
-        msg_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
         # 模拟系统消息
         messages = [
-            f"[{datetime.now().strftime('%H:%M')}] 系统: 欢迎来到送外卖模拟器！",
-            f"[{datetime.now().strftime('%H:%M')}] 平台: 今日有{random.randint(5, 15)}个新订单等待配送",
-            f"[{datetime.now().strftime('%H:%M')}] 天气: 当前{self.game_state.weather.value}，注意安全",
+            "系统: 欢迎来到送外卖模拟器！",
+            f"平台: 今日有{self._rng.integers(5, 16)}个新订单等待配送",
+            f"天气: 当前{self.game_state.weather.value}，注意安全",
         ]
         
         if self.game_state.attributes.credit_score < 80:
-            messages.append(f"[{datetime.now().strftime('%H:%M')}] 警告: 信用分过低，请注意服务质量")
+            messages.append("警告: 信用分过低，请注意服务质量")
         
         if self.game_state.finances.debt > 40000:
-            messages.append(f"[{datetime.now().strftime('%H:%M')}] 提醒: 负债较高，建议努力还债")
+            messages.append("提醒: 负债较高，建议努力还债")
         
-        msg_text.insert(1.0, '\n'.join(messages))
+        # 所有消息共用同一个时间前缀
+        prefix = f"\n[{self._now_strs()[0]}] "
+        self._text_window('messages', "系统消息", "500x400", prefix[1:] + prefix.join(messages))
     
     def equipment_management(self):
         """装备管理"""
-        # 创建装备管理窗口
-        equip_window = tk.Toplevel(self.root)
-        equip_window.title("装备管理")
-        equip_window.geometry("400x500")
+        # 装备管理窗口只创建一次，之后每次打开刷新当前装备
+        equip_window, created = self._get_window('equipment', "装备管理", "400x500")
+        
+        equipment = self.game_state.equipment
+        equipment_info = f"""
+电池容量: {equipment.battery_capacity}%
+防雨篷: {'已安装' if equipment.rain_cover else '未安装'}
+货架加固: {'已加固' if equipment.cargo_rack_reinforced else '未加固'}
+制服质量: {equipment.uniform_quality}
+        """.strip()
+        
+        if not created:
+            self._equipment_label.configure(text=equipment_info)
+            return
         
         # 当前装备
         current_frame = ttk.LabelFrame(equip_window, text="当前装备")
         current_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        equipment_info = f"""
-电池容量: {self.game_state.equipment.battery_capacity}%
-防雨篷: {'已安装' if self.game_state.equipment.rain_cover else '未安装'}
-货架加固: {'已加固' if self.game_state.equipment.cargo_rack_reinforced else '未加固'}
-制服质量: {self.game_state.equipment.uniform_quality}
-        """.strip()
-        
-        tk.Label(current_frame, text=equipment_info, justify=tk.LEFT).pack(padx=10, pady=10)
+        self._equipment_label = tk.Label(current_frame, text=equipment_info, justify=tk.LEFT)
+        self._equipment_label.pack(padx=10, pady=10)
         
         # 装备升级
         upgrade_frame = ttk.LabelFrame(equip_window, text="装备升级")
         upgrade_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        upgrades = [
-            ("电池扩容", "续航+20分钟", 300, "battery_capacity"),
-            ("防雨篷", "雨天效率+30%", 200, "rain_cover"),
-            ("货架加固", "减少餐损概率", 150, "cargo_rack_reinforced"),
-            ("正装制服", "进入高端社区", 500, "uniform_quality")
-        ]
-        
-        for name, desc, price, attr in upgrades:
-            frame = ttk.Frame(upgrade_frame)
-            frame.pack(fill=tk.X, padx=5, pady=2)
-            
-            tk.Label(frame, text=f"{name} - {desc}").pack(side=tk.LEFT)
-            tk.Label(frame, text=f"¥{price}").pack(side=tk.RIGHT, padx=5)
-            
-            def buy_upgrade(attribute=attr, cost=price):
-                if self.game_state.finances.delivery_coins >= cost:
-                    self.game_state.finances.delivery_coins -= cost
-                    if attribute == "uniform_quality":
-                        self.game_state.equipment.uniform_quality = "formal"
-                    else:
-                        setattr(self.game_state.equipment, attribute, True)
-                    messagebox.showinfo("成功", f"{name}升级完成！")
-                    equip_window.destroy()
+        # 所有升级项放在一个 Treeview 里，整个列表只有一个购买按钮
+        upgrade_tree = ttk.Treeview(upgrade_frame, columns=('升级', '价格'), show='headings',
+                                    height=len(_EQUIPMENT_UPGRADES), selectmode='browse')
+        upgrade_tree.heading('升级', text='升级')
+        upgrade_tree.heading('价格', text='价格')
+        upgrade_tree.column('升级', width=260)
+        upgrade_tree.column('价格', width=80, anchor=tk.E)
+        for attr, name, desc, price in _EQUIPMENT_UPGRADES:
+            upgrade_tree.insert('', 'end', iid=attr, values=(f"{name} - {desc}", f"¥{price}"))
+        upgrade_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=2)
+        
+        def buy_upgrade(event=None):
+            selection = upgrade_tree.selection()
+            if not selection:
+                messagebox.showwarning("警告", "请先选择一个升级项")
+                return
+            attribute = selection[0]
+            name, cost = _EQUIPMENT_UPGRADE_INFO[attribute]
+            if self.game_state.finances.delivery_coins >= cost:
+                self.game_state.finances.delivery_coins -= cost
+                if attribute == "uniform_quality":
+                    self.game_state.equipment.uniform_quality = "formal"
                 else:
-                    messagebox.showerror("失败", "资金不足")
-            
-            ttk.Button(frame, text="购买", command=buy_upgrade).pack(side=tk.RIGHT)
+                    setattr(self.game_state.equipment, attribute, True)
+                messagebox.showinfo("成功", f"{name}升级完成！")
+                equip_window.withdraw()
+            else:
+                messagebox.showerror("失败", "资金不足")
+        
+        upgrade_tree.bind('<Double-1>', buy_upgrade)
+        ttk.Button(upgrade_frame, text="购买", command=buy_upgrade).pack(pady=5)
     
     # 菜单方法
     def new_game(self):
@@ -2103,7 +2532,7 @@ class GameGUI:
         if messagebox.askyesno("新游戏", "确定要开始新游戏吗？当前进度将丢失。"):
             self.game_state = GameState()
             self.portfolio = InvestmentPortfolio(self.game_state)
-            self.expense_manager = ExpenseManager(self.game_state)
+            self.expense_manager = ExpenseManager(self.game_state, rng=self._rng)
             messagebox.showinfo("新游戏", "新游戏已开始！")
     
     def save_game(self):
@@ -2140,13 +2569,6 @@ class GameGUI:
     
     def show_help(self):
         """显示帮助"""
-        help_window = tk.Toplevel(self.root)
-        help_window.title("游戏说明")
-        help_window.geometry("600x500")
-        
-        help_text = scrolledtext.ScrolledText(help_window, wrap=tk.WORD)
-        help_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
         help_content = """
         送外卖模拟器 - 游戏说明
         
@@ -2179,7 +2601,7 @@ class GameGUI:
         - 定期保存游戏进度
         """
         
-        help_text.insert(1.0, help_content)
+        self._text_window('help', "游戏说明", "600x500", help_content)
     
     def show_about(self):
         """显示关于"""
@@ -2192,9 +2614,7 @@ class GameGUI:
     
     def view_traffic(self):
         """查看路况"""
-        traffic_window = tk.Toplevel(self.root)
-        traffic_window.title("实时路况")
-        traffic_window.geometry("500x400")
+        traffic_window, created = self._get_window('traffic', "实时路况", "500x400")
         
         # 模拟路况数据
         traffic_data = {
@@ -2204,20 +2624,26 @@ class GameGUI:
             "翡翠湾": random.choice(["畅通", "缓慢", "拥堵"])
         }
         
-        tk.Label(traffic_window, text="实时路况信息", font=("Arial", 14, "bold")).pack(pady=10)
+        if created:
+            tk.Label(traffic_window, text="实时路况信息", font=("Arial", 14, "bold")).pack(pady=10)
+            
+            self._traffic_labels = {}
+            for district in traffic_data:
+                frame = tk.Frame(traffic_window)
+                frame.pack(fill=tk.X, padx=20, pady=5)
+                tk.Label(frame, text=district, width=10).pack(side=tk.LEFT)
+                self._traffic_labels[district] = tk.Label(frame, font=("Arial", 12, "bold"))
+                self._traffic_labels[district].pack(side=tk.LEFT)
         
         for district, status in traffic_data.items():
             color = {"畅通": "green", "缓慢": "orange", "拥堵": "red"}[status]
-            frame = tk.Frame(traffic_window)
-            frame.pack(fill=tk.X, padx=20, pady=5)
-            tk.Label(frame, text=district, width=10).pack(side=tk.LEFT)
-            tk.Label(frame, text=status, fg=color, font=("Arial", 12, "bold")).pack(side=tk.LEFT)
+            self._traffic_labels[district].configure(text=status, fg=color)
     
     def delivery_settings(self):
-        """配送设置"""
-        settings_window = tk.Toplevel(self.root)
-        settings_window.title("配送设置")
-        settings_window.geometry("400x300")
+        """配送设置（窗口保留，重新打开时显示上次的设置）"""
+        settings_window, created = self._get_window('settings', "配送设置", "400x300")
+        if not created:
+            return
         
         # 自动接单设置
         auto_frame = ttk.LabelFrame(settings_window, text="自动接单设置")
@@ -2241,19 +2667,12 @@ class GameGUI:
         # 保存设置
         def save_settings():
             messagebox.showinfo("设置保存", "设置已保存")
-            settings_window.destroy()
+            settings_window.withdraw()
         
         ttk.Button(settings_window, text="保存设置", command=save_settings).pack(pady=20)
     
     def view_interaction_history(self):
         """查看互动历史"""
-        history_window = tk.Toplevel(self.root)
-        history_window.title("互动历史")
-        history_window.geometry("700x500")
-        
-        history_text = scrolledtext.ScrolledText(history_window, wrap=tk.WORD)
-        history_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
         history = self.customer_system.get_interaction_history(20)
         
         if history:
@@ -2269,19 +2688,12 @@ class GameGUI:
         else:
             content = "暂无互动历史记录"
         
-        history_text.insert(1.0, content)
+        self._text_window('history', "互动历史", "700x500", content)
     
     def analyze_customer_patterns(self):
         """分析客户模式"""
         analysis = self.customer_system.analyze_customer_patterns()
         
-        analysis_window = tk.Toplevel(self.root)
-        analysis_window.title("客户模式分析")
-        analysis_window.geometry("500x400")
-        
-        analysis_text = scrolledtext.ScrolledText(analysis_window, wrap=tk.WORD)
-        analysis_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
         if isinstance(analysis, dict) and 'message' not in analysis:
             content = "客户互动成功率分析:\n\n"
             for customer_type, stats in analysis.items():
@@ -2292,7 +2704,7 @@ class GameGUI:
         else:
             content = analysis.get('message', '暂无数据')
         
-        analysis_text.insert(1.0, content)
+        self._text_window('analysis', "客户模式分析", "500x400", content)
     
     def view_lottery_history(self):
         """查看彩票历史"""
@@ -2302,6 +2714,8 @@ class GameGUI:
         """退出游戏"""
         if messagebox.askyesno("退出游戏", "确定要退出游戏吗？"):
             self.game_running = False
+            self._render_pool.shutdown(wait=False)
+            self._delivery_pool.shutdown(wait=False)
             self.root.quit()
     
     def run(self):
@@ -2316,8 +2730,10 @@ def main():
         app.run()
     except Exception as e:
         print(f"游戏启动失败: {e}")
-        import traceback
-        traceback.print_exc()
+        # 完整的调用栈只在设置了 FOODSIM_DEBUG 环境变量时打印
+        if os.environ.get('FOODSIM_DEBUG'):
+            import traceback
+            traceback.print_exc()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
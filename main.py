@@ -5,10 +5,9 @@ Food Delivery Simulator - Main Entry Point
 
 import sys
 import os
+import importlib.util
 import tkinter as tk
 from tkinter import messagebox
-import matplotlib
-matplotlib.use('TkAgg')  # 设置matplotlib后端
 
 # 添加当前目录到系统路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -30,10 +29,9 @@ def check_dependencies():
     
     missing_packages = []
     
+    # 只查找模块是否存在，不真正导入（matplotlib 等到第一次画图时才导入）
     for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
+        if importlib.util.find_spec(package) is None:
             missing_packages.append(package)
     
     if missing_packages:
@@ -83,8 +81,10 @@ def main():
         except:
             pass
         
-        import traceback
-        traceback.print_exc()
+        # 完整的调用栈只在设置了 FOODSIM_DEBUG 环境变量时打印
+        if os.environ.get('FOODSIM_DEBUG'):
+            import traceback
+            traceback.print_exc()
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -3,11 +3,11 @@
 Order and Delivery System
 """
 
-import random
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Sequence, Union
 from enum import Enum
-from game_core import DistrictType, CustomerType, WeatherType
+import numpy as np
+from game_core import DistrictType, CustomerType, WeatherType, njit, prange
 
 class OrderPriority(Enum):
     S_LEVEL = "S级"  # 高收益高风险
@@ -21,6 +21,86 @@ class OrderStatus(Enum):
     DELIVERED = "已送达"
     CANCELLED = "已取消"
 
+# 枚举成员按定义顺序排列，查找表数组和随机下标都按这个顺序
+_DISTRICTS = tuple(DistrictType)
+_CUSTOMERS = tuple(CustomerType)
+_PRIORITIES = tuple(OrderPriority)
+
+# 影响配送的恶劣天气。用元组而不是 frozenset：in 先比较对象身份，不需要调用 Enum 的 Python 级 __hash__
+_BAD_WEATHER = (WeatherType.RAINY, WeatherType.STORMY)
+
+# 费率表：模块级元组，按上面的枚举顺序取下标（枚举值是中文名，不能直接当下标）
+# 各客户类型订单优先级的权重 (S, A, D)，按 _CUSTOMERS 顺序
+_PRIORITY_WEIGHTS = (
+    (0.1, 0.3, 0.6),    # 程序员社恐型
+    (0.7, 0.25, 0.05),  # 催单暴发户型
+    (0.4, 0.5, 0.1),    # 刁难大妈型
+    (0.2, 0.6, 0.2),    # 普通顾客
+    (0.5, 0.4, 0.1),    # VIP客户
+)
+_BASE_RATES = (15.0, 8.0, 5.0)                      # 按 _PRIORITIES：S / A / D
+_DISTRICT_MULTIPLIERS = (1.2, 1.0, 1.1, 1.5)        # 按 _DISTRICTS：蚂蚁窝 / 梧桐巷 / 创业园 / 翡翠湾
+_COMPLAINT_BASE = (0.7, 0.4, 0.05)                  # 按 _PRIORITIES
+_COMPLAINT_CUSTOMER_MULTIPLIERS = (0.3, 1.5, 1.2, 1.0, 0.8)  # 按 _CUSTOMERS
+_TIP_DISTRICT = (0.1, 0.3, 0.2, 0.6)                # 按 _DISTRICTS
+_TIP_CUSTOMER_MULTIPLIERS = (1.2, 0.8, 0.5, 1.0, 1.5)        # 按 _CUSTOMERS
+
+assert len(_PRIORITY_WEIGHTS) == len(_CUSTOMERS) and len(_BASE_RATES) == len(_PRIORITIES)
+assert len(_DISTRICT_MULTIPLIERS) == len(_TIP_DISTRICT) == len(_DISTRICTS)
+
+# 基础配送费只取决于优先级、取餐区和送达区，4×4×3 种组合在模块加载时算好，按 [优先级][取餐区][送达区] 的下标取
+_BASE_FEE_TABLE = tuple(
+    tuple(tuple(round(rate * (_DISTRICT_MULTIPLIERS[p] + _DISTRICT_MULTIPLIERS[d]) / 2, 2)
+                for d in range(len(_DISTRICTS)))
+          for p in range(len(_DISTRICTS)))
+    for rate in _BASE_RATES
+)
+
+@njit(cache=True)
+def _order_columns(complaint_base, complaint_mult, tip_district, tip_mult, weather_bonuses, peak_bonuses,
+                   fee_idx, delivery_idx, priority_idx, type_idx, distance,
+                   time_mult, peak):
+    """批量订单的时间、奖励和概率列（各表按枚举定义顺序的下标取值，奖励按基础费下标 fee_idx 取值）
+    
+    返回 (预计时间, 天气奖励, 高峰奖励, 投诉概率, 小费概率)。
+    """
+    estimated_time = (distance * 5 * time_mult).astype(np.int64)
+    weather_bonus = weather_bonuses[fee_idx]
+    if peak:
+        peak_hour_bonus = peak_bonuses[fee_idx]
+    else:
+        peak_hour_bonus = np.zeros(fee_idx.shape[0])
+    complaint_prob = np.minimum(0.9, complaint_base[priority_idx] * complaint_mult[type_idx])
+    tip_prob = np.minimum(0.8, tip_district[delivery_idx] * tip_mult[type_idx])
+    return estimated_time, weather_bonus, peak_hour_bonus, complaint_prob, tip_prob
+
+@njit(parallel=True, cache=True)
+def _simulate_deliveries(total_fee, complaint_p, tip_p, draws, direction_bonus, complaint_scale):
+    """批量配送结算，draws 每行是一单的7个随机数（列含义与 simulate_delivery 相同）
+    
+    返回 (是否成功, 收入, 小费, 是否投诉)。
+    """
+    n = total_fee.shape[0]
+    success = np.ones(n, dtype=np.bool_)
+    earnings = np.zeros(n)
+    tips = np.zeros(n)
+    complaint = np.zeros(n, dtype=np.bool_)
+    for i in prange(n):
+        # 交通事故：配送失败，没有收入
+        if draws[i, 1] < 0.05:
+            success[i] = False
+        else:
+            total = total_fee[i]
+            if direction_bonus and draws[i, 3] < 0.2:
+                total += 3.0  # 提前送达奖励
+            if draws[i, 4] < tip_p[i]:
+                tip = round(2.0 + draws[i, 5] * 18.0, 2)
+                tips[i] = tip
+                total += tip
+            complaint[i] = draws[i, 6] < complaint_p[i] * complaint_scale
+            earnings[i] = round(total, 2)
+    return success, earnings, tips, complaint
+
 @dataclass
 class Order:
     """订单数据结构"""
@@ -34,17 +114,105 @@ class Order:
     base_fee: float
     distance_km: float
     estimated_time: int  # 预计配送时间（分钟）
-    special_requirements: List[str]
+    special_requirements: Sequence[str]  # 同类客户的订单共用同一个不可变元组
     weather_bonus: float = 0.0
     peak_hour_bonus: float = 0.0
     status: OrderStatus = OrderStatus.AVAILABLE
     complaint_probability: float = 0.0
     tip_probability: float = 0.0
 
+@dataclass
+class OrdersSoA:
+    """一批订单的列式存储：每个字段一个 numpy 数组，第 i 单的所有字段都在各数组的下标 i 处
+    
+    筛选、汇总直接在数组上做；只有需要显示或接单时才用 order()/to_orders() 构造 Order 对象。
+    """
+    order_ids: np.ndarray
+    restaurant_idx: np.ndarray
+    customer_idx: np.ndarray
+    pickup_idx: np.ndarray  # 按 _DISTRICTS 的下标
+    delivery_idx: np.ndarray
+    type_idx: np.ndarray  # 按 _CUSTOMERS 的下标
+    priority_idx: np.ndarray  # 按 _PRIORITIES 的下标
+    base_fee: np.ndarray
+    distance_km: np.ndarray
+    estimated_time: np.ndarray
+    weather_bonus: np.ndarray
+    peak_hour_bonus: np.ndarray
+    complaint_probability: np.ndarray
+    tip_probability: np.ndarray
+    restaurants: Sequence[str]
+    customer_names: Sequence[str]
+    requirements: Sequence[Sequence[str]]  # 按 _CUSTOMERS 的下标，已含天气追加的要求
+    
+    def __len__(self) -> int:
+        return len(self.base_fee)
+    
+    def total_income(self) -> np.ndarray:
+        """每单的总收入（基础费 + 天气奖励 + 高峰奖励）"""
+        return self.base_fee + self.weather_bonus + self.peak_hour_bonus
+    
+    def select_min_income(self, min_income: float) -> np.ndarray:
+        """总收入不低于 min_income 的订单下标"""
+        return np.flatnonzero(self.total_income() >= min_income)
+    
+    def order(self, i: int) -> Order:
+        """构造第 i 单的 Order 对象"""
+        return self.to_orders([i])[0]
+    
+    def to_orders(self, indices: Optional[Sequence[int]] = None) -> List[Order]:
+        """把（指定下标的）订单构造成 Order 对象列表"""
+        columns = (self.order_ids, self.restaurant_idx, self.customer_idx, self.pickup_idx, self.delivery_idx,
+                   self.type_idx, self.priority_idx, self.base_fee, self.distance_km, self.estimated_time,
+                   self.weather_bonus, self.peak_hour_bonus, self.complaint_probability, self.tip_probability)
+        if indices is not None:
+            columns = tuple(col[indices] for col in columns)
+        districts, customer_types, priorities = _DISTRICTS, _CUSTOMERS, _PRIORITIES
+        restaurants, customer_names, requirements = self.restaurants, self.customer_names, self.requirements
+        
+        return [
+            Order(
+                order_id=f"ORDER_{order_id}",
+                restaurant_name=restaurants[r],
+                customer_name=customer_names[c],
+                pickup_district=districts[p],
+                delivery_district=districts[d],
+                customer_type=customer_types[t],
+                priority=priorities[pr],
+                base_fee=fee,
+                distance_km=dist,
+                estimated_time=est,
+                special_requirements=requirements[t],
+                weather_bonus=wb,
+                peak_hour_bonus=pb,
+                complaint_probability=cp,
+                tip_probability=tp
+            )
+            for (order_id, r, c, p, d, t, pr, fee, dist, est, wb, pb, cp, tp) in zip(*(col.tolist() for col in columns))
+        ]
+
 class OrderGenerator:
     """订单生成器"""
     
-    def __init__(self):
+    _WEATHER_TIME_MULTIPLIERS = {
+        WeatherType.SUNNY: 1.0,
+        WeatherType.RAINY: 1.3,
+        WeatherType.STORMY: 1.6,
+        WeatherType.FOGGY: 1.4,
+        WeatherType.TYPHOON: 2.0
+    }
+    
+    _WEATHER_BONUSES = {
+        WeatherType.SUNNY: 0.0,
+        WeatherType.RAINY: 0.3,
+        WeatherType.STORMY: 0.8,
+        WeatherType.FOGGY: 0.4,
+        WeatherType.TYPHOON: 1.5
+    }
+    
+    _PEAK_HOURS = frozenset({11, 12, 13, 18, 19, 20})  # 午餐和晚餐高峰期
+    
+    def __init__(self, rng: Optional[np.random.Generator] = None):
         self.restaurants = [
             "麦当劳", "肯德基", "沙县小吃", "兰州拉面", "黄焖鸡米饭",
             "海底捞", "西贝莜面村", "外婆家", "新白鹿", "绿茶餐厅"
@@ -56,192 +224,227 @@ class OrderGenerator:
         ]
         
         self.special_requirements = {
-            CustomerType.PROGRAMMER_SHY: ["放门口即可", "不要打电话"],
-            CustomerType.RICH_IMPATIENT: ["需要视频验货", "必须带发票"],
-            CustomerType.DIFFICULT_ELDERLY: ["必须当面交付", "需要找零"],
-            CustomerType.NORMAL: ["正常配送"],
-            CustomerType.VIP: ["需要保温袋", "轻拿轻放"]
+            CustomerType.PROGRAMMER_SHY: ("放门口即可", "不要打电话"),
+            CustomerType.RICH_IMPATIENT: ("需要视频验货", "必须带发票"),
+            CustomerType.DIFFICULT_ELDERLY: ("必须当面交付", "需要找零"),
+            CustomerType.NORMAL: ("正常配送",),
+            CustomerType.VIP: ("需要保温袋", "轻拿轻放")
         }
+        
+        self._rng = rng if rng is not None else np.random.default_rng()
+        
+        # 批量生成用的查找表：按枚举定义顺序展开成数组
+        self._base_fees = np.array(_BASE_FEE_TABLE).ravel()  # 下标为 (优先级 × 4 + 取餐区) × 4 + 送达区
+        self._complaint_base = np.array(_COMPLAINT_BASE)
+        self._complaint_mult = np.array(_COMPLAINT_CUSTOMER_MULTIPLIERS)
+        self._tip_district = np.array(_TIP_DISTRICT)
+        self._tip_mult = np.array(_TIP_CUSTOMER_MULTIPLIERS)
+        
+        # 天气奖励和高峰奖励只取决于基础费（48 种）和天气，用 round 提前算好；
+        # 逐单和批量生成查同一张表，不会因为 np.around 的偶数舍入差一分钱
+        fees = self._base_fees.tolist()
+        self._weather_bonus_tables = {weather: np.array([round(fee * rate, 2) for fee in fees])
+                                      for weather, rate in self._WEATHER_BONUSES.items()}
+        self._peak_bonus_table = np.array([round(fee * 0.2, 2) for fee in fees])
+        
+        # 各客户类型抽取优先级 (S, A, D) 的累积概率，逐单生成时按客户类型下标取 (S, A) 两个分界点
+        cdf = np.cumsum(_PRIORITY_WEIGHTS, axis=1)
+        cdf /= cdf[:, -1:]
+        self._priority_cdf = cdf
+        self._priority_thresholds = tuple((float(row[0]), float(row[1])) for row in cdf)
+        
+        # generate_order 最近一次用到的专用生成函数及其 (天气, 小时)；同一时段内逐单生成时直接复用
+        self._gen_weather: Optional[WeatherType] = None
+        self._gen_hour = -1
+        self._gen: Optional[Callable[[], Order]] = None
     
     def generate_order(self, weather: WeatherType, current_hour: int) -> Order:
-        """生成随机订单"""
-        order_id = f"ORDER_{random.randint(100000, 999999)}"
-        restaurant = random.choice(self.restaurants)
-        customer = random.choice(self.customer_names)
-        
-        pickup_district = random.choice(list(DistrictType))
-        delivery_district = random.choice(list(DistrictType))
-        customer_type = random.choice(list(CustomerType))
-        
-        # 根据客户类型确定订单优先级
-        priority_weights = {
-            CustomerType.PROGRAMMER_SHY: [0.1, 0.3, 0.6],  # S, A, D
-            CustomerType.RICH_IMPATIENT: [0.7, 0.25, 0.05],
-            CustomerType.DIFFICULT_ELDERLY: [0.4, 0.5, 0.1],
-            CustomerType.NORMAL: [0.2, 0.6, 0.2],
-            CustomerType.VIP: [0.5, 0.4, 0.1]
-        }
-        
-        priority = random.choices(
-            list(OrderPriority),
-            weights=priority_weights[customer_type]
-        )[0]
-        
-        # 计算基础配送费
-        base_fee = self._calculate_base_fee(pickup_district, delivery_district, priority)
-        
-        # 计算距离
-        distance = self._calculate_distance(pickup_district, delivery_district)
-        
-        # 计算预计时间
-        estimated_time = self._calculate_estimated_time(distance, weather)
-        
-        # 天气奖励
-        weather_bonus = self._calculate_weather_bonus(weather, base_fee)
-        
-        # 高峰期奖励
-        peak_hour_bonus = self._calculate_peak_bonus(current_hour, base_fee)
-        
-        # 特殊要求
-        requirements = self.special_requirements[customer_type].copy()
-        if weather == WeatherType.RAINY:
-            requirements.append("注意防雨")
-        
-        # 投诉概率
-        complaint_prob = self._calculate_complaint_probability(priority, customer_type)
-        
-        # 小费概率
-        tip_prob = self._calculate_tip_probability(delivery_district, customer_type)
-        
-        return Order(
-            order_id=order_id,
-            restaurant_name=restaurant,
-            customer_name=customer,
-            pickup_district=pickup_district,
-            delivery_district=delivery_district,
-            customer_type=customer_type,
-            priority=priority,
+        """生成随机订单（天气和小时与上一单相同时复用上次的专用生成函数）"""
+        if weather is not self._gen_weather or current_hour != self._gen_hour:
+            self._gen = self.specialize(weather, current_hour)
+            self._gen_weather = weather
+            self._gen_hour = current_hour
+        return self._gen()
+    
+    def specialize(self, weather: WeatherType, current_hour: int) -> Callable[[], Order]:
+        """按固定的天气和小时生成一个专用的订单生成函数
+        
+        同一时段内连续生成订单时天气和小时不变，天气系数、高峰标记和查找表都提前取成闭包里的局部变量。
+        """
+        time_mult = self._WEATHER_TIME_MULTIPLIERS[weather]
+        is_peak = current_hour in self._PEAK_HOURS
+        # 特殊要求是元组，订单之间直接共用；雨天的追加在这里一次性拼好
+        extra = ("注意防雨",) if weather == WeatherType.RAINY else ()
+        requirements_by_type = tuple(self.special_requirements[t] + extra for t in _CUSTOMERS)
+        thresholds = self._priority_thresholds
+        base_fees = self._base_fees.tolist()
+        weather_bonuses = self._weather_bonus_tables[weather].tolist()
+        peak_bonuses = self._peak_bonus_table.tolist() if is_peak else [0.0] * len(base_fees)
+        complaint_base, complaint_mult = _COMPLAINT_BASE, _COMPLAINT_CUSTOMER_MULTIPLIERS
+        tip_district, tip_mult = _TIP_DISTRICT, _TIP_CUSTOMER_MULTIPLIERS
+        restaurants = self.restaurants
+        customer_names = self.customer_names
+        districts, customers, priorities = _DISTRICTS, _CUSTOMERS, _PRIORITIES
+        n_restaurants, n_names = len(restaurants), len(customer_names)
+        n_districts, n_customers = len(districts), len(customers)
+        draw = self._rng.random
+        
+        def gen() -> Order:
+            # 一单用到的 8 个随机数一次取出：编号、餐厅、顾客、取餐区、送达区、客户类型、优先级、距离
+            u_id, u_rest, u_name, u_pickup, u_delivery, u_type, r, u_dist = draw(8).tolist()
+            order_id = f"ORDER_{100000 + int(u_id * 900000)}"
+            restaurant = restaurants[int(u_rest * n_restaurants)]
+            customer = customer_names[int(u_name * n_names)]
+            
+            pickup = int(u_pickup * n_districts)
+            delivery = int(u_delivery * n_districts)
+            ctype = int(u_type * n_customers)
+            
+            # 根据客户类型确定订单优先级
+            s_cut, a_cut = thresholds[ctype]
+            if r < s_cut:
+                pri = 0
+            elif r < a_cut:
+                pri = 1
+            else:
+                pri = 2
+            
+            # 基础配送费、距离和预计时间
+            fee_idx = (pri * n_districts + pickup) * n_districts + delivery
+            base_fee = base_fees[fee_idx]
+            if pickup == delivery:
+                distance = round(0.5 + u_dist * 1.5, 1)
+            else:
+                distance = round(2.0 + u_dist * 6.0, 1)
+            estimated_time = int(distance * 5 * time_mult)
+            
+            # 投诉概率和小费概率
+            complaint_prob = complaint_base[pri] * complaint_mult[ctype]
+            tip_prob = tip_district[delivery] * tip_mult[ctype]
+            
+            return Order(
+                order_id=order_id,
+                restaurant_name=restaurant,
+                customer_name=customer,
+                pickup_district=districts[pickup],
+                delivery_district=districts[delivery],
+                customer_type=customers[ctype],
+                priority=priorities[pri],
+                base_fee=base_fee,
+                distance_km=distance,
+                estimated_time=estimated_time,
+                special_requirements=requirements_by_type[ctype],
+                weather_bonus=weather_bonuses[fee_idx],
+                peak_hour_bonus=peak_bonuses[fee_idx],
+                complaint_probability=0.9 if complaint_prob > 0.9 else complaint_prob,
+                tip_probability=0.8 if tip_prob > 0.8 else tip_prob
+            )
+        
+        return gen
+    
+    def generate_batch(self, n: int, weather: WeatherType, current_hour: int) -> List[Order]:
+        """一次生成 n 个随机订单，构造成 Order 对象列表"""
+        return self.generate_batch_soa(n, weather, current_hour).to_orders()
+    
+    def generate_batch_soa(self, n: int, weather: WeatherType, current_hour: int) -> OrdersSoA:
+        """一次生成 n 个随机订单：所有随机量和费用按列用 numpy 计算，以列式存储返回"""
+        rng = self._rng
+        
+        order_ids = rng.integers(100000, 1000000, n)
+        restaurant_idx = rng.integers(0, len(self.restaurants), n)
+        customer_idx = rng.integers(0, len(self.customer_names), n)
+        pickup_idx = rng.integers(0, len(_DISTRICTS), n)
+        delivery_idx = rng.integers(0, len(_DISTRICTS), n)
+        type_idx = rng.integers(0, len(_CUSTOMERS), n)
+        
+        # 按客户类型的累积权重抽取优先级
+        priority_idx = np.minimum((rng.random(n)[:, None] >= self._priority_cdf[type_idx]).sum(axis=1), len(_PRIORITIES) - 1)
+        
+        # 距离：同区 0.5-2km，跨区 2-8km
+        same = pickup_idx == delivery_idx
+        distance = np.round(rng.uniform(np.where(same, 0.5, 2.0), np.where(same, 2.0, 8.0)), 1)
+        
+        # 费用、时间和概率
+        fee_idx = (priority_idx * len(_DISTRICTS) + pickup_idx) * len(_DISTRICTS) + delivery_idx
+        base_fee = self._base_fees[fee_idx]
+        estimated_time, weather_bonus, peak_hour_bonus, complaint_prob, tip_prob = _order_columns(
+            self._complaint_base, self._complaint_mult,
+            self._tip_district, self._tip_mult,
+            self._weather_bonus_tables[weather], self._peak_bonus_table,
+            fee_idx, delivery_idx, priority_idx, type_idx, distance,
+            self._WEATHER_TIME_MULTIPLIERS[weather],
+            current_hour in self._PEAK_HOURS)
+        
+        # 每种客户类型的特殊要求（雨天追加防雨），同类客户的订单共用同一个元组
+        extra = ("注意防雨",) if weather == WeatherType.RAINY else ()
+        requirements = tuple(self.special_requirements[t] + extra for t in _CUSTOMERS)
+        
+        return OrdersSoA(
+            order_ids=order_ids,
+            restaurant_idx=restaurant_idx,
+            customer_idx=customer_idx,
+            pickup_idx=pickup_idx,
+            delivery_idx=delivery_idx,
+            type_idx=type_idx,
+            priority_idx=priority_idx,
             base_fee=base_fee,
             distance_km=distance,
             estimated_time=estimated_time,
-            special_requirements=requirements,
             weather_bonus=weather_bonus,
             peak_hour_bonus=peak_hour_bonus,
             complaint_probability=complaint_prob,
-            tip_probability=tip_prob
+            tip_probability=tip_prob,
+            restaurants=self.restaurants,
+            customer_names=self.customer_names,
+            requirements=requirements
         )
-    
-    def _calculate_base_fee(self, pickup: DistrictType, delivery: DistrictType, priority: OrderPriority) -> float:
-        """计算基础配送费"""
-        base_rates = {
-            OrderPriority.S_LEVEL: 15.0,
-            OrderPriority.A_LEVEL: 8.0,
-            OrderPriority.D_LEVEL: 5.0
-        }
-        
-        district_multipliers = {
-            DistrictType.ANT_NEST: 1.2,
-            DistrictType.WUTONG_LANE: 1.0,
-            DistrictType.STARTUP_PARK: 1.1,
-            DistrictType.JADE_BAY: 1.5
-        }
-        
-        base = base_rates[priority]
-        multiplier = (district_multipliers[pickup] + district_multipliers[delivery]) / 2
-        return round(base * multiplier, 2)
-    
-    def _calculate_distance(self, pickup: DistrictType, delivery: DistrictType) -> float:
-        """计算配送距离"""
-        if pickup == delivery:
-            return round(random.uniform(0.5, 2.0), 1)
-        else:
-            return round(random.uniform(2.0, 8.0), 1)
-    
-    def _calculate_estimated_time(self, distance: float, weather: WeatherType) -> int:
-        """计算预计配送时间"""
-        base_time = distance * 5  # 每公里5分钟
-        
-        weather_multipliers = {
-            WeatherType.SUNNY: 1.0,
-            WeatherType.RAINY: 1.3,
-            WeatherType.STORMY: 1.6,
-            WeatherType.FOGGY: 1.4,
-            WeatherType.TYPHOON: 2.0
-        }
-        
-        return int(base_time * weather_multipliers[weather])
-    
-    def _calculate_weather_bonus(self, weather: WeatherType, base_fee: float) -> float:
-        """计算天气奖励"""
-        bonuses = {
-            WeatherType.SUNNY: 0.0,
-            WeatherType.RAINY: 0.3,
-            WeatherType.STORMY: 0.8,
-            WeatherType.FOGGY: 0.4,
-            WeatherType.TYPHOON: 1.5
-        }
-        
-        return round(base_fee * bonuses[weather], 2)
-    
-    def _calculate_peak_bonus(self, hour: int, base_fee: float) -> float:
-        """计算高峰期奖励"""
-        peak_hours = [11, 12, 13, 18, 19, 20]  # 午餐和晚餐高峰期
-        if hour in peak_hours:
-            return round(base_fee * 0.2, 2)
-        return 0.0
-    
-    def _calculate_complaint_probability(self, priority: OrderPriority, customer_type: CustomerType) -> float:
-        """计算投诉概率"""
-        base_prob = {
-            OrderPriority.S_LEVEL: 0.7,
-            OrderPriority.A_LEVEL: 0.4,
-            OrderPriority.D_LEVEL: 0.05
-        }
-        
-        customer_multipliers = {
-            CustomerType.PROGRAMMER_SHY: 0.3,
-            CustomerType.RICH_IMPATIENT: 1.5,
-            CustomerType.DIFFICULT_ELDERLY: 1.2,
-            CustomerType.NORMAL: 1.0,
-            CustomerType.VIP: 0.8
-        }
-        
-        return min(0.9, base_prob[priority] * customer_multipliers[customer_type])
-    
-    def _calculate_tip_probability(self, district: DistrictType, customer_type: CustomerType) -> float:
-        """计算小费概率"""
-        district_prob = {
-            DistrictType.ANT_NEST: 0.1,
-            DistrictType.WUTONG_LANE: 0.3,
-            DistrictType.STARTUP_PARK: 0.2,
-            DistrictType.JADE_BAY: 0.6
-        }
-        
-        customer_multipliers = {
-            CustomerType.PROGRAMMER_SHY: 1.2,
-            CustomerType.RICH_IMPATIENT: 0.8,
-            CustomerType.DIFFICULT_ELDERLY: 0.5,
-            CustomerType.NORMAL: 1.0,
-            CustomerType.VIP: 1.5
-        }
-        
-        return min(0.8, district_prob[district] * customer_multipliers[customer_type])
 
 class DeliverySimulator:
     """配送模拟器"""
     
-    def __init__(self, game_state):
+    _BASE_EXPERIENCE = {
+        OrderPriority.S_LEVEL: 50,
+        OrderPriority.A_LEVEL: 30,
+        OrderPriority.D_LEVEL: 15
+    }
+    _BASE_EXPERIENCE_BY_INDEX = np.array(list(map(_BASE_EXPERIENCE.__getitem__, _PRIORITIES)), dtype=np.int64)  # 按 _PRIORITIES 的下标
+    
+    # 随机事件表，按 draws[0:4] 的顺序排列：(触发概率, 前置条件, 事件生成函数)
+    # 前置条件只看游戏状态，不满足时该事件直接跳过
+    _EVENT_TABLE = (
+        (0.3,
+         lambda state: state.weather in _BAD_WEATHER and not state.equipment.rain_cover,
+         lambda order: {'type': 'food_damage', 'description': '食物被雨水损坏', 'cost': order.base_fee * 0.5}),
+        (0.05,
+         None,
+         lambda order: {'type': 'accident', 'description': '发生交通事故', 'cost': 500.0}),
+        (0.1,
+         lambda state: state.equipment.battery_capacity < 50,
+         lambda order: {'type': 'battery_dead', 'description': '电池耗尽需要推车', 'time_penalty': 20}),
+        (0.2,
+         lambda state: state.attributes.direction_sense > 3,
+         lambda order: {'type': 'time_bonus', 'description': '提前送达获得奖励', 'bonus': 3.0}),
+    )
+    
+    def __init__(self, game_state, rng: Optional[np.random.Generator] = None):
         self.game_state = game_state
         self.current_orders: List[Order] = []
         self.active_order: Optional[Order] = None
+        self._rng = rng if rng is not None else np.random.default_rng()
         
     def simulate_delivery(self, order: Order) -> Dict:
-        """模拟配送过程"""
+        """模拟配送过程
+        
+        只计算结果，不修改游戏状态（界面会把它放到工作线程里跑）；信用分和好评数的变化
+        通过 credit_change / five_star 返回，由调用方写回。
+        """
         result = {
             'success': True,
             'earnings': 0.0,
             'tip': 0.0,
             'complaint': False,
+            'credit_change': 0,
+            'five_star': False,
             'experience_gained': 0,
             'events': []
         }
@@ -249,8 +452,12 @@ class DeliverySimulator:
         # 基础收入
         total_earnings = order.base_fee + order.weather_bonus + order.peak_hour_bonus
         
+        # 每次配送用到的随机数一次取出：
+        # 0-3 随机事件（淋雨、事故、电池、提前送达），4 是否给小费，5 小费金额，6 是否投诉
+        draws = self._rng.random(7).tolist()
+        
         # 随机事件处理
-        events = self._handle_random_events(order)
+        events = self._handle_random_events(order, draws)
         result['events'] = events
         
         for event in events:
@@ -264,8 +471,8 @@ class DeliverySimulator:
                 total_earnings += event['bonus']
         
         # 小费计算
-        if random.random() < order.tip_probability:
-            tip_amount = round(random.uniform(2.0, 20.0), 2)
+        if draws[4] < order.tip_probability:
+            tip_amount = round(2.0 + draws[5] * 18.0, 2)
             result['tip'] = tip_amount
             total_earnings += tip_amount
         
@@ -276,70 +483,76 @@ class DeliverySimulator:
         if self.game_state.attributes.emotional_intelligence > 5:
             complaint_chance *= 0.8
         
-        if random.random() < complaint_chance:
+        if draws[6] < complaint_chance:
             result['complaint'] = True
-            self.game_state.attributes.credit_score -= 5
+            result['credit_change'] = -5
         else:
             # 好评奖励
-            self.game_state.stats.five_star_ratings += 1
-            self.game_state.attributes.credit_score += 1
+            result['five_star'] = True
+            result['credit_change'] = 1
         
         result['earnings'] = round(total_earnings, 2)
         result['experience_gained'] = self._calculate_experience(order)
         
         return result
     
-    def _handle_random_events(self, order: Order) -> List[Dict]:
-        """处理随机事件"""
-        events = []
-        
-        # 恶劣天气事件
-        if self.game_state.weather in [WeatherType.RAINY, WeatherType.STORMY]:
-            if random.random() < 0.3 and not self.game_state.equipment.rain_cover:
-                events.append({
-                    'type': 'food_damage',
-                    'description': '食物被雨水损坏',
-                    'cost': order.base_fee * 0.5
-                })
-        
-        # 交通事故
-        if random.random() < 0.05:
-            events.append({
-                'type': 'accident',
-                'description': '发生交通事故',
-                'cost': 500.0
-            })
-        
-        # 电池耗尽
-        if random.random() < 0.1 and self.game_state.equipment.battery_capacity < 50:
-            events.append({
-                'type': 'battery_dead',
-                'description': '电池耗尽需要推车',
-                'time_penalty': 20
-            })
-        
-        # 提前送达奖励
-        if random.random() < 0.2 and self.game_state.attributes.direction_sense > 3:
-            events.append({
-                'type': 'time_bonus',
-                'description': '提前送达获得奖励',
-                'bonus': 3.0
-            })
-        
-        return events
+    def simulate_batch(self, orders: Union[List[Order], OrdersSoA]) -> Dict[str, np.ndarray]:
+        """批量结算多单配送（用于整段时间的汇总模拟），返回按订单排列的结果数组
+        
+        与逐单调用 simulate_delivery 的结算规则相同，但不生成事件描述；信用分和好评数
+        按汇总结果一次性写回游戏状态。orders 可以是 Order 列表，也可以是列式的 OrdersSoA。
+        """
+        state = self.game_state
+        n = len(orders)
+        if isinstance(orders, OrdersSoA):
+            total_fee = orders.total_income()
+            complaint_p = orders.complaint_probability
+            tip_p = orders.tip_probability
+            base_experience = self._BASE_EXPERIENCE_BY_INDEX[orders.priority_idx]
+        else:
+            total_fee = np.fromiter((o.base_fee + o.weather_bonus + o.peak_hour_bonus for o in orders), dtype=np.float64, count=n)
+            complaint_p = np.fromiter((o.complaint_probability for o in orders), dtype=np.float64, count=n)
+            tip_p = np.fromiter((o.tip_probability for o in orders), dtype=np.float64, count=n)
+            base_experience = np.array([self._BASE_EXPERIENCE[o.priority] for o in orders], dtype=np.int64)
+        
+        success, earnings, tips, complaint = _simulate_deliveries(
+            total_fee, complaint_p, tip_p, self._rng.random((n, 7)),
+            state.attributes.direction_sense > 3,
+            0.8 if state.attributes.emotional_intelligence > 5 else 1.0)
+        
+        # 经验值：按优先级的基础经验，恶劣天气额外10点；失败的配送不计
+        experience = base_experience.copy()
+        if state.weather in _BAD_WEATHER:
+            experience += 10
+        experience[~success] = 0
+        
+        complaints = int(complaint.sum())
+        praised = int(success.sum()) - complaints
+        state.attributes.credit_score += praised - 5 * complaints
+        state.stats.five_star_ratings += praised
+        
+        return {
+            'success': success,
+            'earnings': earnings,
+            'tip': tips,
+            'complaint': complaint,
+            'experience_gained': experience
+        }
+    
+    def _handle_random_events(self, order: Order, draws: List[float]) -> List[Dict]:
+        """处理随机事件（draws[0:4] 为本次配送预先取出的随机数）"""
+        state = self.game_state
+        # 先比较随机数，只有命中的事件才去检查前置条件
+        return [make_event(order)
+                for draw, (prob, gate, make_event) in zip(draws, self._EVENT_TABLE)
+                if draw < prob and (gate is None or gate(state))]
     
     def _calculate_experience(self, order: Order) -> int:
         """计算经验值获得"""
-        base_exp = {
-            OrderPriority.S_LEVEL: 50,
-            OrderPriority.A_LEVEL: 30,
-            OrderPriority.D_LEVEL: 15
-        }
-        
-        exp = base_exp[order.priority]
+        exp = self._BASE_EXPERIENCE[order.priority]
         
         # 恶劣天气额外经验
-        if self.game_state.weather in [WeatherType.RAINY, WeatherType.STORMY]:
+        if self.game_state.weather in _BAD_WEATHER:
             exp += 10
         
         return exp
\ No newline at end of file
@@ -3,12 +3,18 @@
 Skill Development System
 """
 
-import random
 import json
+import os
+import time
+from functools import lru_cache
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+from dataclasses import dataclass, field, fields
 from enum import Enum
+import numpy as np
+from game_core import PlayerAttributes, njit
 
 class CourseType(Enum):
     FIRST_AID = "急救常识"
@@ -18,18 +24,104 @@ class CourseType(Enum):
     FINANCIAL_MANAGEMENT = "理财规划"
     ENGLISH = "英语口语"
 
+# 课程类型按定义顺序排列，课程元组按这个顺序取下标
+_COURSE_TYPES = tuple(CourseType)
+
+# 课程说明、职业福利等展示用文字放在随程序分发的数据文件里，界面第一次用到时才加载
+COURSE_TEXT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "courses.json")
+CAREER_TEXT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "careers.json")
+
+@lru_cache(maxsize=None)
+def _load_texts(filename: str) -> Dict[str, Dict]:
+    """加载展示文字数据文件（每个文件只读一次）"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# 玩家属性里实际存在的字段；课程加成、解锁要求中的其它技能名（如 first_aid）在玩家属性上没有对应字段，一律忽略
+_ATTRIBUTE_NAMES = frozenset(f.name for f in fields(PlayerAttributes) if not f.name.startswith('_'))
+
+# 等级要求的打包比较：参与版本号的能力属性各占一个 16 位通道，每个通道最高位是保护位。
+# 玩家等级（置上保护位）减去要求等级后，只要有一个通道不够减就会借走该通道的保护位，
+# 所以"所有要求都满足"等价于一次减法后保护位全部还在。等级超过 15 位的按上限计。
+_SKILL_NAMES = tuple(f.name for f in fields(PlayerAttributes)
+                     if f.name in _ATTRIBUTE_NAMES and f.name not in PlayerAttributes._UNVERSIONED)
+_LANE_MAX = (1 << 15) - 1
+_LANE_GUARDS = sum(1 << (16 * i + 15) for i in range(len(_SKILL_NAMES)))
+
+def _pack_levels(levels: Mapping[str, int]) -> int:
+    """按 _SKILL_NAMES 的通道把等级打包成一个整数（没有的技能按 0 级）"""
+    packed = 0
+    for i, name in enumerate(_SKILL_NAMES):
+        level = levels.get(name, 0)
+        packed |= (0 if level < 0 else _LANE_MAX if level > _LANE_MAX else level) << (16 * i)
+    return packed
+
+# 最近一次打包的玩家等级：(属性版本号, 打包值)。版本号全局递增，不同玩家也不会混用
+_packed_player = (-1, 0)
+
+def _packed_player_levels(attributes) -> int:
+    """玩家能力属性的打包值，属性未变化时直接复用"""
+    global _packed_player
+    version = attributes._version
+    if _packed_player[0] != version:
+        _packed_player = (version, _pack_levels({name: getattr(attributes, name) for name in _SKILL_NAMES}))
+    return _packed_player[1]
+
+def _meets_levels(player_packed: int, required_packed: int) -> bool:
+    """玩家等级是否满足全部要求（一次减法 + 一次按位与）"""
+    return ((player_packed | _LANE_GUARDS) - required_packed) & _LANE_GUARDS == _LANE_GUARDS
+
 class ExamDifficulty(Enum):
     EASY = "简单"
     MEDIUM = "中等"
     HARD = "困难"
 
+# 各难度的考试基础通过率，课程考试和转职考试共用
+_BASE_PASS_RATE = {
+    ExamDifficulty.EASY: 0.8,
+    ExamDifficulty.MEDIUM: 0.6,
+    ExamDifficulty.HARD: 0.4
+}
+
 class EducationLevel(Enum):
     HIGH_SCHOOL = "高中"
     COLLEGE = "大专"
     BACHELOR = "本科"
     MASTER = "硕士"
 
-@dataclass
+@njit(cache=True)
+def _study_effectiveness(duration_minutes, stamina, education_level):
+    """学习效果：体力、时长（超过2小时开始疲劳）和教育等级，结果限制在 0.1-1.0"""
+    time_penalty = (duration_minutes - 120) * 0.005 if duration_minutes > 120 else 0.0
+    effectiveness = 0.7 * (stamina / 100) + education_level * 0.05 - time_penalty
+    return 0.1 if effectiveness < 0.1 else 1.0 if effectiveness > 1.0 else effectiveness
+
+@njit(cache=True)
+def _pass_probability(base_rate, avg_effectiveness, skill_bonus):
+    """考试通过概率：基础通过率 × 平均学习效果 + 技能加成，结果限制在 0.1-0.95"""
+    probability = base_rate * avg_effectiveness + skill_bonus
+    return 0.1 if probability < 0.1 else 0.95 if probability > 0.95 else probability
+
+class _UniformBuffer:
+    """[0, 1) 均匀随机数缓冲：一次向生成器取一批，之后逐个取用"""
+    
+    __slots__ = ('_rng', '_size', '_buf', '_idx')
+    
+    def __init__(self, rng: np.random.Generator, size: int = 4096):
+        self._rng = rng
+        self._size = size
+        self._buf: List[float] = []
+        self._idx = 0
+    
+    def __call__(self) -> float:
+        idx = self._idx
+        if idx >= len(self._buf):
+            self._buf = self._rng.random(self._size).tolist()
+            idx = 0
+        self._idx = idx + 1
+        return self._buf[idx]
+
+@dataclass(slots=True)
 class Course:
     """课程数据"""
     course_type: CourseType
@@ -39,9 +131,22 @@ class Course:
     difficulty: ExamDifficulty
     skill_bonuses: Dict[str, int]  # 技能加成
     unlock_requirements: Dict[str, int]  # 解锁要求
-    description: str
+    # 只保留玩家属性里存在的技能，构造时算好，报名、考试时直接遍历
+    valid_bonuses: Tuple[Tuple[str, int], ...] = field(default=(), init=False, repr=False, compare=False)
+    packed_requirements: int = field(default=0, init=False, repr=False, compare=False)  # 解锁要求的打包等级
+    base_pass_rate: float = field(default=0.0, init=False, repr=False, compare=False)  # 按难度的考试基础通过率
+    
+    def __post_init__(self):
+        self.base_pass_rate = _BASE_PASS_RATE[self.difficulty]
+        self.valid_bonuses = tuple((k, v) for k, v in self.skill_bonuses.items() if k in _ATTRIBUTE_NAMES)
+        self.packed_requirements = _pack_levels(self.unlock_requirements)
+    
+    @property
+    def description(self) -> str:
+        """课程说明（来自 courses.json）"""
+        return _load_texts(COURSE_TEXT_FILE)[self.course_type.name]["description"]
 
-@dataclass
+@dataclass(slots=True)
 class SkillProgress:
     """技能进度"""
     direction_sense: int = 1
@@ -54,22 +159,106 @@ class SkillProgress:
     financial_management: int = 0
     language_skills: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class StudySession:
     """学习记录"""
     course_type: CourseType
-    start_time: datetime
+    start_time: float  # 开始时间（time.time() 时间戳）
     duration_minutes: int
     effectiveness: float  # 学习效果 0.0-1.0
     experience_gained: int
     cost: float
+    
+    @property
+    def start_datetime(self) -> datetime:
+        """开始时间的 datetime 形式"""
+        return datetime.fromtimestamp(self.start_time)
+
+def _build_courses() -> Dict[CourseType, Course]:
+    """构造课程表"""
+    courses = {
+        CourseType.FIRST_AID: Course(
+            course_type=CourseType.FIRST_AID,
+            name="急救常识培训",
+            duration_hours=20,
+            cost=200.0,
+            difficulty=ExamDifficulty.EASY,
+            skill_bonuses={"first_aid": 3, "customer_service": 1},
+            unlock_requirements={}
+        ),
+        CourseType.COMMUNICATION: Course(
+            course_type=CourseType.COMMUNICATION,
+            name="沟通心理学",
+            duration_hours=30,
+            cost=400.0,
+            difficulty=ExamDifficulty.MEDIUM,
+            skill_bonuses={"emotional_intelligence": 2, "communication": 3},
+            unlock_requirements={}
+        ),
+        CourseType.TRAFFIC_SAFETY: Course(
+            course_type=CourseType.TRAFFIC_SAFETY,
+            name="交通安全知识",
+            duration_hours=15,
+            cost=150.0,
+            difficulty=ExamDifficulty.EASY,
+            skill_bonuses={"traffic_safety": 3, "direction_sense": 1},
+            unlock_requirements={}
+        ),
+        CourseType.CUSTOMER_SERVICE: Course(
+            course_type=CourseType.CUSTOMER_SERVICE,
+            name="客户服务技巧",
+            duration_hours=25,
+            cost=300.0,
+            difficulty=ExamDifficulty.MEDIUM,
+            skill_bonuses={"customer_service": 3, "emotional_intelligence": 1},
+            unlock_requirements={"communication": 2}
+        ),
+        CourseType.FINANCIAL_MANAGEMENT: Course(
+            course_type=CourseType.FINANCIAL_MANAGEMENT,
+            name="个人理财规划",
+            duration_hours=40,
+            cost=600.0,
+            difficulty=ExamDifficulty.HARD,
+            skill_bonuses={"financial_management": 4, "education_level": 1},
+            unlock_requirements={"education_level": 3}
+        ),
+        CourseType.ENGLISH: Course(
+            course_type=CourseType.ENGLISH,
+            name="英语口语提升",
+            duration_hours=50,
+            cost=800.0,
+            difficulty=ExamDifficulty.HARD,
+            skill_bonuses={"language_skills": 4, "customer_service": 2},
+            unlock_requirements={"education_level": 2}
+        )
+    }
+    return courses
+
+# 课程表在模块加载时构造一次，所有夜校实例共用（只读）
+_DEFAULT_COURSES: Mapping[CourseType, Course] = MappingProxyType(_build_courses())
+# 与 _DEFAULT_COURSES 相同的课程，按 _COURSE_TYPES 的下标存放；tuple.index 先比较对象身份，不走 Enum 的 Python 级 __hash__
+_COURSE_LIST = tuple(_DEFAULT_COURSES[t] for t in _COURSE_TYPES)
 
 class NightSchool:
     """夜校系统"""
     
-    def __init__(self):
-        self.courses = self._initialize_courses()
-        self.study_schedule = []
+    def __init__(self, rng: Optional[np.random.Generator] = None):
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self._rand = _UniformBuffer(self._rng)
+        # 课程表所有实例共用，只读
+        self.courses: Mapping[CourseType, Course] = _DEFAULT_COURSES
+        # 学习记录按列存放（每个字段一个数组，容量不够时翻倍），按课程记下各自的行号；
+        # 需要 StudySession 对象时再用 study_sessions() 构造
+        self._log_size = 0
+        self._log_start = np.zeros(64, dtype=np.float64)  # 开始时间（时间戳，秒）
+        self._log_duration = np.zeros(64, dtype=np.int32)
+        self._log_effectiveness = np.zeros(64, dtype=np.float32)
+        self._log_experience = np.zeros(64, dtype=np.int32)
+        self._rows_by_course: Dict[CourseType, List[int]] = defaultdict(list)
+        # 按课程累计学习时长、效果总和和次数，查询时不用扫描学习记录
+        self.total_minutes: Dict[CourseType, int] = defaultdict(int)
+        self.effectiveness_sum: Dict[CourseType, float] = defaultdict(float)
+        self.session_count: Dict[CourseType, int] = defaultdict(int)
         self.graduation_requirements = {
             EducationLevel.HIGH_SCHOOL: {"total_hours": 200, "min_courses": 3},
             EducationLevel.COLLEGE: {"total_hours": 500, "min_courses": 6},
@@ -77,78 +266,12 @@ class NightSchool:
             EducationLevel.MASTER: {"total_hours": 1500, "min_courses": 15}
         }
     
-    def _initialize_courses(self) -> Dict[CourseType, Course]:
-        """初始化课程"""
-        courses = {
-            CourseType.FIRST_AID: Course(
-                course_type=CourseType.FIRST_AID,
-                name="急救常识培训",
-                duration_hours=20,
-                cost=200.0,
-                difficulty=ExamDifficulty.EASY,
-                skill_bonuses={"first_aid": 3, "customer_service": 1},
-                unlock_requirements={},
-                description="学习基础急救知识，降低医院单纠纷率"
-            ),
-            CourseType.COMMUNICATION: Course(
-                course_type=CourseType.COMMUNICATION,
-                name="沟通心理学",
-                duration_hours=30,
-                cost=400.0,
-                difficulty=ExamDifficulty.MEDIUM,
-                skill_bonuses={"emotional_intelligence": 2, "communication": 3},
-                unlock_requirements={},
-                description="提升情商和沟通技巧，减少客户投诉"
-            ),
-            CourseType.TRAFFIC_SAFETY: Course(
-                course_type=CourseType.TRAFFIC_SAFETY,
-                name="交通安全知识",
-                duration_hours=15,
-                cost=150.0,
-                difficulty=ExamDifficulty.EASY,
-                skill_bonuses={"traffic_safety": 3, "direction_sense": 1},
-                unlock_requirements={},
-                description="提升交通安全意识，降低事故风险"
-            ),
-            CourseType.CUSTOMER_SERVICE: Course(
-                course_type=CourseType.CUSTOMER_SERVICE,
-                name="客户服务技巧",
-                duration_hours=25,
-                cost=300.0,
-                difficulty=ExamDifficulty.MEDIUM,
-                skill_bonuses={"customer_service": 3, "emotional_intelligence": 1},
-                unlock_requirements={"communication": 2},
-                description="专业客服技能，提升客户满意度"
-            ),
-            CourseType.FINANCIAL_MANAGEMENT: Course(
-                course_type=CourseType.FINANCIAL_MANAGEMENT,
-                name="个人理财规划",
-                duration_hours=40,
-                cost=600.0,
-                difficulty=ExamDifficulty.HARD,
-                skill_bonuses={"financial_management": 4, "education_level": 1},
-                unlock_requirements={"education_level": 3},
-                description="理财投资知识，改善财务状况"
-            ),
-            CourseType.ENGLISH: Course(
-                course_type=CourseType.ENGLISH,
-                name="英语口语提升",
-                duration_hours=50,
-                cost=800.0,
-                difficulty=ExamDifficulty.HARD,
-                skill_bonuses={"language_skills": 4, "customer_service": 2},
-                unlock_requirements={"education_level": 2},
-                description="提升英语水平，接待外国客户"
-            )
-        }
-        return courses
-    
     def enroll_course(self, course_type: CourseType, game_state) -> Dict:
         """报名课程"""
-        course = self.courses[course_type]
+        course = _COURSE_LIST[_COURSE_TYPES.index(course_type)]
         
         # 检查前置要求
-        if not self._check_requirements(course.unlock_requirements, game_state):
+        if not self._check_requirements(course.packed_requirements, game_state):
             return {
                 'success': False,
                 'message': '不满足课程前置要求',
@@ -187,36 +310,64 @@ class NightSchool:
         
         # 消耗体力
         stamina_cost = duration_minutes // 5
-        game_state.attributes.stamina = max(0, game_state.attributes.stamina - stamina_cost)
+        stamina = game_state.attributes.stamina - stamina_cost
+        game_state.attributes.stamina = 0 if stamina < 0 else stamina
         
         # 记录学习
-        session = StudySession(
-            course_type=course_type,
-            start_time=datetime.now(),
-            duration_minutes=duration_minutes,
-            effectiveness=effectiveness,
-            experience_gained=experience_gained,
-            cost=0  # 已经在报名时支付
-        )
-        
-        self.study_schedule.append(session)
+        self._record_session(course_type, time.time(), duration_minutes, effectiveness, experience_gained)
+        self.total_minutes[course_type] += duration_minutes
+        self.effectiveness_sum[course_type] += effectiveness
+        self.session_count[course_type] += 1
         
         return {
             'effectiveness': effectiveness,
             'experience_gained': experience_gained,
             'stamina_cost': stamina_cost,
-            'total_study_time': sum(s.duration_minutes for s in self.study_schedule if s.course_type == course_type)
+            'total_study_time': self.total_minutes[course_type]
         }
     
+    def _record_session(self, course_type: CourseType, start: float, duration_minutes: int,
+                        effectiveness: float, experience_gained: int):
+        """在学习记录末尾追加一行"""
+        row = self._log_size
+        if row == len(self._log_duration):
+            capacity = 2 * row
+            self._log_start = np.resize(self._log_start, capacity)
+            self._log_duration = np.resize(self._log_duration, capacity)
+            self._log_effectiveness = np.resize(self._log_effectiveness, capacity)
+            self._log_experience = np.resize(self._log_experience, capacity)
+        self._log_start[row] = start
+        self._log_duration[row] = duration_minutes
+        self._log_effectiveness[row] = effectiveness
+        self._log_experience[row] = experience_gained
+        self._rows_by_course[course_type].append(row)
+        self._log_size = row + 1
+    
+    def study_sessions(self, course_type: CourseType) -> List[StudySession]:
+        """某门课程的全部学习记录（按时间顺序构造 StudySession）"""
+        rows = self._rows_by_course.get(course_type)
+        if not rows:
+            return []
+        return [
+            StudySession(
+                course_type=course_type,
+                start_time=start,
+                duration_minutes=duration,
+                effectiveness=effectiveness,
+                experience_gained=experience,
+                cost=0  # 已经在报名时支付
+            )
+            for start, duration, effectiveness, experience in zip(
+                self._log_start[rows].tolist(), self._log_duration[rows].tolist(),
+                self._log_effectiveness[rows].tolist(), self._log_experience[rows].tolist())
+        ]
+    
     def take_exam(self, course_type: CourseType, game_state) -> Dict:
         """参加考试"""
-        course = self.courses[course_type]
+        course = _COURSE_LIST[_COURSE_TYPES.index(course_type)]
         
         # 计算学习时间
-        total_study_time = sum(
-            s.duration_minutes for s in self.study_schedule 
-            if s.course_type == course_type
-        )
+        total_study_time = self.total_minutes[course_type]
         
         required_time = course.duration_hours * 60
         
@@ -232,11 +383,11 @@ class NightSchool:
         pass_probability = self._calculate_pass_probability(course_type, game_state)
         
         # 考试结果
-        passed = random.random() < pass_probability
+        passed = self._rand() < pass_probability
         
         if passed:
             # 应用技能加成
-            self._apply_skill_bonuses(course.skill_bonuses, game_state)
+            self._apply_skill_bonuses(course.valid_bonuses, game_state)
             
             return {
                 'success': True,
@@ -252,110 +403,162 @@ class NightSchool:
                 'pass_probability': pass_probability
             }
     
-    def _check_requirements(self, requirements: Dict[str, int], game_state) -> bool:
-        """检查前置要求"""
-        for skill, min_level in requirements.items():
-            if hasattr(game_state.attributes, skill):
-                if getattr(game_state.attributes, skill) < min_level:
-                    return False
-        return True
-    
-    def _calculate_study_effectiveness(self, duration_minutes: int, game_state) -> float:
-        """计算学习效果"""
-        base_effectiveness = 0.7
+    def batch_take_exam(self, course_type: CourseType, game_states: List) -> Dict[str, np.ndarray]:
+        """一批玩家按本夜校的学习记录同时参加考试（用于平衡性调试、批量模拟），返回按玩家排列的结果数组
         
-        # 体力影响
-        stamina_factor = game_state.attributes.stamina / 100
+        通过率规则与 take_exam 相同；学习时间不足时全部不通过。通过的玩家各自应用技能加成。
+        """
+        course = _COURSE_LIST[_COURSE_TYPES.index(course_type)]
+        n = len(game_states)
         
-        # 时间影响（太长会疲劳）
-        if duration_minutes > 120:
-            time_penalty = (duration_minutes - 120) * 0.005
-        else:
-            time_penalty = 0
+        if self.total_minutes[course_type] < course.duration_hours * 60:
+            return {'passed': np.zeros(n, dtype=bool), 'pass_probability': np.zeros(n)}
         
-        # 教育等级影响
-        education_bonus = game_state.attributes.education_level * 0.05
+        count = self.session_count[course_type]
+        avg_effectiveness = self.effectiveness_sum[course_type] / count if count else 0.5
         
-        effectiveness = base_effectiveness * stamina_factor + education_bonus - time_penalty
+        # 相关技能加成：按技能逐列取出各玩家的属性值
+        skill_bonus = np.zeros(n)
+        for skill, _ in course.valid_bonuses:
+            skill_bonus += np.fromiter((getattr(gs.attributes, skill) for gs in game_states), dtype=np.float64, count=n)
+        skill_bonus *= 0.02
         
-        return max(0.1, min(1.0, effectiveness))
+        probs = skill_bonus
+        probs += course.base_pass_rate * avg_effectiveness
+        np.clip(probs, 0.1, 0.95, out=probs)
+        passed = self._rng.random(n) < probs
+        
+        bonuses = course.valid_bonuses
+        for i in np.flatnonzero(passed).tolist():
+            self._apply_skill_bonuses(bonuses, game_states[i])
+        
+        return {'passed': passed, 'pass_probability': probs}
+    
+    def _check_requirements(self, packed_requirements: int, game_state) -> bool:
+        """检查前置要求（packed_requirements 为打包的最低等级）"""
+        return _meets_levels(_packed_player_levels(game_state.attributes), packed_requirements)
+    
+    def _calculate_study_effectiveness(self, duration_minutes: int, game_state) -> float:
+        """计算学习效果"""
+        attributes = game_state.attributes
+        return _study_effectiveness(duration_minutes, attributes.stamina, attributes.education_level)
     
     def _calculate_pass_probability(self, course_type: CourseType, game_state) -> float:
         """计算考试通过概率"""
-        course = self.courses[course_type]
+        course = _COURSE_LIST[_COURSE_TYPES.index(course_type)]
         
         # 基础通过率
-        base_rates = {
-            ExamDifficulty.EASY: 0.8,
-            ExamDifficulty.MEDIUM: 0.6,
-            ExamDifficulty.HARD: 0.4
-        }
-        
-        base_rate = base_rates[course.difficulty]
+        base_rate = course.base_pass_rate
         
         # 学习质量加成
-        study_sessions = [s for s in self.study_schedule if s.course_type == course_type]
-        avg_effectiveness = sum(s.effectiveness for s in study_sessions) / len(study_sessions) if study_sessions else 0.5
+        count = self.session_count[course_type]
+        avg_effectiveness = self.effectiveness_sum[course_type] / count if count else 0.5
         
         # 相关技能加成
-        skill_bonus = 0
-        for skill in course.skill_bonuses.keys():
-            if hasattr(game_state.attributes, skill):
-                skill_bonus += getattr(game_state.attributes, skill) * 0.02
-        
-        probability = base_rate * avg_effectiveness + skill_bonus
+        attributes = game_state.attributes
+        skill_bonus = 0.0
+        for skill, _ in course.valid_bonuses:
+            skill_bonus += getattr(attributes, skill) * 0.02
         
-        return max(0.1, min(0.95, probability))
+        return _pass_probability(base_rate, avg_effectiveness, skill_bonus)
     
-    def _apply_skill_bonuses(self, bonuses: Dict[str, int], game_state):
-        """应用技能加成"""
-        for skill, bonus in bonuses.items():
-            if hasattr(game_state.attributes, skill):
-                current_value = getattr(game_state.attributes, skill)
-                setattr(game_state.attributes, skill, current_value + bonus)
+    def _apply_skill_bonuses(self, bonuses: Tuple[Tuple[str, int], ...], game_state):
+        """应用技能加成（bonuses 为已过滤的 (技能, 加成)）"""
+        attributes = game_state.attributes
+        for skill, bonus in bonuses:
+            setattr(attributes, skill, getattr(attributes, skill) + bonus)
+
+class CareerSpec(NamedTuple):
+    """职业信息（只读）"""
+    name: str
+    requirements: Mapping[str, int]  # 技能要求
+    exam_difficulty: ExamDifficulty
+    req_skills: Tuple[str, ...]  # 技能要求中玩家属性里实际存在的技能名，按要求的顺序
+    packed_requirements: int  # 技能要求的打包等级
+    
+    @property
+    def benefits(self) -> Dict[str, object]:
+        """职业福利（来自 careers.json）"""
+        return _load_texts(CAREER_TEXT_FILE)[self.name]["benefits"]
+
+def _career_spec(name: str, requirements: Dict[str, int], exam_difficulty: ExamDifficulty) -> CareerSpec:
+    """构造只读的职业信息；不在玩家属性里的技能按 0 级计，资格检查时跳过、不影响转职加成"""
+    return CareerSpec(
+        name=name,
+        requirements=MappingProxyType(requirements),
+        exam_difficulty=exam_difficulty,
+        req_skills=tuple(skill for skill in requirements if skill in _ATTRIBUTE_NAMES),
+        packed_requirements=_pack_levels(requirements)
+    )
+
+# 职业表在模块加载时构造一次
+_DEFAULT_CAREERS: Mapping[str, CareerSpec] = MappingProxyType({
+    "公务员": _career_spec(
+        name="公务员",
+        requirements={"education_level": 5, "communication": 3},
+        exam_difficulty=ExamDifficulty.HARD
+    ),
+    "企业管理": _career_spec(
+        name="企业管理",
+        requirements={"education_level": 4, "financial_management": 3},
+        exam_difficulty=ExamDifficulty.MEDIUM
+    ),
+    "客服主管": _career_spec(
+        name="客服主管",
+        requirements={"customer_service": 4, "emotional_intelligence": 3},
+        exam_difficulty=ExamDifficulty.EASY
+    ),
+    "培训师": _career_spec(
+        name="培训师",
+        requirements={"communication": 4, "education_level": 3},
+        exam_difficulty=ExamDifficulty.MEDIUM
+    )
+})
 
 class CareerTransition:
     """职业转换系统"""
     
-    def __init__(self):
-        self.available_careers = {
-            "公务员": {
-                "requirements": {"education_level": 5, "communication": 3},
-                "exam_difficulty": ExamDifficulty.HARD,
-                "benefits": {"stable_income": 8000, "social_status": "high"}
-            },
-            "企业管理": {
-                "requirements": {"education_level": 4, "financial_management": 3},
-                "exam_difficulty": ExamDifficulty.MEDIUM,
-                "benefits": {"variable_income": (6000, 15000), "growth_potential": "high"}
-            },
-            "客服主管": {
-                "requirements": {"customer_service": 4, "emotional_intelligence": 3},
-                "exam_difficulty": ExamDifficulty.EASY,
-                "benefits": {"stable_income": 5000, "work_environment": "good"}
-            },
-            "培训师": {
-                "requirements": {"communication": 4, "education_level": 3},
-                "exam_difficulty": ExamDifficulty.MEDIUM,
-                "benefits": {"hourly_rate": 200, "flexible_schedule": True}
-            }
-        }
+    def __init__(self, rng: Optional[np.random.Generator] = None):
+        self._rand = _UniformBuffer(rng if rng is not None else np.random.default_rng())
+        # 职业表所有实例共用且只读：资格检查结果的缓存依赖它不被修改
+        self.available_careers: Mapping[str, CareerSpec] = _DEFAULT_CAREERS
+        # 资格检查结果缓存：(职业, 属性版本号) -> 结果；版本号变化时整体清空
+        self._elig_cache: Dict[Tuple[str, int], Dict] = {}
+        self._elig_cache_version = -1
     
     def check_eligibility(self, career: str, game_state) -> Dict:
-        """检查职业资格"""
+        """检查职业资格，能力属性未变化时直接复用上次的结果"""
         if career not in self.available_careers:
             return {'eligible': False, 'message': '职业不存在'}
         
-        requirements = self.available_careers[career]["requirements"]
-        
-        for skill, min_level in requirements.items():
-            if hasattr(game_state.attributes, skill):
-                if getattr(game_state.attributes, skill) < min_level:
-                    return {
-                        'eligible': False,
-                        'message': f'{skill}等级不足，需要{min_level}级',
-                        'current_level': getattr(game_state.attributes, skill)
-                    }
+        attributes = game_state.attributes
+        version = attributes._version
+        if version != self._elig_cache_version:
+            self._elig_cache.clear()
+            self._elig_cache_version = version
+        key = (career, version)
+        result = self._elig_cache.get(key)
+        if result is None:
+            result = self._elig_cache[key] = self._evaluate_eligibility(career, attributes)
+        return result
+    
+    def _evaluate_eligibility(self, career: str, attributes) -> Dict:
+        """比较职业要求与玩家属性"""
+        spec = self.available_careers[career]
+        if _meets_levels(_packed_player_levels(attributes), spec.packed_requirements):
+            return {'eligible': True, 'message': f'符合{career}职业要求'}
+        
+        # 不满足时再逐项找出第一个不够的技能
+        requirements = spec.requirements
+        for skill in spec.req_skills:
+            min_level = requirements[skill]
+            current_level = getattr(attributes, skill)
+            if current_level < min_level:
+                return {
+                    'eligible': False,
+                    'message': f'{skill}等级不足，需要{min_level}级',
+                    'current_level': current_level
+                }
         
         return {'eligible': True, 'message': f'符合{career}职业要求'}
     
@@ -366,31 +569,24 @@ class CareerTransition:
         if not eligibility['eligible']:
             return eligibility
         
-        career_info = self.available_careers[career]
-        difficulty = career_info["exam_difficulty"]
+        spec = self.available_careers[career]
         
         # 计算成功概率
-        success_rates = {
-            ExamDifficulty.EASY: 0.8,
-            ExamDifficulty.MEDIUM: 0.6,
-            ExamDifficulty.HARD: 0.4
-        }
-        
-        success_rate = success_rates[difficulty]
+        success_rate = _BASE_PASS_RATE[spec.exam_difficulty]
         
         # 根据技能水平调整
-        skill_bonus = sum(
-            getattr(game_state.attributes, skill, 0) * 0.05 
-            for skill in career_info["requirements"].keys()
-        )
+        attributes = game_state.attributes
+        skill_bonus = sum([getattr(attributes, skill) for skill in spec.req_skills]) * 0.05
         
-        final_success_rate = min(0.9, success_rate + skill_bonus)
+        final_success_rate = success_rate + skill_bonus
+        if final_success_rate > 0.9:
+            final_success_rate = 0.9
         
-        if random.random() < final_success_rate:
+        if self._rand() < final_success_rate:
             return {
                 'success': True,
                 'career': career,
-                'benefits': career_info["benefits"],
+                'benefits': dict(spec.benefits),
                 'message': f'恭喜成功转职为{career}！'
             }
         else:
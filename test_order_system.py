@@ -0,0 +1,48 @@
+"""订单生成的一致性测试：逐单生成和批量生成（列式 / Order 列表）的金额应逐分一致"""
+import unittest
+
+import numpy as np
+
+from game_core import WeatherType
+from order_system import OrderGenerator
+
+
+class OrderGenerationConsistencyTest(unittest.TestCase):
+    """奖励金额按基础费用 round 到分（与原来逐单计算的公式相同）"""
+    
+    N = 4000
+    
+    def _expected(self, generator, weather, is_peak, base_fee):
+        weather_bonus = round(base_fee * generator._WEATHER_BONUSES[weather], 2)
+        peak_bonus = round(base_fee * 0.2, 2) if is_peak else 0.0
+        return weather_bonus, peak_bonus
+    
+    def test_paths_agree_on_bonuses(self):
+        generator = OrderGenerator(rng=np.random.default_rng(20240501))
+        for weather in generator._WEATHER_BONUSES:
+            for hour in (9, 12):
+                is_peak = hour in generator._PEAK_HOURS
+                with self.subTest(weather=weather, hour=hour):
+                    soa = generator.generate_batch_soa(self.N, weather, hour)
+                    orders = soa.to_orders()
+                    singles = [generator.generate_order(weather, hour) for _ in range(self.N)]
+                    
+                    for i, order in enumerate(orders):
+                        expected = self._expected(generator, weather, is_peak, order.base_fee)
+                        self.assertEqual((soa.weather_bonus[i], soa.peak_hour_bonus[i]), expected)
+                        self.assertEqual((order.weather_bonus, order.peak_hour_bonus), expected)
+                        self.assertEqual(soa.order(i), order)
+                    
+                    for order in singles:
+                        expected = self._expected(generator, weather, is_peak, order.base_fee)
+                        self.assertEqual((order.weather_bonus, order.peak_hour_bonus), expected)
+    
+    def test_paths_agree_on_base_fees(self):
+        generator = OrderGenerator(rng=np.random.default_rng(7))
+        batch_fees = set(generator.generate_batch_soa(self.N, WeatherType.RAINY, 12).base_fee.tolist())
+        single_fees = {generator.generate_order(WeatherType.RAINY, 12).base_fee for _ in range(self.N)}
+        self.assertEqual(batch_fees, single_fees)
+
+
+if __name__ == '__main__':
+    unittest.main()